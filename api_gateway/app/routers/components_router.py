@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Request, Header, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from typing import Dict, Any, Optional
 import httpx
 
@@ -8,6 +9,47 @@ from app.utils.security import verify_token # Usamos tu validador de token
 
 router = APIRouter(prefix="/components", tags=["3. Components"])
 
+# Validadores HTTP que viajan entre el cliente y el microservicio
+_VALIDATOR_HEADERS = ("etag", "cache-control")
+
+
+def _conditional_headers(request: Request) -> Dict[str, str]:
+    # Reenvía If-None-Match para que el microservicio pueda responder 304
+    value = request.headers.get("if-none-match")
+    return {"If-None-Match": value} if value else {}
+
+
+def _reader_headers(request: Request) -> Dict[str, str]:
+    """
+    En las lecturas, si hay un token válido se reenvía 'X-User-ID': el
+    microservicio lee de la primaria (no de la réplica) justo después
+    de que ese usuario escribió. Sin token (o inválido) no se exige nada.
+    """
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return {}
+    try:
+        user_id = verify_token(authorization).get("sub")
+    except HTTPException:
+        return {}
+    return {"X-User-ID": str(user_id)} if user_id else {}
+
+
+def _passthrough(resp: httpx.Response) -> Response:
+    """
+    Devuelve la respuesta del microservicio tal cual (bytes, sin
+    re-parsear el JSON), conservando ETag/Cache-Control y los 304.
+    """
+    headers = {name: resp.headers[name] for name in _VALIDATOR_HEADERS if name in resp.headers}
+    if resp.status_code == status.HTTP_304_NOT_MODIFIED:
+        return Response(status_code=resp.status_code, headers=headers)
+    return Response(
+        content=resp.content,
+        status_code=resp.status_code,
+        media_type=resp.headers.get("content-type"),
+        headers=headers
+    )
+
 # Obtenemos la URL base del microservicio desde la configuración
 SERVICE_URL = SERVICE_CONFIG.get("component")
 if not SERVICE_URL:
@@ -31,34 +73,295 @@ async def get_component_list(request: Request):
             resp = await client.get(
                 f"{SERVICE_URL}/api/v1/components/",
                 params=params,
+                headers={**_conditional_headers(request), **_reader_headers(request)},
                 timeout=10.0
             )
-            return JSONResponse(status_code=resp.status_code, content=resp.json())
+            return _passthrough(resp)
         except Exception as e:
             logger.error(f"Error reenviando a components-service (GET /): {e}")
             raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Servicio de componentes no disponible")
 
 
+@router.get(
+    "/suggest",
+    summary="[Proxy] Autocompletar nombres de componentes"
+)
+async def suggest_components(request: Request):
+    """
+    Reenvía la consulta de autocompletado (q, limit).
+    """
+    async with httpx.AsyncClient() as client:
+        try:
+            resp = await client.get(
+                f"{SERVICE_URL}/api/v1/components/suggest",
+                params=request.query_params,
+                timeout=5.0
+            )
+            return JSONResponse(status_code=resp.status_code, content=resp.json())
+        except Exception as e:
+            logger.error(f"Error reenviando a components-service (GET /suggest): {e}")
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Servicio de componentes no disponible")
+
+
+@router.get(
+    "/facets",
+    summary="[Proxy] Conteos por categoría/marca e histograma de precios"
+)
+async def get_component_facets(request: Request):
+    """
+    Reenvía la solicitud de facetas con los mismos filtros que la lista.
+    """
+    async with httpx.AsyncClient() as client:
+        try:
+            resp = await client.get(
+                f"{SERVICE_URL}/api/v1/components/facets",
+                params=request.query_params,
+                timeout=10.0
+            )
+            return JSONResponse(status_code=resp.status_code, content=resp.json())
+        except Exception as e:
+            logger.error(f"Error reenviando a components-service (GET /facets): {e}")
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Servicio de componentes no disponible")
+
+
+@router.get(
+    "/price-stats",
+    summary="[Proxy] Percentiles de precio por categoría y marca"
+)
+async def get_price_statistics(request: Request):
+    """
+    Reenvía la consulta de estadísticas de precio (category).
+    """
+    async with httpx.AsyncClient() as client:
+        try:
+            resp = await client.get(
+                f"{SERVICE_URL}/api/v1/components/price-stats",
+                params=request.query_params,
+                timeout=10.0
+            )
+            return JSONResponse(status_code=resp.status_code, content=resp.json())
+        except Exception as e:
+            logger.error(f"Error reenviando a components-service (GET /price-stats): {e}")
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Servicio de componentes no disponible")
+
+
+@router.get(
+    "/snapshot",
+    summary="[Proxy] Catálogo completo versionado (gzip)"
+)
+async def get_catalog_snapshot(request: Request):
+    """
+    Reenvía el snapshot SIN descomprimirlo: los bytes gzip del
+    microservicio llegan tal cual al cliente.
+    """
+    accept_encoding = request.headers.get("accept-encoding", "")
+    async with httpx.AsyncClient() as client:
+        try:
+            req = client.build_request(
+                "GET",
+                f"{SERVICE_URL}/api/v1/components/snapshot",
+                headers={"Accept-Encoding": accept_encoding},
+                timeout=30.0
+            )
+            resp = await client.send(req, stream=True)
+            try:
+                content = b"".join([chunk async for chunk in resp.aiter_raw()])
+            finally:
+                await resp.aclose()
+        except Exception as e:
+            logger.error(f"Error reenviando a components-service (GET /snapshot): {e}")
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Servicio de componentes no disponible")
+
+    headers = {
+        name: resp.headers[name]
+        for name in ("content-encoding", "vary", "x-catalog-version")
+        if name in resp.headers
+    }
+    return Response(
+        content=content,
+        status_code=resp.status_code,
+        media_type=resp.headers.get("content-type"),
+        headers=headers
+    )
+
+
+@router.get(
+    "/changes",
+    summary="[Proxy] Cambios del catálogo desde una versión"
+)
+async def get_catalog_changes(request: Request):
+    """
+    Reenvía la consulta de cambios (since, limit).
+    """
+    async with httpx.AsyncClient() as client:
+        try:
+            resp = await client.get(
+                f"{SERVICE_URL}/api/v1/components/changes",
+                params=request.query_params,
+                timeout=10.0
+            )
+            return JSONResponse(status_code=resp.status_code, content=resp.json())
+        except Exception as e:
+            logger.error(f"Error reenviando a components-service (GET /changes): {e}")
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Servicio de componentes no disponible")
+
+
+@router.get(
+    "/export",
+    summary="[Proxy] Exportar el catálogo completo (NDJSON o CSV)"
+)
+async def export_components(request: Request):
+    """
+    Reenvía la exportación en streaming: los bytes (gzip si aplica) pasan
+    al cliente a medida que llegan, sin acumularlos en el gateway.
+    """
+    client = httpx.AsyncClient()
+    try:
+        req = client.build_request(
+            "GET",
+            f"{SERVICE_URL}/api/v1/components/export",
+            params=request.query_params,
+            headers={"Accept-Encoding": request.headers.get("accept-encoding", "")},
+            # Sin límite de lectura: la descarga puede durar minutos
+            timeout=httpx.Timeout(10.0, read=None)
+        )
+        resp = await client.send(req, stream=True)
+    except Exception as e:
+        await client.aclose()
+        logger.error(f"Error reenviando a components-service (GET /export): {e}")
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Servicio de componentes no disponible")
+
+    async def close():
+        await resp.aclose()
+        await client.aclose()
+
+    headers = {
+        name: resp.headers[name]
+        for name in ("content-encoding", "content-disposition", "vary")
+        if name in resp.headers
+    }
+    return StreamingResponse(
+        resp.aiter_raw(),
+        status_code=resp.status_code,
+        media_type=resp.headers.get("content-type"),
+        headers=headers,
+        background=BackgroundTask(close)
+    )
+
+
+@router.post(
+    "/batch",
+    summary="[Proxy] Obtener varios componentes en una sola petición"
+)
+async def get_components_batch(request: Request):
+    """
+    Reenvía la consulta en bloque ({"ids": [...], "fields": [...]}).
+    """
+    body = await request.json()
+    async with httpx.AsyncClient() as client:
+        try:
+            resp = await client.post(
+                f"{SERVICE_URL}/api/v1/components/batch",
+                json=body,
+                timeout=10.0
+            )
+            return JSONResponse(status_code=resp.status_code, content=resp.json())
+        except Exception as e:
+            logger.error(f"Error reenviando a components-service (POST /batch): {e}")
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Servicio de componentes no disponible")
+
+
 @router.get(
     "/{component_id}",
     summary="[Proxy] Obtener detalle de un componente"
 )
-async def get_component_detail(component_id: int):
+async def get_component_detail(component_id: int, request: Request):
     """
-    Reenvía la solicitud de detalle de un componente.
+    Reenvía la solicitud de detalle de un componente
+    (con If-None-Match: puede devolver 304).
     """
     async with httpx.AsyncClient() as client:
         try:
             resp = await client.get(
                 f"{SERVICE_URL}/api/v1/components/{component_id}",
+                headers={**_conditional_headers(request), **_reader_headers(request)},
                 timeout=10.0
             )
-            return JSONResponse(status_code=resp.status_code, content=resp.json())
+            return _passthrough(resp)
         except Exception as e:
             logger.error(f"Error reenviando a components-service (GET /{component_id}): {e}")
             raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Servicio de componentes no disponible")
 
 
+@router.get(
+    "/{component_id}/alternatives",
+    summary="[Proxy] Componentes similares / alternativas más baratas"
+)
+async def get_component_alternatives(component_id: int, request: Request):
+    """
+    Reenvía la consulta de alternativas precalculadas.
+    """
+    async with httpx.AsyncClient() as client:
+        try:
+            resp = await client.get(
+                f"{SERVICE_URL}/api/v1/components/{component_id}/alternatives",
+                headers=_reader_headers(request),
+                timeout=10.0
+            )
+            return JSONResponse(status_code=resp.status_code, content=resp.json())
+        except Exception as e:
+            logger.error(f"Error reenviando a components-service (GET /{component_id}/alternatives): {e}")
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Servicio de componentes no disponible")
+
+
+@router.get(
+    "/{component_id}/image",
+    summary="[Proxy] Miniatura WebP de la imagen de un componente"
+)
+async def get_component_image(component_id: int, request: Request):
+    """
+    Reenvía la miniatura (bytes WebP, ETag/Cache-Control y 304). Si el
+    microservicio redirige a la imagen original, el cliente la sigue.
+    """
+    async with httpx.AsyncClient() as client:
+        try:
+            resp = await client.get(
+                f"{SERVICE_URL}/api/v1/components/{component_id}/image",
+                params=request.query_params,
+                headers=_conditional_headers(request),
+                timeout=15.0
+            )
+        except Exception as e:
+            logger.error(f"Error reenviando a components-service (GET /{component_id}/image): {e}")
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Servicio de componentes no disponible")
+
+    if resp.is_redirect:
+        return Response(status_code=resp.status_code, headers={"location": resp.headers["location"]})
+    return _passthrough(resp)
+
+
+@router.get(
+    "/{component_id}/reviews",
+    summary="[Proxy] Obtener reseñas paginadas de un componente"
+)
+async def get_component_reviews(component_id: int, request: Request):
+    """
+    Reenvía la solicitud de reseñas paginadas (page, page_size).
+    """
+    async with httpx.AsyncClient() as client:
+        try:
+            resp = await client.get(
+                f"{SERVICE_URL}/api/v1/components/{component_id}/reviews",
+                params=request.query_params,
+                headers=_reader_headers(request),
+                timeout=10.0
+            )
+            return JSONResponse(status_code=resp.status_code, content=resp.json())
+        except Exception as e:
+            logger.error(f"Error reenviando a components-service (GET /{component_id}/reviews): {e}")
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Servicio de componentes no disponible")
+
+
 @router.post(
     "/{component_id}/reviews",
     status_code=status.HTTP_201_CREATED,
@@ -101,6 +404,81 @@ async def create_new_review(
             logger.error(f"Error reenviando a components-service (POST .../reviews): {e}")
             raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Servicio de componentes no disponible")
 
+@router.put(
+    "/{component_id}/reviews/{review_id}",
+    summary="[Proxy] Editar una reseña propia (Protegido)"
+)
+async def update_review(
+    component_id: int,
+    review_id: int,
+    request: Request,
+    authorization: str = Header(...)
+):
+    """
+    (Protegido) Reenvía la edición de una reseña.
+    """
+    token_data: Dict = verify_token(authorization)
+    user_id = token_data.get("sub")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Token inválido, falta 'sub' (user_id)")
+
+    headers = {
+        "X-User-ID": str(user_id),
+        "X-User-Name": str(token_data.get("username"))
+        }
+    body = await request.json()
+
+    async with httpx.AsyncClient() as client:
+        try:
+            resp = await client.put(
+                f"{SERVICE_URL}/api/v1/components/{component_id}/reviews/{review_id}",
+                json=body,
+                headers=headers,
+                timeout=10.0
+            )
+            return JSONResponse(status_code=resp.status_code, content=resp.json())
+        except Exception as e:
+            logger.error(f"Error reenviando a components-service (PUT .../reviews/{review_id}): {e}")
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Servicio de componentes no disponible")
+
+
+@router.delete(
+    "/{component_id}/reviews/{review_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="[Proxy] Borrar una reseña propia (Protegido)"
+)
+async def delete_review(
+    component_id: int,
+    review_id: int,
+    authorization: str = Header(...)
+):
+    """
+    (Protegido) Reenvía el borrado de una reseña.
+    """
+    token_data: Dict = verify_token(authorization)
+    user_id = token_data.get("sub")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Token inválido, falta 'sub' (user_id)")
+
+    headers = {
+        "X-User-ID": str(user_id),
+        "X-User-Name": str(token_data.get("username"))
+        }
+
+    async with httpx.AsyncClient() as client:
+        try:
+            resp = await client.delete(
+                f"{SERVICE_URL}/api/v1/components/{component_id}/reviews/{review_id}",
+                headers=headers,
+                timeout=10.0
+            )
+        except Exception as e:
+            logger.error(f"Error reenviando a components-service (DELETE .../reviews/{review_id}): {e}")
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Servicio de componentes no disponible")
+    if resp.status_code == status.HTTP_204_NO_CONTENT:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return JSONResponse(status_code=resp.status_code, content=resp.json())
+
 @router.post(
     "/{component_id}/reviews/{review_id}/comments",
     status_code=status.HTTP_201_CREATED,
@@ -91,35 +91,45 @@ def load_scores_once():
 COMPONENT_SERVICE_URL = os.getenv("COMPONENT_SERVICE_URL", "http://component-service:8003")
 
 async def fetch_components_metadata(component_ids: list[int], hints: dict[int, dict] | None) -> list[dict]:
+    # Una sola petición en bloque al component-service (solo los campos necesarios)
+    found: dict[int, dict] = {}
+    try:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            r = await client.post(
+                f"{COMPONENT_SERVICE_URL}/api/v1/components/batch",
+                json={"ids": component_ids, "fields": ["id", "name", "category"]}
+            )
+            if r.status_code == 200:
+                for item in r.json().get("items", []):
+                    found[item["id"]] = item
+            else:
+                logger.warning(f"component-service batch http {r.status_code}")
+    except Exception as e:
+        logger.warning(f"Fallo consultando component-service en bloque: {e}")
+
     out = []
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        for cid in component_ids:
-            meta = {"id": cid, "type": None, "model": None, "source": None}
-            try:
-                r = await client.get(f"{COMPONENT_SERVICE_URL}/components/{cid}")
-                if r.status_code == 200:
-                    j = r.json()
-                    meta["type"] = _norm(j.get("type", ""))  # "cpu"|"gpu"
-                    meta["model"] = j.get("model") or j.get("name") or j.get("title")
-                    meta["source"] = "component-service"
-                else:
-                    # 404 u otro → intentar hints
-                    raise RuntimeError(f"component {cid} http {r.status_code}")
-            except Exception:
-                if hints and cid in hints:
-                    meta["type"] = _norm(hints[cid].get("type"))
-                    meta["model"] = hints[cid].get("model")
-                    meta["source"] = "hint"
-                elif cid in DEMO_COMPONENT_MAP:
-                    t, m = DEMO_COMPONENT_MAP[cid]
-                    meta["type"] = t
-                    meta["model"] = m
-                    meta["source"] = "demo"
-                else:
-                    meta["type"] = "gpu"  # default razonable
-                    meta["model"] = f"Unknown-{cid}"
-                    meta["source"] = "fallback"
-            out.append(meta)
+    for cid in component_ids:
+        meta = {"id": cid, "type": None, "model": None, "source": None}
+        if cid in found:
+            j = found[cid]
+            meta["type"] = _norm(j.get("category", ""))  # "cpu"|"gpu"
+            meta["model"] = j.get("name")
+            meta["source"] = "component-service"
+        elif hints and cid in hints:
+            # 404 u otro → intentar hints
+            meta["type"] = _norm(hints[cid].get("type"))
+            meta["model"] = hints[cid].get("model")
+            meta["source"] = "hint"
+        elif cid in DEMO_COMPONENT_MAP:
+            t, m = DEMO_COMPONENT_MAP[cid]
+            meta["type"] = t
+            meta["model"] = m
+            meta["source"] = "demo"
+        else:
+            meta["type"] = "gpu"  # default razonable
+            meta["model"] = f"Unknown-{cid}"
+            meta["source"] = "fallback"
+        out.append(meta)
     return out
 
 def _origin_for(model: Optional[str], score: Optional[int]) -> str:
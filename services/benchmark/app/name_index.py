@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set
+
+# -------------------------------------------------------------------
+# Índice de resolución de nombres de modelo (búsqueda aproximada)
+# -------------------------------------------------------------------
+# Los títulos de las tiendas ("procesador amd ryzen 7 5800x3d 8 n cleos")
+# casi nunca coinciden exactos con las claves de los CSV
+# ("ryzen 7 5800x3d"). Cada nombre (ya pasado por _norm) se convierte
+# en tokens canónicos:
+#   '#5800'  número de modelo (2+ dígitos)
+#   '~x3d'   sufijo de variante (pegado al número o suelto: Ti, Super, XT...)
+#            o letra pegada delante del número (b550, a4000)
+#   'ryzen'  el resto de palabras
+# así "5800X3D", "5800 X3D" y "5800-x3d" dan los mismos tokens. Las
+# unidades ("16 GB", "12G", "4.5GHz") no son tokens; la capacidad de
+# memoria se guarda aparte ('16g') y solo desempata variantes.
+#
+# Candidatos: índice invertido de números de modelo (muy selectivo); si
+# la consulta no trae número, índice invertido de palabras + trigramas
+# de las palabras que no están en el índice (errores de tipeo).
+# Puntaje: el número del candidato TIENE que estar en la consulta, cada
+# sufijo distinto divide a la mitad, y el resto es cobertura ponderada
+# de los tokens del candidato (números > sufijos > palabras).
+#
+# Se comprueba con títulos reales: python -m app.name_index
+
+# Sufijos sueltos que cambian el modelo (y su rendimiento)
+SUFFIX_WORDS = frozenset({"ti", "super", "xt", "xtx", "x3d", "gre", "mobile", "laptop"})
+# "12gb", "4.5ghz", "16 gb": no son números de modelo
+UNIT_WORDS = frozenset({"gb", "mb", "tb", "ghz", "mhz", "hz", "w", "nm", "mm", "bit", "gbps"})
+# "8G", "12G", "2T" (memoria/capacidad abreviada): solo con 1-2 dígitos,
+# porque "5600g" o "12700t" sí son modelos
+SHORT_UNIT_WORDS = frozenset({"g", "t"})
+
+_SPLIT = re.compile(r"[\s\-]+")
+_MODEL_TOKEN = re.compile(r"([a-z]*)(\d+)([a-z0-9\+]*)")
+_UNIT_TOKEN = re.compile(r"\d+(?:\.\d+)?(?:" + "|".join(sorted(UNIT_WORDS)) + r")")
+_SHORT_UNIT_TOKEN = re.compile(r"\d{1,2}(?:" + "|".join(sorted(SHORT_UNIT_WORDS)) + r")")
+_CAPACITY_TOKEN = re.compile(r"(\d+)(gb|mb|tb|g|t)")
+
+_NUMBER_WEIGHT = 4.0
+_SUFFIX_WEIGHT = 2.0
+_WORD_WEIGHT = 1.0
+
+# Penalización por cada sufijo que no coincide (4070 vs 4070 Ti)
+_SUFFIX_MISMATCH = 0.5
+# Ambos dicen su memoria y no coincide (4060 Ti 8 GB vs 16 GB)
+_CAPACITY_MISMATCH = 0.9
+# El candidato no tiene número de modelo pero la consulta sí
+_MISSING_NUMBER = 0.5
+# Peso de la cobertura del candidato vs. la de la consulta (los títulos
+# traen muchas palabras de más: "procesador", "núcleos"...)
+_COVERAGE_SHARE = 0.8
+# Similitud mínima (trigramas) para dar crédito parcial a una palabra
+_MIN_WORD_SIMILARITY = 0.6
+# Candidatos que se puntúan cuando no hay número de modelo
+_MAX_CANDIDATES = 200
+
+
+class NameMatch(NamedTuple):
+    key: str
+    confidence: float
+
+
+class _Features(NamedTuple):
+    tokens: FrozenSet[str]
+    numbers: FrozenSet[str]
+    suffixes: FrozenSet[str]
+    words: FrozenSet[str]
+    capacities: FrozenSet[str]
+    weight: float
+
+
+def _token_weight(token: str) -> float:
+    if token[0] == "#":
+        return _NUMBER_WEIGHT
+    if token[0] == "~":
+        return _SUFFIX_WEIGHT
+    return _WORD_WEIGHT
+
+
+def _trigrams(word: str) -> Set[str]:
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _is_unit(token: str) -> bool:
+    return bool(_UNIT_TOKEN.fullmatch(token) or _SHORT_UNIT_TOKEN.fullmatch(token))
+
+
+def _join_units(raw: List[str]) -> List[str]:
+    # "16 gb" -> "16gb", "12 g" -> "12g": igual que pegados
+    joined: List[str] = []
+    for token in raw:
+        if joined and (token in UNIT_WORDS or token in SHORT_UNIT_WORDS) and _is_unit(joined[-1] + token):
+            joined[-1] += token
+        else:
+            joined.append(token)
+    return joined
+
+
+def _features(name: str) -> _Features:
+    """
+    Tokens canónicos de un nombre YA normalizado (salida de _norm).
+    """
+    raw = _join_units([t for t in _SPLIT.split(name) if t])
+    tokens: Set[str] = set()
+    capacities: Set[str] = set()
+    for token in raw:
+        if token in UNIT_WORDS:
+            continue
+        if _is_unit(token):
+            m = _CAPACITY_TOKEN.fullmatch(token)
+            if m:
+                capacities.add(m.group(1) + m.group(2)[0])
+            continue
+        m = _MODEL_TOKEN.fullmatch(token)
+        if m and len(m.group(2)) >= 2:
+            prefix, digits, rest = m.groups()
+            if len(prefix) == 1:
+                # Una letra pegada es parte del modelo: b550, a4000, z790
+                tokens.add("~" + prefix)
+            elif prefix:
+                tokens.add(prefix)
+            tokens.add("#" + digits)
+            if rest:
+                tokens.add("~" + rest)
+        elif token in SUFFIX_WORDS:
+            tokens.add("~" + token)
+        else:
+            tokens.add(token)
+
+    return _Features(
+        tokens=frozenset(tokens),
+        numbers=frozenset(t for t in tokens if t[0] == "#"),
+        suffixes=frozenset(t for t in tokens if t[0] == "~"),
+        words=frozenset(t for t in tokens if t[0] not in "#~"),
+        capacities=frozenset(capacities),
+        weight=sum(_token_weight(t) for t in tokens),
+    )
+
+
+def _word_similarity(word: str, others: Iterable[str]) -> float:
+    grams = _trigrams(word)
+    best = 0.0
+    for other in others:
+        other_grams = _trigrams(other)
+        best = max(best, 2 * len(grams & other_grams) / (len(grams) + len(other_grams)))
+    return best
+
+
+def score_match(query: _Features, candidate: _Features) -> float:
+    """
+    Confianza (0..1) de que 'candidate' sea el modelo de 'query'.
+    """
+    if not candidate.weight or not query.weight:
+        return 0.0
+    # El número de modelo no se aproxima: 5800 nunca es 5700
+    if candidate.numbers and not candidate.numbers <= query.numbers:
+        return 0.0
+    factor = _MISSING_NUMBER if (query.numbers and not candidate.numbers) else 1.0
+    factor *= _SUFFIX_MISMATCH ** len(query.suffixes ^ candidate.suffixes)
+    if query.capacities and candidate.capacities and not query.capacities & candidate.capacities:
+        factor *= _CAPACITY_MISMATCH
+
+    common = query.tokens & candidate.tokens
+    matched = sum(_token_weight(t) for t in common)
+    # Palabras con errores de tipeo: crédito parcial por trigramas
+    unmatched_query_words = query.words - common
+    if unmatched_query_words:
+        for word in candidate.words - common:
+            similarity = _word_similarity(word, unmatched_query_words)
+            if similarity >= _MIN_WORD_SIMILARITY:
+                matched += similarity * _WORD_WEIGHT
+
+    coverage = min(1.0, matched / candidate.weight)
+    precision = min(1.0, matched / query.weight)
+    return factor * (_COVERAGE_SHARE * coverage + (1 - _COVERAGE_SHARE) * precision)
+
+
+class NameIndex:
+    """
+    Índice sobre las claves normalizadas de ScoresStore. 'resolve'
+    devuelve la mejor clave con su confianza (memoizado en una LRU).
+    """
+
+    def __init__(self, keys: Iterable[str], cache_size: int = 4096):
+        self._keys: List[str] = list(keys)
+        self._features: List[_Features] = [_features(k) for k in self._keys]
+        self._by_number: Dict[str, Set[int]] = defaultdict(set)
+        self._by_token: Dict[str, Set[int]] = defaultdict(set)
+        self._by_trigram: Dict[str, Set[int]] = defaultdict(set)
+
+        for key_id, features in enumerate(self._features):
+            for number in features.numbers:
+                self._by_number[number].add(key_id)
+            for token in features.tokens - features.numbers:
+                self._by_token[token].add(key_id)
+            for word in features.words:
+                for gram in _trigrams(word):
+                    self._by_trigram[gram].add(key_id)
+
+        self._resolve = lru_cache(maxsize=cache_size)(self._best_match)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def resolve(self, normalized_name: str) -> Optional[NameMatch]:
+        return self._resolve(normalized_name)
+
+    def cache_info(self):
+        return self._resolve.cache_info()
+
+    def _candidates(self, query: _Features) -> Iterable[int]:
+        # Con número de modelo: solo las claves con ese número
+        by_number: Set[int] = set()
+        for number in query.numbers:
+            by_number |= self._by_number.get(number, set())
+        if by_number:
+            return by_number
+
+        # Sin número: las claves que más palabras comparten (y, para las
+        # palabras que no están en el índice, las que comparten trigramas)
+        hits: Dict[int, float] = defaultdict(float)
+        for token in query.tokens - query.numbers:
+            postings = self._by_token.get(token)
+            if postings:
+                weight = _token_weight(token)
+                for key_id in postings:
+                    hits[key_id] += weight
+            elif token in query.words:
+                grams = _trigrams(token)
+                for gram in grams:
+                    for key_id in self._by_trigram.get(gram, ()):
+                        hits[key_id] += _WORD_WEIGHT / len(grams)
+        return sorted(hits, key=hits.get, reverse=True)[:_MAX_CANDIDATES]
+
+    def _best_match(self, normalized_name: str) -> Optional[NameMatch]:
+        query = _features(normalized_name)
+        if not query.tokens:
+            return None
+        best_id, best_rank = None, None
+        for key_id in self._candidates(query):
+            features = self._features[key_id]
+            score = score_match(query, features)
+            if not score:
+                continue
+            # Empate: la que dice la misma memoria ("3 gb") y luego la
+            # clave más corta (la forma sin marca, más canónica)
+            rank = (score, bool(query.capacities & features.capacities), -len(self._keys[key_id]))
+            if best_rank is None or rank > best_rank:
+                best_id, best_rank = key_id, rank
+        if best_id is None:
+            return None
+        return NameMatch(self._keys[best_id], round(best_rank[0], 3))
+
+
+# Títulos reales que ya se resolvieron mal (y su clave correcta), sobre
+# claves con la forma de las de los CSV
+_REGRESSION_KEYS = [
+    "geforce rtx 4060", "geforce rtx 4060 ti 8 gb", "geforce rtx 4060 ti 16 gb", "geforce rtx 4070",
+    "geforce rtx 4070 super", "geforce rtx 4070 ti", "geforce rtx 4070 ti super", "ryzen 7 5800x", "ryzen 7 5800x3d",
+    "ryzen 5 5600", "ryzen 5 5600g", "core i7-12700", "core i7-12700t",
+    "arctic sound 1t", "arctic sound 2t",
+]
+_REGRESSION_CASES = [
+    ("msi geforce rtx 4070 super 12g", "geforce rtx 4070 super"),
+    ("gigabyte geforce rtx 4060 ti gaming oc 8g", "geforce rtx 4060 ti 8 gb"),
+    ("asus dual geforce rtx 4060 ti 16gb", "geforce rtx 4060 ti 16 gb"),
+    ("zotac gaming geforce rtx 4060 8 g", "geforce rtx 4060"),
+    ("rtx 4070 ti super 16gb", "geforce rtx 4070 ti super"),
+    ("procesador amd ryzen 7 5800x3d 8 n cleos", "ryzen 7 5800x3d"),
+    ("amd ryzen 5 5600g", "ryzen 5 5600g"),
+    ("intel core i7-12700t", "core i7-12700t"),
+    ("intel arctic sound 2t", "arctic sound 2t"),
+]
+
+
+if __name__ == "__main__":
+    index = NameIndex(_REGRESSION_KEYS)
+    failures = 0
+    for title, expected in _REGRESSION_CASES:
+        match = index.resolve(title)
+        ok = match is not None and match.key == expected
+        failures += not ok
+        print(f"{'OK   ' if ok else 'FALLA'}  {title!r} -> {match}")
+    raise SystemExit(1 if failures else 0)
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 from asyncio.log import logger
+import hashlib
 import logging
+import mmap
 import os
 import re
+import struct
+import time
 from pathlib import Path
 from typing import Dict, Tuple, Optional, List
 
+import numpy as np
 import pandas as pd
 
+from .name_index import NameIndex, NameMatch
+
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(
@@ -32,6 +39,14 @@ CPU_SCORE_COL = os.getenv("CPU_SCORE_COL", "auto")
 GPU_NAME_COL  = os.getenv("GPU_NAME_COL", "auto")
 GPU_SCORE_COL = os.getenv("GPU_SCORE_COL", "auto")
 
+# Snapshot binario de los puntajes ya normalizados (ver _read_snapshot)
+BENCH_SNAPSHOT_DIR = os.getenv("BENCH_SNAPSHOT_DIR", "/code/cache")
+
+# Búsqueda aproximada (ver name_index): confianza mínima para usar el
+# puntaje local en vez de caer a Gemini, y tamaño de la LRU de consultas
+BENCH_MATCH_MIN_CONFIDENCE = float(os.getenv("BENCH_MATCH_MIN_CONFIDENCE", "0.8"))
+BENCH_MATCH_CACHE_SIZE = int(os.getenv("BENCH_MATCH_CACHE_SIZE", "4096"))
+
 # -------------------------------------------------------------------
 # Normalización de nombres
 # -------------------------------------------------------------------
@@ -47,6 +62,17 @@ _VENDOR_PREFIX = re.compile(r"^(?:amd|intel|nvidia|asus|msi|gigabyte|evga|zotac)
 def _novendor(x: str) -> str:
     return _VENDOR_PREFIX.sub("", _norm(x)).strip()
 
+# Mismas reglas que _norm/_novendor, sobre una columna entera
+def _norm_series(s: pd.Series) -> pd.Series:
+    s = s.astype(str).str.strip().str.lower()
+    s = s.str.replace(r"\(.*?\)", "", regex=True)
+    s = s.str.replace(r"[^a-z0-9\-\s\+\.]", " ", regex=True)
+    return s.str.replace(r"\s+", " ", regex=True).str.strip()
+
+def _novendor_series(normed: pd.Series) -> pd.Series:
+    # Recibe nombres YA normalizados (salida de _norm_series)
+    return normed.str.replace(_VENDOR_PREFIX, "", regex=True).str.strip()
+
 # -------------------------------------------------------------------
 # Resolución robusta de rutas
 # -------------------------------------------------------------------
@@ -107,73 +133,166 @@ def _autodetect_columns(df: pd.DataFrame, for_cpu: bool,
         raise ValueError("No se pudieron detectar columnas de nombre/puntaje")
     return name_col, score_col
 
+# -------------------------------------------------------------------
+# Snapshot binario (se lee con mmap)
+# -------------------------------------------------------------------
+# Clave: hash del CONTENIDO de los CSV + columnas configuradas + versión
+# de la normalización. Si algo cambia, se recalcula y se reemplaza.
+# Formato (little-endian):
+#   cabecera  magic(8) | versión(u32) | n claves(u32) | bytes de claves(u64)
+#   puntajes  int64[n]
+#   claves    utf-8, ordenadas, separadas por '\n' (las claves
+#             normalizadas nunca llevan saltos de línea)
+
+# Subirla si cambian _norm/_novendor o el formato: invalida los snapshots
+_SNAPSHOT_VERSION = 1
+_SNAPSHOT_MAGIC = b"PCSCORES"
+_SNAPSHOT_HEADER = struct.Struct("<8sIIQ")
+
+# (ruta, es_cpu, columna de nombre, columna de puntaje)
+CsvSource = Tuple[Path, bool, str, str]
+
+
+def _sources_digest(sources: List[CsvSource]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"v{_SNAPSHOT_VERSION}".encode())
+    for path, for_cpu, name_col_cfg, score_col_cfg in sources:
+        h.update(f"|{for_cpu}|{name_col_cfg}|{score_col_cfg}|".encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def _snapshot_path(digest: str) -> Path:
+    return Path(BENCH_SNAPSHOT_DIR) / f"scores-{digest}.bin"
+
+
+def _read_snapshot(path: Path) -> Optional[Dict[str, int]]:
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, count, keys_len = _SNAPSHOT_HEADER.unpack_from(mm, 0)
+            if magic != _SNAPSHOT_MAGIC or version != _SNAPSHOT_VERSION:
+                return None
+            offset = _SNAPSHOT_HEADER.size
+            values = np.frombuffer(mm, dtype="<i8", count=count, offset=offset)
+            scores = values.tolist()
+            # Soltar la vista antes de cerrar el mmap
+            del values
+            start = offset + 8 * count
+            keys = mm[start:start + keys_len].decode("utf-8").split("\n") if count else []
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning(f"Snapshot de puntajes inválido ({path}): {e}")
+        return None
+    if len(keys) != count:
+        logger.warning(f"Snapshot de puntajes incompleto ({path})")
+        return None
+    return dict(zip(keys, scores))
+
+
+def _write_snapshot(path: Path, scores: Dict[str, int]):
+    keys = sorted(scores)
+    values = np.array([scores[k] for k in keys], dtype="<i8")
+    blob = "\n".join(keys).encode("utf-8")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Temporal + rename: otro worker nunca lee un snapshot a medias
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, len(keys), len(blob)))
+            f.write(values.tobytes())
+            f.write(blob)
+        os.replace(tmp, path)
+        for old in path.parent.glob("scores-*.bin"):
+            if old != path:
+                old.unlink(missing_ok=True)
+    except OSError as e:
+        # Sin snapshot el servicio funciona igual (solo arranca más lento)
+        logger.warning(f"No se pudo guardar el snapshot de puntajes en {path}: {e}")
+
 # -------------------------------------------------------------------
 # Store de puntajes
 # -------------------------------------------------------------------
 class ScoresStore:
     def __init__(self):
         self._scores: Dict[str, int] = {}
+        self._index: Optional[NameIndex] = None
         self._loaded = False
 
     def load(self):
+        started = time.perf_counter()
         self._scores = {}
-        loaded_any = False
-
-        if BENCH_SCORES_SOURCE == "csv":
-            cpu_path = _resolve_path(CPU_BENCH_CSV_PATH)
-            gpu_path = _resolve_path(GPU_BENCH_CSV_PATH)
-
-            if cpu_path and cpu_path.exists():
-                self._load_csv(cpu_path, for_cpu=True, name_col_cfg=CPU_NAME_COL, score_col_cfg=CPU_SCORE_COL)
-                loaded_any = True
-            else:
-                logger.warning(f"CPU CSV no encontrado: {CPU_BENCH_CSV_PATH}")
-
-            if gpu_path and gpu_path.exists():
-                self._load_csv(gpu_path, for_cpu=False, name_col_cfg=GPU_NAME_COL, score_col_cfg=GPU_SCORE_COL)
-                loaded_any = True
-            else:
-                logger.warning(f"GPU CSV no encontrado: {GPU_BENCH_CSV_PATH}")
-
-        if not loaded_any:
+        # El índice aproximado se arma en la primera consulta sin match exacto
+        self._index = None
+        origin = "seed"
+
+        sources = self._csv_sources() if BENCH_SCORES_SOURCE == "csv" else []
+        if sources:
+            snapshot = _snapshot_path(_sources_digest(sources))
+            scores = _read_snapshot(snapshot)
+            origin = "snapshot"
+            if scores is None:
+                scores = self._build_scores(sources)
+                _write_snapshot(snapshot, scores)
+                origin = "CSV"
+            self._scores = scores
+        else:
             self._seed_minimal()
 
         self._loaded = True
-        logger.info(f"Scores cargados: {len(self._scores)}")
+        logger.info(
+            f"Scores cargados: {len(self._scores)} ({origin}) "
+            f"en {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
 
-    def _load_csv(self, path: Path, for_cpu: bool, name_col_cfg: str, score_col_cfg: str):
+    def _csv_sources(self) -> List[CsvSource]:
+        sources: List[CsvSource] = []
+        cpu_path = _resolve_path(CPU_BENCH_CSV_PATH)
+        gpu_path = _resolve_path(GPU_BENCH_CSV_PATH)
+
+        if cpu_path and cpu_path.exists():
+            sources.append((cpu_path, True, CPU_NAME_COL, CPU_SCORE_COL))
+        else:
+            logger.warning(f"CPU CSV no encontrado: {CPU_BENCH_CSV_PATH}")
+
+        if gpu_path and gpu_path.exists():
+            sources.append((gpu_path, False, GPU_NAME_COL, GPU_SCORE_COL))
+        else:
+            logger.warning(f"GPU CSV no encontrado: {GPU_BENCH_CSV_PATH}")
+        return sources
+
+    def _build_scores(self, sources: List[CsvSource]) -> Dict[str, int]:
+        # Máximo por clave entre TODOS los CSV (CPU y GPU comparten dict)
+        per_csv = [self._load_csv(*source) for source in sources]
+        best = pd.concat(per_csv).groupby(level=0).max()
+        return dict(zip(best.index.tolist(), best.tolist()))
+
+    def _load_csv(self, path: Path, for_cpu: bool, name_col_cfg: str, score_col_cfg: str) -> pd.Series:
         df = pd.read_csv(path)
         name_col, score_col = _autodetect_columns(df, for_cpu, name_col_cfg, score_col_cfg)
-        self._ingest_df(df[[name_col, score_col]].copy(), for_cpu, name_col, score_col)
+        scores = self._ingest_df(df[[name_col, score_col]], for_cpu, name_col, score_col)
         logger.info(f"Leído {path} -> columnas: name='{name_col}', score='{score_col}'")
-
-    def _ingest_df(self, df: pd.DataFrame, for_cpu: bool, name_col_cfg: str, score_col_cfg: str):
-        df = df.dropna()
-
-        def to_int(v) -> Optional[int]:
-            try:
-                if pd.isna(v):
-                    return None
-                x = float(v)
-                if x != x:
-                    return None
-                return int(round(x))
-            except Exception:
-                return None
-
-        for _, row in df.iterrows():
-            name = str(row.iloc[0]).strip()
-            sc = to_int(row.iloc[1])
-            if not name or sc is None:
-                continue
-            k1 = _norm(name)
-            k2 = _novendor(name)
-            old = self._scores.get(k1)
-            if old is None or sc > old:
-                self._scores[k1] = sc
-            old2 = self._scores.get(k2)
-            if old2 is None or sc > old2:
-                self._scores[k2] = sc
+        return scores
+
+    def _ingest_df(self, df: pd.DataFrame, for_cpu: bool, name_col_cfg: str, score_col_cfg: str) -> pd.Series:
+        """
+        Serie clave normalizada -> puntaje máximo. Cada nombre aporta
+        dos claves: _norm (con marca) y _novendor (sin marca).
+        """
+        names = df.iloc[:, 0]
+        scores = pd.to_numeric(df.iloc[:, 1], errors="coerce")
+        valid = names.notna() & np.isfinite(scores)
+        names = names[valid]
+        scores = scores[valid].round().astype(np.int64)
+
+        k1 = _norm_series(names)
+        k2 = _novendor_series(k1)
+        keys = pd.concat([k1, k2], ignore_index=True)
+        values = pd.concat([scores, scores], ignore_index=True)
+        keep = (keys != "").to_numpy()
+        return values[keep].groupby(keys[keep].to_numpy()).max()
 
     def _seed_minimal(self):
         logger.warning("No se cargaron CSV: usando seed mínima para mantener el servicio arriba.")
@@ -193,7 +312,30 @@ class ScoresStore:
             return None
         k1 = _norm(model_name)
         k2 = _novendor(model_name)
-        return self._scores.get(k1) or self._scores.get(k2)
+        exact = self._scores.get(k1) or self._scores.get(k2)
+        if exact:
+            return exact
+        match = self.resolve(model_name)
+        if match and match.confidence >= BENCH_MATCH_MIN_CONFIDENCE:
+            return self._scores[match.key]
+        return None
+
+    def resolve(self, model_name: str) -> Optional[NameMatch]:
+        """
+        Mejor clave aproximada para un título de tienda
+        ("Procesador AMD Ryzen 7 5800X3D 8 núcleos" -> "ryzen 7 5800x3d"),
+        con su confianza (0..1). Memoizado en una LRU.
+        """
+        if not model_name:
+            return None
+        if self._index is None:
+            started = time.perf_counter()
+            self._index = NameIndex(self._scores.keys(), cache_size=BENCH_MATCH_CACHE_SIZE)
+            logger.info(
+                f"Índice de nombres: {len(self._index)} claves "
+                f"en {(time.perf_counter() - started) * 1000:.1f} ms"
+            )
+        return self._index.resolve(_norm(model_name))
 
 # Singleton
 _STORE: Optional[ScoresStore] = None
@@ -1,14 +1,34 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import Optional
-import json # <-- ¡Añadir import!
+from fastapi import APIRouter, Query, Header, HTTPException, status, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, FileResponse, RedirectResponse
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+import csv
+import gzip
+import io
+import zlib
+import orjson
 
-from app.db.session import get_db
-from app.schemas.component import ComponentCard, ComponentDetail
+from app.db.session import read_session_scope
+from app.core.config import settings
+from app.schemas.component import (
+    ComponentCard, ComponentDetail, ComponentBatchRequest, ComponentBatchResponse, ComponentFacets,
+    CatalogSnapshot, CatalogChanges, ComponentSuggestion, ComponentAlternative, PriceStatsRead
+)
 from app.schemas.common import PaginatedResponse
 from app.crud import crud_component
+from app.services.cache_keys import canonicalize_list_params, list_cache_suffix, list_hot_key, detail_hot_key
+from app.services.suggest_index import get_suggest_index
+from app.services.http_cache import key_etag, etag_matches, cache_headers, not_modified, image_cache_headers
+from app.services.read_routing import use_primary
+from app.services.price_stats import get_price_stats
+from app.services.image_cache import get_thumbnail, pick_size, thumbnail_etag, THUMBNAIL_SIZES
 # --- ¡Nuevas importaciones de caché! ---
-from app.services.cache_service import get_cache, set_cache
+from app.services.cache_service import (
+    get_or_compute, dump_json, build_key, content_etag, get_etag, generations_available,
+    get_many_raw, set_many_raw,
+    COMPONENT_LIST_NS, COMPONENT_DETAIL_NS
+)
 
 router = APIRouter()
 
@@ -18,7 +38,7 @@ router = APIRouter()
     summary="Obtener lista de componentes con filtros"
 )
 async def get_component_list(
-    db: Session = Depends(get_db),
+    request: Request,
     page: int = Query(1, ge=1, description="Número de página"),
     page_size: int = Query(20, ge=1, le=100, description="Tamaño de página"),
     category: Optional[str] = Query(None, description="Filtrar por categoría (ej: CPU)"),
@@ -26,7 +46,9 @@ async def get_component_list(
     min_price: Optional[float] = Query(None, ge=0, description="Precio mínimo"),
     max_price: Optional[float] = Query(None, ge=0, description="Precio máximo"),
     search: Optional[str] = Query(None, description="Término de búsqueda (ej: Core i5)"),
-    sort_by: Optional[str] = Query("price_asc", description="Orden (price_asc o price_desc)")
+    sort_by: Optional[str] = Query("price_asc", description="Orden (price_asc, price_desc o rating)"),
+    min_rating: Optional[float] = Query(None, ge=1, le=5, description="Rating promedio mínimo"),
+    x_user_id: Optional[str] = Header(None, description="ID del usuario, si hay sesión (inyectado por API Gateway)")
 ):
     """
     Endpoint para `components_page.dart`.
@@ -34,16 +56,8 @@ async def get_component_list(
     (AHORA CON CACHÉ)
     """
     
-    # --- Lógica de Caché (Lectura) ---
-    cache_key = f"components:page={page}:size={page_size}:cat={category}:brand={brand}:min_p={min_price}:max_p={max_price}:search={search}:sort={sort_by}"
-    cached_data = await get_cache(cache_key)
-    if cached_data:
-        # Si está en caché, lo devolvemos (Pydantic lo re-validará)
-        return PaginatedResponse[ComponentCard](**cached_data)
-
-    # --- Lógica de Negocio (Si no está en caché) ---
-    paginated_result = crud_component.get_components_paginated(
-        db=db,
+    # Parámetros canónicos: peticiones equivalentes comparten entrada
+    params = canonicalize_list_params(
         page=page,
         page_size=page_size,
         category=category,
@@ -51,15 +65,430 @@ async def get_component_list(
         min_price=min_price,
         max_price=max_price,
         search=search,
-        sort_by=sort_by
+        sort_by=sort_by,
+        min_rating=min_rating
     )
-    
-    # --- Lógica de Caché (Escritura) ---
-    if paginated_result.items:
-        # Guardamos en caché por 1 hora (3600 seg)
-        await set_cache(cache_key, paginated_result, expiration_seconds=3600) 
+    cache_key = await build_key(COMPONENT_LIST_NS, list_cache_suffix(params))
+
+    # --- GET condicional ---
+    # La clave ya incluye la generación y los filtros: si el cliente
+    # tiene ese ETag, nada cambió (304 sin tocar la DB ni el payload).
+    # Sin Redis la generación no avanza: el ETag sale del contenido
+    etag = key_etag(cache_key) if generations_available() else None
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+
+    # Réplica de lectura, salvo escrituras recientes (read-your-writes)
+    primary = await use_primary(user_id=x_user_id, catalog=True)
+
+    body = await _component_list_body(cache_key, params, primary, hot_key=list_hot_key(params))
+    if etag is None:
+        etag = content_etag(body)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+    return Response(content=body, media_type="application/json", headers=cache_headers(etag))
+
+
+async def _component_list_body(cache_key: str, params: dict, primary: bool, hot_key: Optional[str] = None) -> bytes:
+    """
+    Bytes de la lista (desde la caché o calculados). Compartido por el
+    endpoint y el pre-calentamiento (services/cache_warmer).
+    """
+    # --- Lógica de Negocio (Si no está en caché) ---
+    # Se ejecuta en un hilo y con su propia sesión: puede correr en
+    # segundo plano (stale-while-revalidate) después de responder.
+    def load(price_stats):
+        if settings.SQL_JSON_RENDERING:
+            # Postgres genera el JSON: sin objetos ORM ni Pydantic
+            # (el deal_score sale de un JOIN con 'price_stats')
+            with read_session_scope(primary) as db:
+                body, item_count = crud_component.get_components_paginated_json(db=db, **params)
+            empty = item_count == 0
+        else:
+            with read_session_scope(primary) as db:
+                paginated_result = crud_component.get_components_paginated(
+                    db=db, price_stats=price_stats, **params
+                )
+            # Serializamos UNA vez: los mismos bytes van a Redis y al cliente
+            body = dump_json(paginated_result)
+            empty = not paginated_result.items
+        # (las listas vacías se cachean poco tiempo: caché negativa)
+        ttl = settings.CACHE_NEGATIVE_TTL_SECONDS if empty else settings.CACHE_TTL_SECONDS
+        return body, ttl
+
+    async def compute():
+        # Percentiles por categoría/marca en memoria del worker: el
+        # deal_score de cada card es una búsqueda en un dict
+        price_stats = None if settings.SQL_JSON_RENDERING else await get_price_stats()
+        return await run_in_threadpool(load, price_stats)
+
+    # --- Lógica de Caché (con protección contra estampidas) ---
+    return await get_or_compute(cache_key, compute, hot_key=hot_key)
+
+
+@router.get(
+    "/suggest",
+    response_model=List[ComponentSuggestion],
+    summary="Autocompletar nombres de componentes"
+)
+async def suggest_components(
+    q: str = Query(..., min_length=1, max_length=100, description="Texto escrito hasta ahora (ej: rtx 40)"),
+    limit: int = Query(10, ge=1, le=25, description="Máximo de sugerencias")
+):
+    """
+    Búsqueda mientras se escribe: resuelta con el índice de prefijos en
+    memoria del worker (tokens del nombre y números de modelo), sin
+    consultar Postgres. Ordenada por popularidad.
+    """
+    return Response(
+        content=dump_json(get_suggest_index().suggest(q, limit=limit)),
+        media_type="application/json"
+    )
+
+
+@router.get(
+    "/facets",
+    response_model=ComponentFacets,
+    summary="Conteos por categoría/marca e histograma de precios"
+)
+async def get_component_facets(
+    category: Optional[str] = Query(None, description="Filtrar por categoría (ej: CPU)"),
+    brand: Optional[str] = Query(None, description="Filtrar por marca (ej: Intel)"),
+    min_price: Optional[float] = Query(None, ge=0, description="Precio mínimo"),
+    max_price: Optional[float] = Query(None, ge=0, description="Precio máximo"),
+    search: Optional[str] = Query(None, description="Término de búsqueda (ej: Core i5)"),
+    min_rating: Optional[float] = Query(None, ge=1, le=5, description="Rating promedio mínimo"),
+    buckets: int = Query(10, ge=1, le=50, description="Cubetas del histograma de precios")
+):
+    """
+    Endpoint para el panel de filtros de `components_page.dart`.
+    Mismos filtros que la lista; se cachea por filtros en el namespace
+    de las listas (se invalida junto con ellas).
+    """
+    params = canonicalize_list_params(
+        category=category,
+        brand=brand,
+        min_price=min_price,
+        max_price=max_price,
+        search=search,
+        min_rating=min_rating
+    )
+    # Paginación y orden no afectan a las facetas
+    for name in ("page", "page_size", "sort_by"):
+        params.pop(name)
+    cache_key = await build_key(COMPONENT_LIST_NS, f"facets:buckets={buckets}:{list_cache_suffix(params)}")
+    primary = await use_primary(catalog=True)
+
+    def load():
+        with read_session_scope(primary) as db:
+            facets = crud_component.get_component_facets(db=db, buckets=buckets, **params)
+        return dump_json(facets), settings.CACHE_TTL_SECONDS
+
+    async def compute():
+        return await run_in_threadpool(load)
+
+    body = await get_or_compute(cache_key, compute)
+    return Response(content=body, media_type="application/json")
+
+
+@router.get(
+    "/price-stats",
+    response_model=List[PriceStatsRead],
+    summary="Percentiles de precio por categoría y marca"
+)
+async def get_price_statistics(
+    category: Optional[str] = Query(None, description="Filtrar por categoría (ej: CPU)")
+):
+    """
+    Para las etiquetas de "buena oferta": p10/p25/mediana/p75/p90 de la
+    mejor oferta por categoría (brand = null) y por categoría + marca.
+    Se recalculan después de cada scraping.
+    """
+    table = await get_price_stats()
+    category = category.lower() if category else None
+    items = [
+        {**row, "brand": row["brand"] or None, "median": row["p50"]}
+        for row in table.rows
+        if category is None or row["category"] == category
+    ]
+    return Response(
+        content=dump_json([PriceStatsRead(**item) for item in items]),
+        media_type="application/json"
+    )
+
+
+@router.get(
+    "/snapshot",
+    response_model=CatalogSnapshot,
+    summary="Catálogo completo versionado (comprimido con gzip)"
+)
+async def get_catalog_snapshot(request: Request):
+    """
+    Para la app Flutter: todo el catálogo (cards con su mejor oferta) en
+    una sola descarga. Después, el cliente sincroniza con
+    GET /components/changes?since=<version>.
+    Se cachea comprimido por versión de catálogo.
+    """
+    primary = await use_primary(catalog=True)
+
+    def current_version():
+        with read_session_scope(primary) as db:
+            return crud_component.get_catalog_version(db)
+
+    version = await run_in_threadpool(current_version)
+    cache_key = f"catalog_snapshot:v{version}"
 
-    return paginated_result
+    def load():
+        with read_session_scope(primary) as db:
+            items, _removed, max_version, _ = crud_component.get_catalog_cards(db)
+        snapshot = CatalogSnapshot(version=max_version, items=items)
+        return gzip.compress(dump_json(snapshot), compresslevel=6), settings.CACHE_TTL_SECONDS
+
+    async def compute():
+        return await run_in_threadpool(load)
+
+    body = await get_or_compute(cache_key, compute)
+
+    headers = {"Vary": "Accept-Encoding", "X-Catalog-Version": str(version)}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=body, media_type="application/json", headers=headers)
+    return Response(content=gzip.decompress(body), media_type="application/json", headers=headers)
+
+
+@router.get(
+    "/changes",
+    response_model=CatalogChanges,
+    summary="Cambios del catálogo desde una versión (delta-sync)"
+)
+async def get_catalog_changes(
+    since: int = Query(..., ge=0, description="Última versión que tiene el cliente"),
+    limit: int = Query(500, ge=1, le=5000, description="Máximo de componentes por respuesta")
+):
+    """
+    Componentes (y su mejor oferta) que cambiaron después de 'since',
+    ordenados por versión, más los ids borrados ('removed'). Si
+    'has_more', repetir con since=version.
+    Las versiones se asignan en orden de confirmación (ver
+    services/catalog_publisher): un cambio aparece ~1 s después de
+    escribirse, pero nunca queda detrás del 'since' de un cliente.
+    Usa el índice de 'catalog_version' (sin caché).
+    """
+    primary = await use_primary(catalog=True)
+
+    def load():
+        with read_session_scope(primary) as db:
+            items, removed, version, has_more = crud_component.get_catalog_cards(
+                db, since_version=since, limit=limit
+            )
+        return dump_json(CatalogChanges(
+            since=since, version=version, has_more=has_more, items=items, removed=removed
+        ))
+
+    body = await run_in_threadpool(load)
+    return Response(content=body, media_type="application/json")
+
+
+# --- Exportación del catálogo (GET /components/export) ---
+EXPORT_FIELDS = (
+    "id", "name", "category", "brand", "image_url", "price", "store", "link",
+    "average_rating", "review_count", "updated_at"
+)
+# Filas por bloque enviado al cliente
+_EXPORT_CHUNK_ROWS = 500
+
+
+def _export_ndjson(rows) -> Iterator[bytes]:
+    chunk = []
+    for row in rows:
+        item = dict(zip(EXPORT_FIELDS, row))
+        # Mismo formato que la API: precio como texto
+        if item["price"] is not None:
+            item["price"] = str(item["price"])
+        chunk.append(orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE))
+        if len(chunk) >= _EXPORT_CHUNK_ROWS:
+            yield b"".join(chunk)
+            chunk.clear()
+    if chunk:
+        yield b"".join(chunk)
+
+
+def _export_csv(rows) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    count = 0
+    for row in rows:
+        writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else ("" if value is None else value)
+            for value in row
+        ])
+        count += 1
+        if count % _EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _gzip_stream(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    # gzip incremental (wbits=31): nunca se tiene todo el archivo en memoria
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@router.get(
+    "/export",
+    summary="Exportar el catálogo completo (NDJSON o CSV, en streaming)"
+)
+async def export_components(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson o csv"),
+    category: Optional[str] = Query(None, description="Filtrar por categoría (ej: CPU)"),
+    updated_since: Optional[datetime] = Query(None, description="Solo componentes/ofertas cambiados desde esta fecha (ISO 8601)")
+):
+    """
+    Para socios y jobs de analítica: todos los componentes con su mejor
+    oferta en una sola respuesta, en lugar de recorrer GET /components
+    página por página. Se lee con un cursor del servidor (yield_per) y
+    se envía a medida que llega, con memoria constante. Se comprime con
+    gzip si el cliente lo acepta. Sin caché.
+    """
+    primary = await use_primary(catalog=True)
+
+    # Un generador síncrono: Starlette lo recorre en el threadpool, y
+    # la sesión vive mientras dura la descarga.
+    def rows() -> Iterator[bytes]:
+        with read_session_scope(primary) as db:
+            results = crud_component.iter_export_rows(
+                db,
+                category=category,
+                updated_since=updated_since,
+                batch_size=settings.EXPORT_BATCH_SIZE
+            )
+            if format == "csv":
+                yield from _export_csv(results)
+            else:
+                yield from _export_ndjson(results)
+
+    if format == "csv":
+        media_type, extension = "text/csv; charset=utf-8", "csv"
+    else:
+        media_type, extension = "application/x-ndjson", "ndjson"
+    headers = {
+        "Content-Disposition": f'attachment; filename="components.{extension}"',
+        "Vary": "Accept-Encoding"
+    }
+
+    body = rows()
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        body = _gzip_stream(body)
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+# Campos que requieren cargar relaciones de la DB
+_RELATION_FIELDS = {"offers", "reviews"}
+
+@router.post(
+    "/batch",
+    response_model=ComponentBatchResponse,
+    summary="Obtener varios componentes en una sola petición"
+)
+async def get_components_batch(batch_in: ComponentBatchRequest):
+    """
+    Consulta en bloque para otros servicios (benchmark, gateway).
+    Los detalles cacheados se leen con un solo MGET; los que faltan se
+    resuelven con UNA consulta (id = ANY(:ids)) y se guardan en caché
+    con un pipeline. 'fields' limita los campos devueltos.
+    """
+    # Sin duplicados, conservando el orden pedido
+    ids = list(dict.fromkeys(batch_in.ids))
+    fields = batch_in.fields
+    if fields is not None:
+        unknown = set(fields) - set(ComponentDetail.model_fields)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Campos desconocidos: {sorted(unknown)}"
+            )
+    with_relations = fields is None or bool(_RELATION_FIELDS & set(fields))
+
+    # --- Lógica de Caché (Lectura en bloque) ---
+    keys = {cid: await build_key(COMPONENT_DETAIL_NS, str(cid)) for cid in ids}
+    entries = await get_many_raw([keys[cid] for cid in ids])
+
+    bodies: Dict[int, bytes] = {}
+    missing: List[int] = []
+    to_load: List[int] = []
+    for cid, entry in zip(ids, entries):
+        if entry is None:
+            to_load.append(cid)
+        elif entry[0] is None:
+            missing.append(cid) # 404 cacheado
+        else:
+            bodies[cid] = entry[0]
+
+    # --- Lógica de Negocio (solo los que no estaban en caché) ---
+    projected: Dict[int, dict] = {}
+    if to_load:
+        primary = await use_primary(catalog=True)
+
+        def load():
+            with read_session_scope(primary) as db:
+                return crud_component.get_components_by_ids(
+                    db=db, component_ids=to_load, with_relations=with_relations
+                )
+
+        loaded = await run_in_threadpool(load)
+
+        found, not_found = [], []
+        for cid in to_load:
+            detail = loaded.get(cid)
+            if detail is None:
+                missing.append(cid)
+                not_found.append((keys[cid], None, ()))
+            elif with_relations:
+                bodies[cid] = dump_json(detail)
+                found.append((keys[cid], bodies[cid], (f"component:{cid}",)))
+            else:
+                # Sin relaciones no es un detalle completo: no se cachea
+                projected[cid] = detail.model_dump(mode="json", include=set(fields))
+
+        # --- Lógica de Caché (Escritura en bloque) ---
+        await set_many_raw(
+            found,
+            expiration_seconds=settings.CACHE_TTL_SECONDS,
+            soft_ttl_seconds=settings.CACHE_SOFT_TTL_SECONDS,
+            etag=True
+        )
+        await set_many_raw(not_found, expiration_seconds=settings.CACHE_NEGATIVE_TTL_SECONDS)
+
+    missing_set = set(missing)
+    missing = [cid for cid in ids if cid in missing_set]
+
+    if fields is None:
+        # Detalles completos: unimos los bytes cacheados sin parsearlos
+        items = b",".join(bodies[cid] for cid in ids if cid in bodies)
+        body = b'{"items":[' + items + b'],"missing":' + orjson.dumps(missing) + b"}"
+        return Response(content=body, media_type="application/json")
+
+    items = []
+    for cid in ids:
+        if cid in bodies:
+            data = orjson.loads(bodies[cid])
+            items.append({name: data.get(name) for name in fields})
+        elif cid in projected:
+            items.append(projected[cid])
+    return Response(
+        content=dump_json({"items": items, "missing": missing}),
+        media_type="application/json"
+    )
 
 
 @router.get(
@@ -69,7 +498,8 @@ async def get_component_list(
 )
 async def get_component_detail(
     component_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    x_user_id: Optional[str] = Header(None, description="ID del usuario, si hay sesión (inyectado por API Gateway)")
 ):
     """
     Endpoint para `component_detail.dart`.
@@ -77,24 +507,155 @@ async def get_component_detail(
     (AHORA CON CACHÉ)
     """
     
-    # --- Lógica de Caché (Lectura) ---
-    cache_key = f"component_detail:{component_id}"
-    cached_data = await get_cache(cache_key)
-    if cached_data:
-        # Si está en caché, lo devolvemos (Pydantic lo re-validará)
-        return ComponentDetail(**cached_data)
+    cache_key = await build_key(COMPONENT_DETAIL_NS, str(component_id))
 
+    # --- GET condicional ---
+    # El ETag (hash del contenido) se guarda junto a la entrada de caché:
+    # se compara sin leer el payload ni consultar la DB
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        stored_etag = await get_etag(cache_key)
+        if etag_matches(if_none_match, stored_etag):
+            return not_modified(stored_etag)
+
+    primary = await use_primary(user_id=x_user_id, component_id=component_id)
+    body = await _component_detail_body(cache_key, component_id, primary, hot_key=detail_hot_key(component_id))
+
+    if body is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Componente no encontrado"
+        )
+
+    # Sin ETag guardado (ej. sin Redis) se compara con el del contenido
+    etag = content_etag(body)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return Response(content=body, media_type="application/json", headers=cache_headers(etag))
+
+
+async def _component_detail_body(cache_key: str, component_id: int, primary: bool, hot_key: Optional[str] = None) -> Optional[bytes]:
+    """
+    Bytes del detalle (None = no existe). Compartido por el endpoint y
+    el pre-calentamiento.
+    """
     # --- Lógica de Negocio (Si no está en caché) ---
-    component = crud_component.get_component_by_id(db=db, component_id=component_id)
-    
-    if not component:
+    def load():
+        with read_session_scope(primary) as db:
+            if settings.SQL_JSON_RENDERING:
+                body = crud_component.get_component_detail_json(db=db, component_id=component_id)
+            else:
+                component = crud_component.get_component_by_id(db=db, component_id=component_id)
+                body = dump_json(component) if component else None
+        if body is None:
+            # El 404 también se cachea (poco tiempo)
+            return None, settings.CACHE_NEGATIVE_TTL_SECONDS
+        return body, settings.CACHE_TTL_SECONDS
+
+    async def compute():
+        return await run_in_threadpool(load)
+
+    # --- Lógica de Caché (con protección contra estampidas) ---
+    # Tag 'component:{id}': reseñas/comentarios invalidan solo este detalle
+    return await get_or_compute(
+        cache_key, compute, tags=[f"component:{component_id}"], etag=True, hot_key=hot_key
+    )
+
+
+@router.get(
+    "/{component_id}/alternatives",
+    response_model=List[ComponentAlternative],
+    summary="Componentes similares / alternativas más baratas"
+)
+async def get_component_alternatives(
+    component_id: int,
+    x_user_id: Optional[str] = Header(None, description="ID del usuario, si hay sesión (inyectado por API Gateway)")
+):
+    """
+    Sección "alternativas" de `component_detail.dart`: vecinos más
+    cercanos de la misma categoría (nombre, precio y specs), calculados
+    en lote después de cada scraping. Aquí solo se leen.
+    """
+    cache_key = await build_key(COMPONENT_DETAIL_NS, f"{component_id}:alternatives")
+    primary = await use_primary(user_id=x_user_id, component_id=component_id)
+
+    def load():
+        with read_session_scope(primary) as db:
+            body = crud_component.get_component_alternatives_json(db=db, component_id=component_id)
+        if body is None:
+            return None, settings.CACHE_NEGATIVE_TTL_SECONDS
+        return body, settings.CACHE_TTL_SECONDS
+
+    async def compute():
+        return await run_in_threadpool(load)
+
+    body = await get_or_compute(cache_key, compute)
+    if body is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Componente no encontrado"
         )
-    
-    # --- Lógica de Caché (Escritura) ---
-    # Guardamos en caché por 1 hora (3600 seg)
-    await set_cache(cache_key, component, expiration_seconds=3600)
+    return Response(content=body, media_type="application/json")
+
+
+@router.get(
+    "/{component_id}/image",
+    summary="Miniatura WebP de la imagen de un componente"
+)
+async def get_component_image(
+    component_id: int,
+    request: Request,
+    size: int = Query(THUMBNAIL_SIZES[1], ge=1, description=f"Lado mayor en px (se usa la menor de {list(THUMBNAIL_SIZES)} que lo cubra)")
+):
+    """
+    Imagen de las cards: miniatura WebP generada una vez a partir de
+    'image_url' y servida desde disco (ver services/image_cache).
+    Si no se puede generar, redirige a la imagen original.
+    """
+    source_url = await _component_image_url(component_id)
+    if source_url is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Componente no encontrado o sin imagen"
+        )
+
+    size = pick_size(size)
+    etag = thumbnail_etag(source_url, size)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, image_cache_headers(etag))
+
+    path = await get_thumbnail(source_url, size)
+    if path is None:
+        return RedirectResponse(source_url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    return FileResponse(path, media_type="image/webp", headers=image_cache_headers(etag))
+
+
+async def _component_image_url(component_id: int) -> Optional[str]:
+    # URL original cacheada junto al detalle (el scraper la invalida con él)
+    cache_key = await build_key(COMPONENT_DETAIL_NS, f"{component_id}:image_url")
+
+    def load():
+        with read_session_scope() as db:
+            url = crud_component.get_component_image_url(db=db, component_id=component_id)
+        if url is None:
+            return None, settings.CACHE_NEGATIVE_TTL_SECONDS
+        return url.encode("utf-8"), settings.CACHE_TTL_SECONDS
+
+    async def compute():
+        return await run_in_threadpool(load)
+
+    body = await get_or_compute(cache_key, compute)
+    return body.decode("utf-8") if body else None
+
+
+# --- Pre-calentamiento (services/cache_warmer) ---
+# Mismo cálculo y misma clave que los endpoints, sin contar lecturas.
+
+async def warm_component_list(params: dict):
+    cache_key = await build_key(COMPONENT_LIST_NS, list_cache_suffix(params))
+    await _component_list_body(cache_key, params, await use_primary(catalog=True))
+
 
-    return component
\ No newline at end of file
+async def warm_component_detail(component_id: int):
+    cache_key = await build_key(COMPONENT_DETAIL_NS, str(component_id))
+    await _component_detail_body(cache_key, component_id, await use_primary(component_id=component_id, catalog=True))
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.models.review import Review # <-- Importar Review
-from app.db.session import get_db
-from app.schemas.review import ReviewCreate, ReviewRead
+from app.db.session import get_db, read_session_scope
+from fastapi.concurrency import run_in_threadpool
+from app.schemas.review import ReviewCreate, ReviewUpdate, ReviewRead, ReviewSummary
+from app.schemas.common import PaginatedResponse
 from app.schemas.comment import CommentCreate, CommentRead
 from app.crud import crud_review
 # --- ¡Nuevas importaciones de caché! ---
-from app.services.cache_service import invalidate_cache
+from app.services.cache_service import invalidate_tag, bump_generation, COMPONENT_LIST_NS
+from app.services.read_routing import use_primary, mark_recent_write
 
 router = APIRouter()
 
@@ -24,6 +28,42 @@ async def get_current_user_info(
     return {"user_id": x_user_id, "user_username": x_user_name}
 
 
+@router.get(
+    "/components/{component_id}/reviews",
+    response_model=PaginatedResponse[ReviewSummary],
+    summary="Obtener reseñas paginadas de un componente"
+)
+async def get_component_reviews(
+    component_id: int,
+    page: int = Query(1, ge=1, description="Número de página"),
+    page_size: int = Query(10, ge=1, le=50, description="Tamaño de página"),
+    x_user_id: Optional[str] = Header(None, description="ID del usuario, si hay sesión (inyectado por API Gateway)")
+):
+    """
+    Reseñas de un componente (más recientes primero), con el conteo de
+    comentarios de cada una. El detalle solo incrusta las más recientes.
+    Se lee de la réplica, salvo que el usuario o el componente tengan
+    escrituras recientes (el autor ve su reseña al instante).
+    """
+    primary = await use_primary(user_id=x_user_id, component_id=component_id)
+
+    def load():
+        with read_session_scope(primary) as db:
+            return crud_review.get_reviews_paginated(
+                db=db,
+                component_id=component_id,
+                page=page,
+                page_size=page_size
+            )
+
+    result = await run_in_threadpool(load)
+
+    if result is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Componente no encontrado")
+
+    return result
+
+
 @router.post(
     "/components/{component_id}/reviews",
     response_model=ReviewRead,
@@ -48,15 +88,71 @@ async def create_new_review(
     if db_review is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Componente no encontrado")
 
+    # Lecturas siguientes de este usuario/componente: a la primaria
+    await mark_recent_write(user_id=user_info["user_id"], component_id=component_id)
+
     # --- ¡Invalidación de Caché! ---
     # 1. Borra la caché de detalle de este componente
-    await invalidate_cache(f"component_detail:{component_id}")
-    # 2. Borra TODAS las cachés de listas (porque el rating promedio pudo cambiar)
-    await invalidate_cache("components:*")
+    await invalidate_tag(f"component:{component_id}")
+    # 2. Invalida TODAS las listas en O(1) (el rating promedio pudo cambiar)
+    await bump_generation(COMPONENT_LIST_NS)
 
     return db_review
 
 
+def _get_own_review(db: Session, component_id: int, review_id: int, user_id: str) -> Review:
+    # Fila bloqueada hasta el commit (ver crud_review.get_review_for_update)
+    db_review = crud_review.get_review_for_update(db, component_id, review_id)
+    if not db_review:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Reseña no encontrada para este componente")
+    if db_review.user_id != user_id:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Solo el autor puede modificar esta reseña")
+    return db_review
+
+
+@router.put(
+    "/components/{component_id}/reviews/{review_id}",
+    response_model=ReviewRead,
+    summary="Editar una reseña propia"
+)
+async def update_existing_review(
+    component_id: int,
+    review_id: int,
+    review_in: ReviewUpdate,
+    db: Session = Depends(get_db),
+    user_info: dict = Depends(get_current_user_info)
+):
+    db_review = _get_own_review(db, component_id, review_id, user_info["user_id"])
+    db_review = crud_review.update_review(db=db, db_review=db_review, review_in=review_in)
+    await mark_recent_write(user_id=user_info["user_id"], component_id=component_id)
+
+    # --- ¡Invalidación de Caché! ---
+    await invalidate_tag(f"component:{component_id}")
+    await bump_generation(COMPONENT_LIST_NS)
+
+    return db_review
+
+
+@router.delete(
+    "/components/{component_id}/reviews/{review_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Borrar una reseña propia"
+)
+async def delete_existing_review(
+    component_id: int,
+    review_id: int,
+    db: Session = Depends(get_db),
+    user_info: dict = Depends(get_current_user_info)
+):
+    db_review = _get_own_review(db, component_id, review_id, user_info["user_id"])
+    crud_review.delete_review(db=db, db_review=db_review)
+    await mark_recent_write(user_id=user_info["user_id"], component_id=component_id)
+
+    # --- ¡Invalidación de Caché! ---
+    await invalidate_tag(f"component:{component_id}")
+    await bump_generation(COMPONENT_LIST_NS)
+
+
 @router.post(
     "/components/{component_id}/reviews/{review_id}/comments",
     response_model=CommentRead,
@@ -87,10 +183,11 @@ async def create_new_comment(
     
     if db_comment is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Reseña no encontrada")
+    await mark_recent_write(user_id=user_info["user_id"], component_id=component_id)
 
     # --- ¡Invalidación de Caché! ---
     # 1. Borra la caché de detalle de este componente
-    await invalidate_cache(f"component_detail:{component_id}")
+    await invalidate_tag(f"component:{component_id}")
     # (No es necesario borrar 'components:*' por un comentario, pero sí por la reseña)
 
     return db_comment
\ No newline at end of file
@@ -9,13 +9,108 @@ class Settings(BaseSettings):
     # Base de Datos PostgreSQL
     COMPONENTS_DATABASE_URL: str = os.getenv("COMPONENTS_DATABASE_URL", "")
     
+    # Réplica de lectura (opcional; vacío = todo va a la primaria).
+    # Los GET leen de la réplica salvo que vaya atrasada más de
+    # REPLICA_MAX_LAG_SECONDS o el usuario/componente acabe de escribir.
+    COMPONENTS_REPLICA_DATABASE_URL: str = os.getenv("COMPONENTS_REPLICA_DATABASE_URL", "")
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    # Cada cuánto se vuelve a medir el retraso de la réplica
+    REPLICA_LAG_CHECK_SECONDS: float = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "2"))
+    # Ventana "read-your-writes": tras una escritura, las lecturas de ese
+    # usuario/componente (y los rellenos de caché) van a la primaria
+    READ_YOUR_WRITES_SECONDS: int = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
     # Caché de Redis
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://components-cache:6379")
+    # Comprimir con zstd las respuestas cacheadas a partir de N bytes (0 = nunca)
+    CACHE_ZSTD_MIN_BYTES: int = int(os.getenv("CACHE_ZSTD_MIN_BYTES", "2048"))
+    # TTL "duro" (la clave desaparece de Redis) y "suave" (a partir de aquí
+    # la entrada está 'stale': se sirve y se recalcula en segundo plano)
+    CACHE_TTL_SECONDS: int = int(os.getenv("CACHE_TTL_SECONDS", "3600"))
+    CACHE_SOFT_TTL_SECONDS: int = int(os.getenv("CACHE_SOFT_TTL_SECONDS", "600"))
+    # TTL corto para resultados vacíos y 404 (caché negativa)
+    CACHE_NEGATIVE_TTL_SECONDS: int = int(os.getenv("CACHE_NEGATIVE_TTL_SECONDS", "60"))
+    # Tiempo máximo que un worker retiene el lock de recálculo de una clave
+    CACHE_LOCK_TIMEOUT_SECONDS: int = int(os.getenv("CACHE_LOCK_TIMEOUT_SECONDS", "10"))
+    # Nivel en memoria (por worker) delante de Redis
+    CACHE_LOCAL_MAX_ENTRIES: int = int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", "1000"))
+    CACHE_LOCAL_TTL_SECONDS: int = int(os.getenv("CACHE_LOCAL_TTL_SECONDS", "30"))
+    CACHE_LOCAL_GENERATION_TTL_SECONDS: int = int(os.getenv("CACHE_LOCAL_GENERATION_TTL_SECONDS", "5"))
+
+    # Pre-calentamiento después de invalidar (ver services/cache_warmer):
+    # se recalculan las CACHE_WARM_TOP_N entradas más leídas, con como
+    # mucho CACHE_WARM_CONCURRENCY cálculos a la vez
+    CACHE_WARM_TOP_N: int = int(os.getenv("CACHE_WARM_TOP_N", "200"))
+    CACHE_WARM_CONCURRENCY: int = int(os.getenv("CACHE_WARM_CONCURRENCY", "4"))
+    # Popularidad: cada cuánto vuelca cada worker sus conteos, cuántas
+    # claves se conservan y cuánto pesan los conteos viejos tras cada ciclo
+    CACHE_HOT_FLUSH_SECONDS: int = int(os.getenv("CACHE_HOT_FLUSH_SECONDS", "10"))
+    CACHE_HOT_KEYS_MAX: int = int(os.getenv("CACHE_HOT_KEYS_MAX", "5000"))
+    CACHE_HOT_DECAY: float = float(os.getenv("CACHE_HOT_DECAY", "0.5"))
+
+    # Cache-Control de lista y detalle (el cliente revalida con ETag después)
+    HTTP_CACHE_MAX_AGE_SECONDS: int = int(os.getenv("HTTP_CACHE_MAX_AGE_SECONDS", "30"))
+
+    # Permite pedir el desglose de tiempos por petición con el header
+    # 'X-Debug-Timing: 1' (incluye la sentencia SQL más lenta)
+    DEBUG_TIMING_ENABLED: bool = os.getenv("DEBUG_TIMING_ENABLED", "false").lower() in ("1", "true", "yes")
 
     # Configuración de la API
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "PConstruct Components Service"
 
+    # Detalle de componente: cuántas reseñas (las más recientes) se incrustan.
+    # El resto se consulta paginado en /components/{id}/reviews
+    DETAIL_REVIEWS_LIMIT: int = int(os.getenv("DETAIL_REVIEWS_LIMIT", "10"))
+
+    # Lista y detalle: generar el JSON en Postgres (json_build_object /
+    # json_agg) en lugar de ORM + Pydantic. Ver benchmarks/bench_render_json.py
+    SQL_JSON_RENDERING: bool = os.getenv("SQL_JSON_RENDERING", "false").lower() in ("1", "true", "yes")
+
+    # Exportación (GET /components/export): filas por lote del cursor
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+    # Alternativas (vecinos más cercanos) guardadas por componente
+    ALTERNATIVES_TOP_K: int = int(os.getenv("ALTERNATIVES_TOP_K", "8"))
+
+    # Delta-sync: cada cuánto se versionan los cambios pendientes del
+    # catálogo (ver services/catalog_publisher) y cuántos por transacción
+    CATALOG_PUBLISH_SECONDS: float = float(os.getenv("CATALOG_PUBLISH_SECONDS", "1"))
+    CATALOG_PUBLISH_BATCH_SIZE: int = int(os.getenv("CATALOG_PUBLISH_BATCH_SIZE", "5000"))
+
+    # Autocompletar: cada cuánto se incorporan al índice los cambios del catálogo
+    SUGGEST_REFRESH_SECONDS: int = int(os.getenv("SUGGEST_REFRESH_SECONDS", "60"))
+
+    # Estadísticas de precio (deal_score): mínimo de componentes para
+    # tener percentiles propios de una marca dentro de su categoría
+    PRICE_STATS_MIN_SAMPLES: int = int(os.getenv("PRICE_STATS_MIN_SAMPLES", "5"))
+
+    # Limpieza de ofertas viejas: las que el scraper no actualiza hace más
+    # de OFFER_STALE_HORIZON_HOURS se mueven a 'offers_archive'
+    OFFER_STALE_HORIZON_HOURS: int = int(os.getenv("OFFER_STALE_HORIZON_HOURS", "168"))
+    # Filas por transacción (cada lote bloquea solo sus filas)
+    OFFER_SWEEP_BATCH_SIZE: int = int(os.getenv("OFFER_SWEEP_BATCH_SIZE", "500"))
+    # Cada cuánto corre dentro del servicio (0 = solo a mano / scraper)
+    OFFER_SWEEP_INTERVAL_SECONDS: int = int(os.getenv("OFFER_SWEEP_INTERVAL_SECONDS", "3600"))
+
+    # Miniaturas WebP de las imágenes (ver services/image_cache): directorio
+    # compartido por los workers y el scraper, con tope de tamaño (LRU)
+    IMAGE_CACHE_DIR: str = os.getenv("IMAGE_CACHE_DIR", "/tmp/pconstruct-thumbnails")
+    IMAGE_CACHE_MAX_BYTES: int = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    # Cada cuánto vuelve a medir el directorio un worker que escribe
+    IMAGE_CACHE_SCAN_SECONDS: int = int(os.getenv("IMAGE_CACHE_SCAN_SECONDS", "60"))
+    # Cache-Control de las miniaturas (el ETag cambia si cambia la imagen)
+    IMAGE_HTTP_MAX_AGE_SECONDS: int = int(os.getenv("IMAGE_HTTP_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+    IMAGE_WEBP_QUALITY: int = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+    # Descarga de la imagen original de la tienda
+    IMAGE_FETCH_TIMEOUT_SECONDS: float = float(os.getenv("IMAGE_FETCH_TIMEOUT_SECONDS", "10"))
+    IMAGE_SOURCE_MAX_BYTES: int = int(os.getenv("IMAGE_SOURCE_MAX_BYTES", str(10 * 1024 * 1024)))
+    # Tras un fallo (la tienda no respondió, imagen inválida) no se vuelve
+    # a descargar durante este tiempo: se redirige a la original
+    IMAGE_FAILURE_TTL_SECONDS: int = int(os.getenv("IMAGE_FAILURE_TTL_SECONDS", "300"))
+    # Descargas simultáneas al pre-generar después del scraping
+    IMAGE_PREGENERATE_CONCURRENCY: int = int(os.getenv("IMAGE_PREGENERATE_CONCURRENCY", "4"))
+
     # Validación (asegurarse de que la URL de la DB esté)
     @validator("COMPONENTS_DATABASE_URL", pre=True, always=True)
     def check_db_url(cls, v):
@@ -1,85 +1,152 @@
-from sqlalchemy.orm import Session, joinedload, aliased
+from sqlalchemy.orm import Session, selectinload, noload, aliased
 from sqlalchemy.sql import func
-from sqlalchemy import case, literal_column
-from typing import List, Optional, Tuple
+from sqlalchemy import case, literal_column, any_, bindparam, cast, text, Float, Integer, Numeric, Text, and_, true, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
+from decimal import Decimal
 import math
 
 # Importamos Modelos y Schemas
 from app.models.component import Component
 from app.models.offer import Offer
 from app.models.review import Review
-from app.schemas.component import ComponentCard, ComponentDetail
+from app.models.component_alternatives import ComponentAlternatives
+from app.models.price_stats import PriceStats
+from app.models.catalog_change import CatalogChange
+from app.schemas.component import ComponentCard, ComponentDetail, ComponentFacets, FacetCount, PriceBucket
+from app.schemas.offer import OfferRead
+from app.schemas.review import ReviewRead
 from app.schemas.common import PaginatedResponse
+from app.core.config import settings
 
 def get_component_by_id(db: Session, component_id: int) -> Optional[ComponentDetail]:
     """
     Obtiene el detalle completo de un componente por su ID.
     (Para la vista component_detail.dart)
+
+    Las relaciones se cargan con 'selectin' (una consulta por relación)
+    en lugar de 'joinedload', para evitar el producto cartesiano
+    ofertas x reseñas x comentarios. Solo se incrustan las
+    DETAIL_REVIEWS_LIMIT reseñas más recientes; el resto se pagina en
+    GET /components/{id}/reviews.
     """
     
-    # 1. Subconsulta para calcular el rating promedio y el conteo de reseñas
-    review_stats = (
-        db.query(
-            Review.component_id,
-            func.avg(Review.rating).label("average_rating"),
-            func.count(Review.id).label("review_count")
-        )
-        .filter(Review.component_id == component_id)
-        .group_by(Review.component_id)
-        .subquery()
-    )
-
-    # 2. Consulta principal
-    component = (
-        db.query(Component, review_stats.c.average_rating, review_stats.c.review_count)
-        .outerjoin(review_stats, Component.id == review_stats.c.component_id)
+    # 1. Componente + ofertas (en una 2a consulta IN)
+    # El rating promedio y el conteo salen de los agregados mantenidos
+    # en 'components' (rating_sum / rating_count), sin subconsulta.
+    component_data = (
+        db.query(Component)
         .filter(Component.id == component_id)
-        # Cargamos eficientemente las relaciones (hijos)
-        .options(
-            joinedload(Component.offers), # Cargar ofertas
-
-            # --- ¡INICIO DE CORRECCIÓN! ---
-            # Cargar reseñas, y DENTRO de reseñas, cargar sus comentarios
-            joinedload(Component.reviews)
-                .joinedload(Review.comments) 
-            # --- FIN DE CORRECCIÓN! ---
-        )
+        .options(selectinload(Component.offers))
         .first()
     )
 
-    if not component:
+    if not component_data:
         return None
 
-    # 3. Mapeo al Schema 'ComponentDetail'
-    component_data, avg_rating, review_count = component
-    
-    # --- ¡INICIO DE CORRECCIÓN! ---
-    # 1. Validar el modelo principal DESDE EL ORM
-    # Pydantic llamará a los @computed_field de ReviewRead
-    component_detail = ComponentDetail.model_validate(component_data)
+    # 2. Solo las N reseñas más recientes (sus comentarios, con selectin)
+    latest_reviews = (
+        db.query(Review)
+        .filter(Review.component_id == component_id)
+        .order_by(Review.created_at.desc(), Review.id.desc())
+        .limit(settings.DETAIL_REVIEWS_LIMIT)
+        .options(selectinload(Review.comments))
+        .all()
+    )
 
-    # 2. Añadir los campos calculados (y castear a float)
-    component_detail.average_rating = float(avg_rating) if avg_rating else None # <-- ¡CAST A FLOAT!
-    component_detail.review_count = review_count or 0
-    # --- FIN DE CORRECCIÓN! ---
-  
-    return component_detail
+    return _to_component_detail(component_data, latest_reviews)
 
 
-def get_components_paginated(
+def _to_component_detail(component_data: Component, reviews: List[Review]) -> ComponentDetail:
+    # Mapeo al Schema 'ComponentDetail'
+    # (No usamos model_validate(component_data) directamente porque
+    # accedería a 'component_data.reviews' y cargaría TODAS las reseñas)
+    return ComponentDetail(
+        id=component_data.id,
+        name=component_data.name,
+        category=component_data.category,
+        brand=component_data.brand,
+        image_url=component_data.image_url,
+        description=component_data.description,
+        offers=[OfferRead.model_validate(o) for o in component_data.offers],
+        reviews=[ReviewRead.model_validate(r) for r in reviews],
+        average_rating=component_data.average_rating,
+        review_count=component_data.rating_count
+    )
+
+
+def get_components_by_ids(
     db: Session,
-    page: int = 1,
-    page_size: int = 20,
-    category: Optional[str] = None,
-    brand: Optional[str] = None,
-    min_price: Optional[float] = None,
-    max_price: Optional[float] = None,
-    search: Optional[str] = None,
-    sort_by: Optional[str] = "price_asc"
-) -> PaginatedResponse[ComponentCard]:
+    component_ids: List[int],
+    with_relations: bool = True
+) -> Dict[int, ComponentDetail]:
     """
-    Obtiene una lista paginada de componentes con filtros.
-    (Para la vista components_page.dart)
+    Obtiene varios componentes en bloque (WHERE id = ANY(:ids)).
+    Con 'with_relations' carga también ofertas y las reseñas más
+    recientes de cada uno (igual que get_component_by_id); sin él,
+    solo las columnas del componente (offers/reviews vacíos).
+    """
+    if not component_ids:
+        return {}
+
+    ids_param = bindparam("ids", list(component_ids), type_=ARRAY(Integer))
+    query = db.query(Component).filter(Component.id == any_(ids_param))
+
+    if not with_relations:
+        # Sin relaciones: 'offers' y 'reviews' no se tocan (noload)
+        components = query.options(noload(Component.offers), noload(Component.reviews)).all()
+        return {
+            c.id: ComponentDetail(
+                id=c.id,
+                name=c.name,
+                category=c.category,
+                brand=c.brand,
+                image_url=c.image_url,
+                description=c.description,
+                average_rating=c.average_rating,
+                review_count=c.rating_count
+            ) for c in components
+        }
+
+    components = query.options(selectinload(Component.offers)).all()
+    if not components:
+        return {}
+
+    # Las N reseñas más recientes POR componente, en una sola consulta
+    ranked = (
+        db.query(
+            Review.id.label("review_id"),
+            func.row_number().over(
+                partition_by=Review.component_id,
+                order_by=(Review.created_at.desc(), Review.id.desc())
+            ).label("rn")
+        )
+        .filter(Review.component_id == any_(ids_param))
+        .subquery("ranked_reviews")
+    )
+    reviews = (
+        db.query(Review)
+        .join(ranked, Review.id == ranked.c.review_id)
+        .filter(ranked.c.rn <= settings.DETAIL_REVIEWS_LIMIT)
+        .order_by(Review.component_id, Review.created_at.desc(), Review.id.desc())
+        .options(selectinload(Review.comments))
+        .all()
+    )
+    reviews_by_component: Dict[int, List[Review]] = {}
+    for review in reviews:
+        reviews_by_component.setdefault(review.component_id, []).append(review)
+
+    return {
+        c.id: _to_component_detail(c, reviews_by_component.get(c.id, []))
+        for c in components
+    }
+
+
+def _best_offer_alias(db: Session):
+    """
+    Subconsulta con la oferta más barata de cada componente (rn == 1)
+    y su alias como entidad Offer.
     """
     best_offer_subq = (
         db.query(
@@ -94,19 +161,38 @@ def get_components_paginated(
     
     # Luego, creamos el alias para la entidad Offer referenciando la subconsulta
     BestOffer = aliased(Offer, best_offer_subq)
-    # --- FIN DE CORRECCIÓN! ---
+    return BestOffer, best_offer_subq
+
+
+def _list_query(
+    db: Session,
+    category: Optional[str] = None,
+    brand: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    search: Optional[str] = None,
+    min_rating: Optional[float] = None
+):
+    """
+    Consulta filtrada de GET /components (sin orden ni paginación),
+    compartida por la ruta ORM y la ruta JSON en SQL.
+    Devuelve (query, BestOffer).
+    """
+    BestOffer, best_offer_subq = _best_offer_alias(db)
     
     # 2. Consulta base
     query = (
         db.query(
-            Component.id,
-            Component.name,
-            Component.category,
-            Component.brand,
-            Component.image_url,
-            BestOffer.price, # Esto sigue funcionando
-            BestOffer.store, # Esto sigue funcionando
-            BestOffer.link   # Esto sigue funcionando
+            Component.id.label("id"),
+            Component.name.label("name"),
+            Component.category.label("category"),
+            Component.brand.label("brand"),
+            Component.image_url.label("image_url"),
+            Component.average_rating.label("average_rating"),
+            Component.rating_count.label("rating_count"),
+            BestOffer.price.label("price"), # Esto sigue funcionando
+            BestOffer.store.label("store"), # Esto sigue funcionando
+            BestOffer.link.label("link")    # Esto sigue funcionando
         )
         # --- ¡CORRECCIÓN EN EL JOIN! ---
         .outerjoin(
@@ -116,10 +202,12 @@ def get_components_paginated(
         )
     )
     # 3. Aplicar Filtros (¡La lógica clave!)
+    # Categoría y marca sin distinguir mayúsculas
+    # (índices idx_components_category_lower / idx_components_brand_lower)
     if category:
-        query = query.filter(Component.category == category)
+        query = query.filter(func.lower(Component.category) == category.lower())
     if brand:
-        query = query.filter(Component.brand == brand)
+        query = query.filter(func.lower(Component.brand) == brand.lower())
     if search:
         query = query.filter(Component.name.ilike(f"%{search}%"))
 
@@ -128,24 +216,58 @@ def get_components_paginated(
         query = query.filter(BestOffer.price >= min_price)
     # --- FIN DE CORRECCIÓN! ---
 
-    if max_price:
+    if max_price is not None:
         query = query.filter(BestOffer.price <= max_price)
 
-# 4. Conteo total (DESPUÉS de filtros, ANTES de paginación)
+    if min_rating is not None:
+        # Usa idx_components_avg_rating (misma expresión que el índice)
+        query = query.filter(Component.average_rating >= min_rating)
+
+    return query, BestOffer
+
+
+def _list_order(BestOffer, sort_by: Optional[str]) -> list:
+    if sort_by == "price_desc":
+        return [BestOffer.price.desc().nullslast()]
+    if sort_by == "rating":
+        return [Component.average_rating.desc().nullslast(), Component.id]
+    # Por defecto (price_asc)
+    return [BestOffer.price.asc().nullsfirst()]
+
+
+def get_components_paginated(
+    db: Session,
+    page: int = 1,
+    page_size: int = 20,
+    category: Optional[str] = None,
+    brand: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    search: Optional[str] = None,
+    sort_by: Optional[str] = "price_asc",
+    min_rating: Optional[float] = None,
+    price_stats=None
+) -> PaginatedResponse[ComponentCard]:
+    """
+    Obtiene una lista paginada de componentes con filtros.
+    (Para la vista components_page.dart)
+    'price_stats' (services.price_stats.PriceStatsTable) agrega el
+    deal_score de cada card.
+    """
+    query, BestOffer = _list_query(
+        db, category=category, brand=brand, min_price=min_price,
+        max_price=max_price, search=search, min_rating=min_rating
+    )
+
+    # 4. Conteo total (DESPUÉS de filtros, ANTES de paginación)
     total_items = query.count()
 
     # 5. Aplicar Ordenamiento
-    if sort_by == "price_desc":
-        query = query.order_by(BestOffer.price.desc().nullslast())
-    else:
-        # Por defecto (price_asc)
-        query = query.order_by(BestOffer.price.asc().nullsfirst())
+    query = query.order_by(*_list_order(BestOffer, sort_by))
 
     # 6. Aplicar Paginación
     offset = (page - 1) * page_size
     query = query.limit(page_size).offset(offset)
-    
-    # --- FIN DE CORRECCIÓN! ---
 
     # 7. Ejecutar consulta y mapear (sin cambios)
     results = query.all()
@@ -157,9 +279,12 @@ def get_components_paginated(
             category=row[2],
             brand=row[3],
             image_url=row[4],
-            price=row[5],
-            store=row[6],
-            link=row[7]
+            average_rating=row[5],
+            review_count=row[6],
+            price=row[7],
+            store=row[8],
+            link=row[9],
+            deal_score=price_stats.deal_score(row[2], row[3], row[7]) if price_stats else None
         ) for row in results
     ]
 
@@ -169,4 +294,502 @@ def get_components_paginated(
         page=page,
         page_size=page_size,
         items=items
-    )
\ No newline at end of file
+    )
+
+
+# -------------------------------------------------------------------
+# Ruta "JSON en SQL": Postgres arma el JSON final
+# -------------------------------------------------------------------
+# Sin objetos ORM ni Pydantic: la consulta devuelve UNA fila de texto
+# con el mismo documento que producirían ComponentCard/ComponentDetail
+# (mismas claves y orden; precios como texto, igual que Decimal en
+# Pydantic). Se activa con SQL_JSON_RENDERING; comparar ambas rutas con
+# benchmarks/bench_render_json.py.
+
+def _deal_score_sql(price, stats):
+    """
+    Misma fórmula que services.price_stats.deal_score: 1 - rango
+    percentil interpolado entre p10..p90 ('stats' = columnas de
+    price_stats; NULL si no hay estadísticas).
+    """
+    p10, p25, p50, p75, p90 = stats
+    rank = case(
+        (price <= p10, 0.10 * price / func.nullif(p10, 0)),
+        (price <= p25, 0.10 + 0.15 * (price - p10) / (p25 - p10)),
+        (price <= p50, 0.25 + 0.25 * (price - p25) / (p50 - p25)),
+        (price <= p75, 0.50 + 0.25 * (price - p50) / (p75 - p50)),
+        (price <= p90, 0.75 + 0.15 * (price - p75) / (p90 - p75)),
+        else_=func.coalesce(func.least(1, 0.90 + 0.10 * (price - p90) / func.nullif(p90 - p10, 0)), 1)
+    )
+    # round(x, 3) existe solo para numeric
+    score = cast(func.round(cast(1 - func.coalesce(rank, 0), Numeric), 3), Float)
+    return case((and_(price.isnot(None), p50.isnot(None)), score), else_=None)
+
+
+def _card_json(c, deal_score=None):
+    # Mismo orden de claves que ComponentCard
+    return func.json_build_object(
+        "name", c.name,
+        "category", c.category,
+        "brand", c.brand,
+        "image_url", c.image_url,
+        "id", c.id,
+        "price", cast(c.price, Text),
+        "store", c.store,
+        "link", c.link,
+        "average_rating", c.average_rating,
+        "review_count", c.rating_count,
+        "deal_score", deal_score
+    )
+
+
+def get_components_paginated_json(
+    db: Session,
+    page: int = 1,
+    page_size: int = 20,
+    category: Optional[str] = None,
+    brand: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    search: Optional[str] = None,
+    sort_by: Optional[str] = "price_asc",
+    min_rating: Optional[float] = None
+) -> Tuple[bytes, int]:
+    """
+    Igual que get_components_paginated, pero devuelve directamente los
+    bytes de PaginatedResponse[ComponentCard] generados por Postgres
+    (y cuántos items trae la página).
+    """
+    query, BestOffer = _list_query(
+        db, category=category, brand=brand, min_price=min_price,
+        max_price=max_price, search=search, min_rating=min_rating
+    )
+    total_items = query.count()
+
+    # 'ord' conserva el orden de la página dentro de json_agg
+    order = _list_order(BestOffer, sort_by)
+    page_rows = (
+        query.add_columns(func.row_number().over(order_by=order).label("ord"))
+        .order_by(*order)
+        .limit(page_size)
+        .offset((page - 1) * page_size)
+        .subquery("page_rows")
+    )
+    p = page_rows.c
+
+    # Estadísticas de la marca; si no hay, las de la categoría (brand = '')
+    brand_stats = aliased(PriceStats)
+    category_stats = aliased(PriceStats)
+    stats = [
+        func.coalesce(getattr(brand_stats, column), getattr(category_stats, column))
+        for column in ("p10", "p25", "p50", "p75", "p90")
+    ]
+
+    document = func.json_build_object(
+        "total_items", total_items,
+        "page", page,
+        "page_size", page_size,
+        "items", func.coalesce(
+            func.json_agg(aggregate_order_by(_card_json(p, _deal_score_sql(p.price, stats)), p.ord)),
+            literal_column("'[]'::json")
+        )
+    )
+    body, item_count = (
+        db.query(cast(document, Text), func.count())
+        .select_from(page_rows)
+        .outerjoin(
+            brand_stats,
+            (brand_stats.category == func.lower(p.category)) & (brand_stats.brand == func.lower(p.brand))
+        )
+        .outerjoin(
+            category_stats,
+            (category_stats.category == func.lower(p.category)) & (category_stats.brand == "")
+        )
+        .one()
+    )
+    return body.encode("utf-8"), item_count
+
+
+def _utc_iso_sql(column: str) -> str:
+    """
+    Timestamp como lo serializa Pydantic (misma salida que la ruta ORM):
+    UTC con 'Z' y microsegundos solo si no son cero. json_build_object
+    usaría el huso de la sesión ('+00:00') y recortaría los ceros.
+    """
+    utc = f"({column} AT TIME ZONE 'UTC')"
+    return (
+        f"to_char({utc}, 'YYYY-MM-DD\"T\"HH24:MI:SS') || "
+        f"CASE WHEN to_char({utc}, 'US') = '000000' THEN '' ELSE to_char({utc}, '.US') END || 'Z'"
+    )
+
+
+# Detalle completo en una sola consulta: ofertas, las N reseñas más
+# recientes y sus comentarios como subconsultas correlacionadas.
+# Mismo orden que la ruta ORM: ofertas por precio (ver Component.offers),
+# reseñas de la más reciente y comentarios de la más vieja.
+_DETAIL_JSON_SQL = text(f"""
+SELECT json_build_object(
+    'name', c.name,
+    'category', c.category,
+    'brand', c.brand,
+    'image_url', c.image_url,
+    'id', c.id,
+    'description', c.description,
+    'average_rating', CAST(c.rating_sum AS double precision) / NULLIF(c.rating_count, 0),
+    'review_count', c.rating_count,
+    'offers', COALESCE((
+        SELECT json_agg(json_build_object(
+            'store', o.store,
+            'price', CAST(o.price AS text),
+            'link', o.link,
+            'id', o.id,
+            'last_updated', {_utc_iso_sql('o.last_updated')}
+        ) ORDER BY o.price, o.id)
+        FROM offers o
+        WHERE o.component_id = c.id
+    ), '[]'::json),
+    'reviews', COALESCE((
+        SELECT json_agg(json_build_object(
+            'id', r.id,
+            'rating', r.rating,
+            'title', r.title,
+            'content', r.content,
+            'created_at', {_utc_iso_sql('r.created_at')},
+            'comments', COALESCE((
+                SELECT json_agg(json_build_object(
+                    'id', cm.id,
+                    'content', cm.content,
+                    'created_at', {_utc_iso_sql('cm.created_at')},
+                    'user_id', cm.user_id,
+                    'user_username', cm.user_username,
+                    'user', json_build_object('user_id', cm.user_id, 'user_username', cm.user_username)
+                ) ORDER BY cm.created_at, cm.id)
+                FROM comments cm
+                WHERE cm.review_id = r.id
+            ), '[]'::json),
+            'user_id', r.user_id,
+            'user_username', r.user_username,
+            'user', json_build_object('user_id', r.user_id, 'user_username', r.user_username)
+        ) ORDER BY r.created_at DESC, r.id DESC)
+        FROM (
+            SELECT *
+            FROM reviews
+            WHERE component_id = c.id
+            ORDER BY created_at DESC, id DESC
+            LIMIT :reviews_limit
+        ) r
+    ), '[]'::json)
+)::text
+FROM components c
+WHERE c.id = :component_id
+""")
+
+
+def get_component_detail_json(db: Session, component_id: int) -> Optional[bytes]:
+    """
+    Igual que get_component_by_id, pero devuelve los bytes de
+    ComponentDetail generados por Postgres (None si no existe).
+    """
+    body = db.execute(
+        _DETAIL_JSON_SQL,
+        {"component_id": component_id, "reviews_limit": settings.DETAIL_REVIEWS_LIMIT}
+    ).scalar()
+    return body.encode("utf-8") if body is not None else None
+
+
+def get_component_facets(
+    db: Session,
+    category: Optional[str] = None,
+    brand: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    search: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    buckets: int = 10
+) -> ComponentFacets:
+    """
+    Conteos para el panel de filtros de components_page.dart, en UNA
+    consulta agrupada (GROUPING SETS). Cada faceta respeta todos los
+    filtros MENOS el suyo (para poder cambiar de opción):
+      - categorías: filtros de marca y precio
+      - marcas: filtros de categoría y precio
+      - histograma de precios: filtros de categoría y marca
+    'search' y 'min_rating' aplican a todo.
+    """
+    BestOffer, best_offer_subq = _best_offer_alias(db)
+
+    # Cada filtro "propio" de una faceta es una columna booleana
+    cat_match = func.lower(Component.category) == category.lower() if category else true()
+    brand_match = func.lower(Component.brand) == brand.lower() if brand else true()
+    price_conds = []
+    if min_price is not None:
+        price_conds.append(BestOffer.price >= min_price)
+    if max_price is not None:
+        price_conds.append(BestOffer.price <= max_price)
+    price_match = and_(*price_conds) if price_conds else true()
+
+    # Rango del histograma: precios con los filtros de categoría y marca
+    in_histogram = and_(cat_match, brand_match)
+    base = (
+        db.query(
+            Component.category.label("category"),
+            Component.brand.label("brand"),
+            BestOffer.price.label("price"),
+            cat_match.label("cat_match"),
+            brand_match.label("brand_match"),
+            price_match.label("price_match"),
+            func.min(BestOffer.price).filter(in_histogram).over().label("lo"),
+            func.max(BestOffer.price).filter(in_histogram).over().label("hi")
+        )
+        .outerjoin(
+            BestOffer,
+            (Component.id == BestOffer.component_id) & (best_offer_subq.c.rn == 1)
+        )
+    )
+    if search:
+        base = base.filter(Component.name.ilike(f"%{search}%"))
+    if min_rating is not None:
+        base = base.filter(Component.average_rating >= min_rating)
+    base = base.subquery("facet_base")
+
+    # Cubeta del histograma (1..buckets). '+ 0.01' para que el máximo
+    # caiga en la última cubeta y el rango nunca sea vacío.
+    facet_rows = db.query(
+        *base.c,
+        func.width_bucket(base.c.price, base.c.lo, base.c.hi + Decimal("0.01"), buckets).label("bucket")
+    ).subquery("facet_rows")
+    f = facet_rows.c
+
+    rows = (
+        db.query(
+            func.grouping(f.category).label("g_category"),
+            func.grouping(f.brand).label("g_brand"),
+            f.category,
+            f.brand,
+            f.bucket,
+            func.count().filter(and_(f.brand_match, f.price_match)).label("n_category"),
+            func.count().filter(and_(f.cat_match, f.price_match)).label("n_brand"),
+            func.count().filter(and_(f.cat_match, f.brand_match)).label("n_bucket"),
+            func.count().filter(and_(f.cat_match, f.brand_match, f.price_match)).label("n_total"),
+            func.max(f.lo).label("lo"),
+            func.max(f.hi).label("hi")
+        )
+        .group_by(func.grouping_sets(tuple_(f.category), tuple_(f.brand), tuple_(f.bucket)))
+        .all()
+    )
+
+    categories, brands, histogram = [], [], {}
+    total_items = 0
+    lo = hi = None
+    for row in rows:
+        lo = row.lo if row.lo is not None else lo
+        hi = row.hi if row.hi is not None else hi
+        if row.g_category == 0:
+            # Las filas por categoría particionan el total
+            total_items += row.n_total
+            if row.n_category:
+                categories.append(FacetCount(value=row.category, count=row.n_category))
+        elif row.g_brand == 0:
+            if row.brand is not None and row.n_brand:
+                brands.append(FacetCount(value=row.brand, count=row.n_brand))
+        elif row.bucket is not None and row.n_bucket:
+            histogram[row.bucket] = row.n_bucket
+
+    price_histogram = []
+    if lo is not None and hi is not None:
+        width = (hi + Decimal("0.01") - lo) / buckets
+        for i in range(1, buckets + 1):
+            price_histogram.append(PriceBucket(
+                min_price=(lo + width * (i - 1)).quantize(Decimal("0.01")),
+                max_price=(lo + width * i).quantize(Decimal("0.01")),
+                count=histogram.get(i, 0)
+            ))
+
+    return ComponentFacets(
+        total_items=total_items,
+        categories=sorted(categories, key=lambda c: (-c.count, c.value)),
+        brands=sorted(brands, key=lambda b: (-b.count, b.value)),
+        price_min=lo,
+        price_max=hi,
+        price_histogram=price_histogram
+    )
+
+
+def get_catalog_version(db: Session) -> int:
+    """
+    Versión PUBLICADA del catálogo (la mayor entre componentes y
+    lápidas, por índice). Toda versión menor o igual ya es visible:
+    el publicador confirma sus vueltas en orden.
+    """
+    components = db.query(func.max(Component.catalog_version)).scalar() or 0
+    tombstones = (
+        db.query(func.max(CatalogChange.version))
+        .filter(CatalogChange.deleted)
+        .scalar()
+    ) or 0
+    return max(components, tombstones)
+
+
+def get_catalog_tombstones(db: Session, since_version: int, until_version: int) -> List[int]:
+    """
+    Ids de los componentes borrados con versión en (since, until].
+    """
+    rows = (
+        db.query(CatalogChange.component_id)
+        .filter(
+            CatalogChange.deleted,
+            CatalogChange.version > since_version,
+            CatalogChange.version <= until_version
+        )
+        .distinct()
+        .all()
+    )
+    return sorted(row[0] for row in rows)
+
+
+def get_catalog_cards(
+    db: Session,
+    since_version: Optional[int] = None,
+    limit: Optional[int] = None
+) -> Tuple[List[ComponentCard], List[int], int, bool]:
+    """
+    Cards (con su mejor oferta) ordenadas por 'catalog_version'.
+    Con 'since_version' devuelve solo las que cambiaron después de esa
+    versión (delta-sync) y los ids borrados en el mismo rango.
+    Devuelve (cards, borrados, versión para el siguiente 'since', si
+    quedan más cambios después del 'limit').
+
+    La versión publicada se lee ANTES que las cards: lo que se publique
+    mientras tanto tiene versiones mayores y sale en la próxima llamada.
+    """
+    version = get_catalog_version(db)
+    BestOffer, best_offer_subq = _best_offer_alias(db)
+
+    query = (
+        db.query(
+            Component.id,
+            Component.name,
+            Component.category,
+            Component.brand,
+            Component.image_url,
+            Component.average_rating,
+            Component.rating_count,
+            BestOffer.price,
+            BestOffer.store,
+            BestOffer.link,
+            Component.catalog_version
+        )
+        .outerjoin(
+            BestOffer,
+            (Component.id == BestOffer.component_id) & (best_offer_subq.c.rn == 1)
+        )
+    )
+    if since_version is not None:
+        query = query.filter(
+            Component.catalog_version > since_version,
+            Component.catalog_version <= version
+        )
+    query = query.order_by(Component.catalog_version)
+    if limit is not None:
+        # Una fila extra para saber si hay más
+        query = query.limit(limit + 1)
+
+    results = query.all()
+    has_more = limit is not None and len(results) > limit
+    if has_more:
+        results = results[:limit]
+        version = results[-1][10]
+
+    items = [
+        ComponentCard(
+            id=row[0],
+            name=row[1],
+            category=row[2],
+            brand=row[3],
+            image_url=row[4],
+            average_rating=row[5],
+            review_count=row[6],
+            price=row[7],
+            store=row[8],
+            link=row[9]
+        ) for row in results
+    ]
+    removed = []
+    if since_version is not None and version > since_version:
+        removed = get_catalog_tombstones(db, since_version, version)
+    return items, removed, max(version, since_version or 0), has_more
+
+
+def iter_export_rows(
+    db: Session,
+    category: Optional[str] = None,
+    updated_since: Optional[datetime] = None,
+    batch_size: int = 1000
+) -> Iterator:
+    """
+    Todo el catálogo (cards con su mejor oferta) para la exportación,
+    leído con un cursor del lado del servidor: se traen 'batch_size'
+    filas por vez, así la memoria no crece con el tamaño del catálogo.
+    'updated_since' compara con el cambio más reciente del componente
+    o de su mejor oferta.
+    """
+    BestOffer, best_offer_subq = _best_offer_alias(db)
+    updated_at = func.greatest(Component.updated_at, BestOffer.last_updated)
+
+    query = (
+        db.query(
+            Component.id.label("id"),
+            Component.name.label("name"),
+            Component.category.label("category"),
+            Component.brand.label("brand"),
+            Component.image_url.label("image_url"),
+            BestOffer.price.label("price"),
+            BestOffer.store.label("store"),
+            BestOffer.link.label("link"),
+            Component.average_rating.label("average_rating"),
+            Component.rating_count.label("review_count"),
+            updated_at.label("updated_at")
+        )
+        .outerjoin(
+            BestOffer,
+            (Component.id == BestOffer.component_id) & (best_offer_subq.c.rn == 1)
+        )
+    )
+    if category:
+        query = query.filter(func.lower(Component.category) == category.lower())
+    if updated_since is not None:
+        query = query.filter(updated_at >= updated_since)
+
+    # yield_per activa 'stream_results' (cursor con nombre en psycopg2)
+    return iter(query.order_by(Component.id).yield_per(batch_size))
+
+
+def get_component_alternatives_json(db: Session, component_id: int) -> Optional[bytes]:
+    """
+    Alternativas precalculadas (ver app.services.alternatives_index),
+    devueltas tal cual se guardaron: una búsqueda por clave primaria.
+    Lista vacía si el componente existe pero aún no tiene alternativas;
+    None si el componente no existe.
+    """
+    items = (
+        db.query(cast(ComponentAlternatives.items, Text))
+        .filter(ComponentAlternatives.component_id == component_id)
+        .scalar()
+    )
+    if items is not None:
+        return items.encode("utf-8")
+    exists = db.query(Component.id).filter(Component.id == component_id).first()
+    return b"[]" if exists else None
+
+
+
+def get_component_image_url(db: Session, component_id: int) -> Optional[str]:
+    """
+    URL de la imagen original (para generar miniaturas). None si el
+    componente no existe o no tiene imagen.
+    """
+    return (
+        db.query(Component.image_url)
+        .filter(Component.id == component_id)
+        .scalar()
+    ) or None
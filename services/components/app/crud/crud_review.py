@@ -1,9 +1,12 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from typing import Optional
 from app.models.review import Review
 from app.models.comment import Comment
 from app.models.component import Component # Para verificar que existe
-from app.schemas.review import ReviewCreate
+from app.schemas.review import ReviewCreate, ReviewUpdate, ReviewSummary
 from app.schemas.comment import CommentCreate
+from app.schemas.common import PaginatedResponse
 
 def create_review(
     db: Session,
@@ -31,11 +34,80 @@ def create_review(
     )
     
     db.add(db_review)
+
+    # Mantener los agregados del componente en la MISMA transacción
+    # (UPDATE atómico: 'rating_sum = rating_sum + x', sin leer-modificar-escribir)
+    _apply_rating_delta(db, component_id, review.rating, 1)
+
     db.commit()
     db.refresh(db_review)
     
     return db_review
 
+
+def get_review_for_update(db: Session, component_id: int, review_id: int) -> Optional[Review]:
+    """
+    Carga la reseña con SELECT ... FOR UPDATE: dos ediciones/borrados
+    simultáneos de la misma reseña se serializan, y cada uno calcula su
+    diferencia de 'rating' contra el valor ya confirmado por el otro
+    (si no, 'rating_sum' se desviaría para siempre). El bloqueo dura
+    hasta el commit de update_review / delete_review.
+    """
+    return (
+        db.query(Review)
+        .filter(Review.id == review_id, Review.component_id == component_id)
+        .with_for_update()
+        .first()
+    )
+
+
+def update_review(
+    db: Session,
+    db_review: Review,
+    review_in: ReviewUpdate
+) -> Review:
+    """
+    Edita una reseña existente. Si cambia el 'rating', ajusta
+    'rating_sum' del componente con la diferencia.
+    'db_review' debe venir de get_review_for_update (fila bloqueada).
+    """
+    update_data = review_in.dict(exclude_unset=True, exclude_none=True)
+    old_rating = db_review.rating
+
+    for field, value in update_data.items():
+        setattr(db_review, field, value)
+
+    if "rating" in update_data and update_data["rating"] != old_rating:
+        _apply_rating_delta(db, db_review.component_id, update_data["rating"] - old_rating, 0)
+
+    db.commit()
+    db.refresh(db_review)
+
+    return db_review
+
+
+def delete_review(db: Session, db_review: Review) -> None:
+    """
+    Borra una reseña (y sus comentarios, por cascada) y descuenta
+    su rating de los agregados del componente.
+    'db_review' debe venir de get_review_for_update (fila bloqueada).
+    """
+    _apply_rating_delta(db, db_review.component_id, -db_review.rating, -1)
+    db.delete(db_review)
+    db.commit()
+
+
+def _apply_rating_delta(db: Session, component_id: int, sum_delta: int, count_delta: int):
+    db.query(Component).filter(Component.id == component_id).update(
+        {
+            Component.rating_sum: Component.rating_sum + sum_delta,
+            Component.rating_count: Component.rating_count + count_delta,
+            # El rating es visible en la card: el trigger de 'components'
+            # lo registra como cambio de catálogo (delta-sync)
+        },
+        synchronize_session=False
+    )
+
 def create_comment(
     db: Session,
     review_id: int,
@@ -64,4 +136,65 @@ def create_comment(
     db.commit()
     db.refresh(db_comment)
     
-    return db_comment
\ No newline at end of file
+    return db_comment
+
+def get_reviews_paginated(
+    db: Session,
+    component_id: int,
+    page: int = 1,
+    page_size: int = 10
+) -> Optional[PaginatedResponse[ReviewSummary]]:
+    """
+    Lista paginada de reseñas de un componente (más recientes primero),
+    con el número de comentarios de cada una en lugar de los comentarios.
+    Devuelve None si el componente no existe.
+    """
+    exists = db.query(Component.id).filter(Component.id == component_id).first()
+    if not exists:
+        return None
+
+    total_items = (
+        db.query(func.count(Review.id))
+        .filter(Review.component_id == component_id)
+        .scalar()
+    )
+
+    offset = (page - 1) * page_size
+    reviews = (
+        db.query(Review)
+        .filter(Review.component_id == component_id)
+        .order_by(Review.created_at.desc(), Review.id.desc())
+        .limit(page_size)
+        .offset(offset)
+        .all()
+    )
+
+    # Conteo de comentarios SOLO de las reseñas de esta página
+    comment_counts = {}
+    if reviews:
+        comment_counts = dict(
+            db.query(Comment.review_id, func.count(Comment.id))
+            .filter(Comment.review_id.in_([r.id for r in reviews]))
+            .group_by(Comment.review_id)
+            .all()
+        )
+
+    items = [
+        ReviewSummary(
+            id=review.id,
+            rating=review.rating,
+            title=review.title,
+            content=review.content,
+            created_at=review.created_at,
+            comment_count=comment_counts.get(review.id, 0),
+            user_id=review.user_id,
+            user_username=review.user_username
+        ) for review in reviews
+    ]
+
+    return PaginatedResponse(
+        total_items=total_items,
+        page=page,
+        page_size=page_size,
+        items=items
+    )
@@ -1,13 +1,26 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+import threading
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.services.metrics import TimedQueuePool, instrument_engine
 
 # 1. Crear el "Engine" de SQLAlchemy
 # Usamos la URL de la base de datos de nuestra configuración
+# Sesiones en UTC: los timestamps llegan al ORM (y de ahí a Pydantic)
+# con huso UTC, igual que los que arma el SQL de SQL_JSON_RENDERING
+_UTC_SESSION = "-c timezone=UTC"
+
 engine = create_engine(
     settings.COMPONENTS_DATABASE_URL,
-    pool_pre_ping=True # Recomendado para manejar reconexiones
+    pool_pre_ping=True, # Recomendado para manejar reconexiones
+    poolclass=TimedQueuePool, # Mide la espera por conexión (ver /metrics)
+    connect_args={"options": _UTC_SESSION}
 )
+# Conteo y tiempo de SQL por petición
+instrument_engine(engine)
 
 # 2. Crear una clase de Sesión (SessionLocal)
 # Esta será la que usaremos para cada transacción en la base de datos
@@ -34,6 +47,116 @@ def get_db():
     finally:
         db.close()
 
+# Igual que get_db, pero para código fuera de una petición
+# (ej. recálculos de caché en segundo plano)
+@contextmanager
+def session_scope():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# --- Réplica de lectura (opcional) ---
+# Las escrituras (reseñas, scraper) siempre usan 'engine' (primaria).
+# Las lecturas de los GET usan read_session_scope: réplica si existe y
+# está al día; si no, la primaria.
+replica_engine = None
+ReplicaSessionLocal = None
+if settings.COMPONENTS_REPLICA_DATABASE_URL:
+    replica_engine = create_engine(
+        settings.COMPONENTS_REPLICA_DATABASE_URL,
+        pool_pre_ping=True,
+        poolclass=TimedQueuePool,
+        # Si la réplica no responde, caer rápido a la primaria
+        connect_args={"connect_timeout": 2, "options": _UTC_SESSION}
+    )
+    instrument_engine(replica_engine, name="replica")
+    ReplicaSessionLocal = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=replica_engine
+    )
+
+# Segundos de retraso de la réplica (0 si no hay nada pendiente de
+# aplicar; en una primaria, pg_last_wal_receive_lsn() es NULL -> 0)
+_REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+_replica_state = {"checked_at": float("-inf"), "healthy": False, "lag_seconds": None}
+_replica_lock = threading.Lock()
+
+
+def replica_status() -> dict:
+    return {
+        "configured": replica_engine is not None,
+        "healthy": _replica_state["healthy"],
+        "lag_seconds": _replica_state["lag_seconds"],
+    }
+
+
+def _replica_is_usable() -> bool:
+    """
+    ¿La réplica responde y su retraso está dentro de
+    REPLICA_MAX_LAG_SECONDS? Se mide como mucho cada
+    REPLICA_LAG_CHECK_SECONDS; mientras un hilo mide, los demás usan
+    el último resultado.
+    """
+    if time.monotonic() - _replica_state["checked_at"] < settings.REPLICA_LAG_CHECK_SECONDS:
+        return _replica_state["healthy"]
+    if not _replica_lock.acquire(blocking=False):
+        return _replica_state["healthy"]
+    try:
+        try:
+            with replica_engine.connect() as conn:
+                lag = float(conn.execute(_REPLICA_LAG_SQL).scalar() or 0)
+            healthy = lag <= settings.REPLICA_MAX_LAG_SECONDS
+        except Exception as e:
+            lag, healthy = None, False
+            if _replica_state["healthy"]:
+                print(f"Réplica no disponible, leyendo de la primaria: {e}")
+        if healthy != _replica_state["healthy"]:
+            print(f"Réplica {'en uso' if healthy else 'descartada'} (retraso: {lag}s)")
+        _replica_state.update(checked_at=time.monotonic(), healthy=healthy, lag_seconds=lag)
+        return healthy
+    finally:
+        _replica_lock.release()
+
+
+def _mark_replica_down(error: Exception):
+    # No se pudo conectar: descartada hasta la próxima medición
+    if _replica_state["healthy"]:
+        print(f"Réplica no disponible, leyendo de la primaria: {error}")
+    _replica_state.update(checked_at=time.monotonic(), healthy=False, lag_seconds=None)
+
+
+@contextmanager
+def read_session_scope(use_primary: bool = False):
+    """
+    Sesión para LECTURAS: réplica si está configurada y al día, salvo
+    que 'use_primary' (read-your-writes, ver services/read_routing).
+    La conexión a la réplica se toma al entrar: si se cayó desde la
+    última medición, la lectura va a la primaria en lugar de fallar.
+    """
+    if use_primary or ReplicaSessionLocal is None or not _replica_is_usable():
+        db = SessionLocal()
+    else:
+        db = ReplicaSessionLocal()
+        try:
+            db.connection()
+        except OperationalError as e:
+            db.close()
+            _mark_replica_down(e)
+            db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 # 5. Función de inicialización (para crear tablas)
 def init_db():
     """
@@ -41,5 +164,181 @@ def init_db():
     Esto se llama al iniciar la aplicación en main.py
     """
     # Importamos todos los modelos aquí para que 'Base' los conozca
-    from app.models import component, offer, review, comment
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    from app.models import component, offer, review, comment, component_alternatives, offer_archive, price_stats, catalog_change
+    # Todo en UNA transacción con un advisory lock: cada worker de uvicorn
+    # llama a init_db al arrancar; el primero aplica los cambios y los
+    # demás esperan y solo encuentran sentencias que ya no hacen nada
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _SCHEMA_LOCK_KEY})
+        # Antes de create_all: idx_components_name_trgm usa gin_trgm_ops
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        Base.metadata.create_all(bind=conn)
+        upgrade_schema(conn)
+
+
+# Clave del advisory lock de init_db (cualquier bigint fijo)
+_SCHEMA_LOCK_KEY = 727_001
+
+
+# 6. Cambios de esquema sobre tablas YA existentes
+# 'create_all' solo crea tablas nuevas: no añade columnas ni índices
+# a tablas que ya existen. Estas sentencias son idempotentes.
+SCHEMA_UPGRADES = [
+    # Índices de detalle/reseñas paginadas
+    "CREATE INDEX IF NOT EXISTS idx_reviews_component_created ON reviews (component_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_comments_review_id ON comments (review_id)",
+    # Agregados de rating en 'components'
+    "ALTER TABLE components ADD COLUMN IF NOT EXISTS rating_sum INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE components ADD COLUMN IF NOT EXISTS rating_count INTEGER NOT NULL DEFAULT 0",
+    # Versión de catálogo (delta-sync)
+    "CREATE SEQUENCE IF NOT EXISTS catalog_version_seq",
+    "ALTER TABLE components ADD COLUMN IF NOT EXISTS catalog_version BIGINT NOT NULL DEFAULT nextval('catalog_version_seq')",
+    "CREATE INDEX IF NOT EXISTS ix_components_catalog_version ON components (catalog_version)",
+    # Ahora la asigna el publicador (0 = todavía sin publicar)
+    "ALTER TABLE components ALTER COLUMN catalog_version SET DEFAULT 0",
+    # Filtros de categoría/marca sin distinguir mayúsculas
+    "CREATE INDEX IF NOT EXISTS idx_components_category_lower ON components (lower(category))",
+    "CREATE INDEX IF NOT EXISTS idx_components_brand_lower ON components (lower(brand))",
+    """
+    CREATE INDEX IF NOT EXISTS idx_components_avg_rating
+    ON components ((CAST(rating_sum AS FLOAT) / NULLIF(rating_count, 0)) DESC NULLS LAST)
+    """,
+    # Limpieza de ofertas viejas (ver services/offer_sweeper)
+    "CREATE INDEX IF NOT EXISTS idx_offers_last_updated ON offers (last_updated)",
+    # Búsqueda por nombre (ILIKE) con trigramas; el GIN anterior no la servía
+    "CREATE INDEX IF NOT EXISTS idx_components_name_trgm ON components USING gin (name gin_trgm_ops)",
+    "DROP INDEX IF EXISTS idx_components_name_search",
+    # Una oferta por tienda (si la constraint ya existe, su índice tiene este nombre)
+    "CREATE UNIQUE INDEX IF NOT EXISTS unique_offer_per_store ON offers (component_id, store)",
+]
+
+# Registro de cambios del catálogo ('catalog_changes', delta-sync).
+# Triggers POR SENTENCIA con tablas de transición (un COPY o un lote
+# del sweeper es un solo INSERT ... SELECT, no uno por fila). Cubren
+# cualquier camino de escritura: scraper, reseñas, sweeper, borrados
+# en cascada o SQL a mano. Borrar un componente deja una lápida.
+# Solo cuentan las columnas visibles en la card: el UPDATE de
+# 'catalog_version' que hace el publicador no vuelve a registrar nada.
+# Postgres no admite tablas de transición en triggers de varios
+# eventos: un trigger por evento, con la misma función.
+CATALOG_CHANGE_TRIGGERS = [
+    """
+    CREATE OR REPLACE FUNCTION log_component_changes() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO catalog_changes (component_id) SELECT id FROM new_rows;
+        ELSIF TG_OP = 'UPDATE' THEN
+            INSERT INTO catalog_changes (component_id)
+            SELECT n.id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.name, n.category, n.brand, n.image_url, n.rating_sum, n.rating_count)
+                IS DISTINCT FROM (o.name, o.category, o.brand, o.image_url, o.rating_sum, o.rating_count);
+        ELSE
+            INSERT INTO catalog_changes (component_id, deleted) SELECT id, true FROM old_rows;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION log_offer_changes() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO catalog_changes (component_id) SELECT DISTINCT component_id FROM new_rows;
+        ELSIF TG_OP = 'UPDATE' THEN
+            -- Solo si cambia la mejor oferta posible (no el 'last_updated'
+            -- que el scraper renueva en cada pasada)
+            INSERT INTO catalog_changes (component_id)
+            SELECT n.component_id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.component_id, n.store, n.price, n.link)
+                IS DISTINCT FROM (o.component_id, o.store, o.price, o.link)
+            UNION
+            SELECT o.component_id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE n.component_id <> o.component_id;
+        ELSE
+            INSERT INTO catalog_changes (component_id) SELECT DISTINCT component_id FROM old_rows;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS components_log_insert ON components",
+    "DROP TRIGGER IF EXISTS components_log_update ON components",
+    "DROP TRIGGER IF EXISTS components_log_delete ON components",
+    """
+    CREATE TRIGGER components_log_insert AFTER INSERT ON components
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_component_changes()
+    """,
+    """
+    CREATE TRIGGER components_log_update AFTER UPDATE ON components
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_component_changes()
+    """,
+    """
+    CREATE TRIGGER components_log_delete AFTER DELETE ON components
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_component_changes()
+    """,
+    "DROP TRIGGER IF EXISTS offers_log_insert ON offers",
+    "DROP TRIGGER IF EXISTS offers_log_update ON offers",
+    "DROP TRIGGER IF EXISTS offers_log_delete ON offers",
+    """
+    CREATE TRIGGER offers_log_insert AFTER INSERT ON offers
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_offer_changes()
+    """,
+    """
+    CREATE TRIGGER offers_log_update AFTER UPDATE ON offers
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_offer_changes()
+    """,
+    """
+    CREATE TRIGGER offers_log_delete AFTER DELETE ON offers
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_offer_changes()
+    """,
+]
+
+# 7. Migraciones de datos que se aplican UNA sola vez (no son baratas
+# de repetir en cada arranque). Se registran en 'schema_migrations'.
+# El nombre no se cambia nunca; las nuevas se agregan al final.
+# Recalcula rating_sum / rating_count desde 'reviews' (agregado completo:
+# también lo usa benchmarks/generate_data después de cargar con COPY)
+BACKFILL_RATING_AGGREGATES_SQL = """
+    UPDATE components c
+    SET rating_sum = s.rating_sum, rating_count = s.rating_count
+    FROM (
+        SELECT component_id, SUM(rating) AS rating_sum, COUNT(*) AS rating_count
+        FROM reviews GROUP BY component_id
+    ) s
+    WHERE c.id = s.component_id
+      AND (c.rating_sum <> s.rating_sum OR c.rating_count <> s.rating_count)
+"""
+
+DATA_MIGRATIONS = [
+    # Rellena los agregados de rating de las reseñas que ya existían
+    ("0001_backfill_rating_aggregates", BACKFILL_RATING_AGGREGATES_SQL),
+]
+
+def upgrade_schema(conn):
+    """
+    Aplica SCHEMA_UPGRADES y CATALOG_CHANGE_TRIGGERS (idempotentes) y
+    las DATA_MIGRATIONS que falten, dentro de la transacción (y el
+    lock) de init_db.
+    """
+    for stmt in SCHEMA_UPGRADES + CATALOG_CHANGE_TRIGGERS:
+        conn.execute(text(stmt))
+
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name TEXT PRIMARY KEY,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """))
+    applied = set(conn.execute(text("SELECT name FROM schema_migrations")).scalars())
+    for name, stmt in DATA_MIGRATIONS:
+        if name in applied:
+            continue
+        conn.execute(text(stmt))
+        conn.execute(text("INSERT INTO schema_migrations (name) VALUES (:name)"), {"name": name})
+        print(f"Migración aplicada: {name}")
\ No newline at end of file
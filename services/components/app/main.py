@@ -1,9 +1,17 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+import time
+import orjson
 from app.core.config import settings
-from app.db.session import init_db
+from app.db.session import init_db, replica_status
 from app.api.v1.api import api_router 
-from app.services.cache_service import init_redis, close_redis
+from app.services.cache_service import init_redis, close_redis, get_cache_stats
+from app.services.suggest_index import start_suggest_index, stop_suggest_index
+from app.services.offer_sweeper import start_offer_sweeper, stop_offer_sweeper, get_sweeper_status
+from app.services.catalog_publisher import start_catalog_publisher, stop_catalog_publisher
+from app.services.metrics import (
+    start_request, end_request, observe_request, render_metrics, CONTENT_TYPE_LATEST
+)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -19,17 +27,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Instrumentación por petición (ver app/services/metrics.py) ---
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    token = start_request()
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        stats = end_request(token)
+    elapsed = time.perf_counter() - start
+
+    # Plantilla de la ruta (ej. /api/v1/components/{component_id}), no
+    # la URL: así las etiquetas de Prometheus no crecen sin límite
+    route = request.scope.get("route")
+    route_path = getattr(route, "path", "unmatched")
+    observe_request(route_path, request.method, response.status_code, elapsed, stats)
+
+    if settings.DEBUG_TIMING_ENABLED and request.headers.get("x-debug-timing") == "1" and stats is not None:
+        breakdown = stats.breakdown(elapsed)
+        response.headers["X-Debug-Timing"] = orjson.dumps(breakdown).decode("utf-8")
+        response.headers["Server-Timing"] = ", ".join(
+            f"{name};dur={breakdown[f'{name}_ms']}"
+            for name in ("db", "redis", "serialize", "orm_python", "total")
+        )
+    return response
+
 # --- Eventos de Ciclo de Vida ---
 @app.on_event("startup")
 async def startup_event():
     print("Iniciando servicio...")
     init_db() 
     await init_redis() 
+    await start_suggest_index()
+    await start_offer_sweeper()
+    await start_catalog_publisher()
     print("¡Servicio listo!")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     print("Cerrando servicio...")
+    await stop_suggest_index()
+    await stop_offer_sweeper()
+    await stop_catalog_publisher()
     await close_redis() 
     print("¡Servicio cerrado!")
 
@@ -46,4 +86,18 @@ async def read_root():
 
 @app.get("/health", tags=["Health Check"])
 async def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    # Estado de la réplica de lectura (si hay): se actualiza al leer
+    return {"status": "ok", "replica": replica_status(), "offer_sweeper": get_sweeper_status()}
+
+@app.get("/metrics", tags=["Health Check"], include_in_schema=False)
+async def metrics():
+    # Formato de texto de Prometheus (métricas de ESTE worker)
+    body = render_metrics()
+    if body is None:
+        return Response(content="prometheus_client no está instalado\n", status_code=503)
+    return Response(content=body, media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/cache/stats", tags=["Health Check"])
+async def cache_stats():
+    # Ratios de acierto de la caché (memoria del worker y Redis)
+    return get_cache_stats()
\ No newline at end of file
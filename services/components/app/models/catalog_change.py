@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, BigInteger, Boolean, DateTime, Index, func, text
+from app.db.session import Base
+
+class CatalogChange(Base):
+    """
+    Registro de cambios del catálogo (delta-sync), escrito por triggers
+    sobre 'components' y 'offers' (ver CATALOG_CHANGE_TRIGGERS en
+    db/session.py). Las filas nacen SIN versión; el publicador
+    (services/catalog_publisher) se la asigna cuando ya están
+    confirmadas, en orden de publicación.
+    """
+    __tablename__ = "catalog_changes"
+
+    id = Column(BigInteger, primary_key=True)
+    # Sin FK: la lápida (deleted) sobrevive al componente borrado
+    component_id = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False, server_default="false")
+    # NULL = pendiente de publicar
+    version = Column(BigInteger)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Cola de pendientes (el publicador las toma por id)
+        Index("ix_catalog_changes_pending", "id", postgresql_where=text("version IS NULL")),
+        # Lápidas por versión (GET /components/changes)
+        Index("ix_catalog_changes_tombstones", "version", postgresql_where=text("deleted")),
+    )
@@ -19,7 +19,8 @@ class Comment(Base):
     review_id = Column(
         Integer, 
         ForeignKey("reviews.id", ondelete="CASCADE"), 
-        nullable=False
+        nullable=False,
+        index=True # Carga 'selectin' (review_id IN ...) y conteo por reseña
     )
     
     # --- Relación ---
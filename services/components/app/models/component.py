@@ -1,7 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, func, Index
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Float, Sequence, func, cast, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.hybrid import hybrid_property
 from app.db.session import Base
 
+# Versión monotónica del catálogo (delta-sync de clientes móviles).
+# Solo la toma services/catalog_publisher, en orden de publicación
+# (no al escribir: un nextval en el UPDATE se confirma fuera de orden).
+catalog_version_seq = Sequence("catalog_version_seq", metadata=Base.metadata)
+
 class Component(Base):
     __tablename__ = "components"
 
@@ -11,6 +17,21 @@ class Component(Base):
     brand = Column(String(100), index=True)
     image_url = Column(Text)
     description = Column(Text)
+
+    # --- Agregados de reseñas (mantenidos por crud_review) ---
+    # Evitan recalcular avg/count en cada detalle y permiten
+    # ordenar/filtrar la lista por rating con un índice.
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Ver catalog_version_seq (GET /components/changes?since=...).
+    # 0 = componente nuevo que el publicador aún no versionó
+    catalog_version = Column(
+        BigInteger,
+        nullable=False,
+        server_default="0",
+        index=True
+    )
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -18,10 +39,12 @@ class Component(Base):
     # --- Relaciones (La magia de SQLAlchemy) ---
     
     # Un 'Component' tiene muchas 'Offers'
+    # (ordenadas por precio, igual que el detalle en SQL_JSON_RENDERING)
     offers = relationship(
         "Offer", 
         back_populates="component", 
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        order_by="[Offer.price, Offer.id]"
     )
     
     # Un 'Component' tiene muchas 'Reviews'
@@ -31,7 +54,35 @@ class Component(Base):
         cascade="all, delete-orphan"
     )
     
+    @hybrid_property
+    def average_rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @average_rating.expression
+    def average_rating(cls):
+        return cast(cls.rating_sum, Float) / func.nullif(cls.rating_count, 0)
+
     # --- Índices (copiados de nuestro SQL) ---
+    # Búsqueda por nombre (name ILIKE '%...%'): GIN de trigramas
+    # (extensión pg_trgm, ver init_db). Un GIN simple sobre 'name' no
+    # sirve para ILIKE. Ver benchmarks/check_query_plans.py
     __table_args__ = (
-        Index('idx_components_name_search', 'name', postgresql_using='gin'),
-    )
\ No newline at end of file
+        Index(
+            'idx_components_name_trgm', 'name',
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'}
+        ),
+    )
+
+# Filtros de categoría/marca sin distinguir mayúsculas
+Index('idx_components_category_lower', func.lower(Component.category))
+Index('idx_components_brand_lower', func.lower(Component.brand))
+
+# Índice de expresión para sort_by=rating y min_rating
+# (debe coincidir EXACTAMENTE con la expresión usada en crud_component)
+Index(
+    'idx_components_avg_rating',
+    Component.average_rating.desc().nullslast()
+)
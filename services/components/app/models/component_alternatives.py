@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+from app.db.session import Base
+
+class ComponentAlternatives(Base):
+    __tablename__ = "component_alternatives"
+
+    # Una fila por componente: GET /components/{id}/alternatives es
+    # una sola búsqueda por clave primaria
+    component_id = Column(
+        Integer,
+        ForeignKey("components.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+
+    # Vecinos ya serializados (lista de ComponentAlternative), calculados
+    # en lote por app.services.alternatives_index después de cada scraping
+    items = Column(JSONB, nullable=False)
+
+    built_at = Column(DateTime(timezone=True), server_default=func.now())
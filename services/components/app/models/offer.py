@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Numeric, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, Numeric, ForeignKey, DateTime, func, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -20,4 +20,10 @@ class Offer(Base):
     
     # --- Relación ---
     # Una 'Offer' pertenece a un 'Component'
-    component = relationship("Component", back_populates="offers")
\ No newline at end of file
+    component = relationship("Component", back_populates="offers")
+
+    __table_args__ = (
+        # Una oferta por tienda (ON CONFLICT de crud_scraper.upsert_offer).
+        # También sirve las búsquedas por component_id (detalle, mejor oferta)
+        UniqueConstraint('component_id', 'store', name='unique_offer_per_store'),
+    )
\ No newline at end of file
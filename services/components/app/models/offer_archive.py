@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, Numeric, ForeignKey, DateTime, func
+from app.db.session import Base
+
+class OfferArchive(Base):
+    __tablename__ = "offers_archive"
+
+    # Mismo id que tenía en 'offers' (los ids no se reutilizan)
+    id = Column(Integer, primary_key=True)
+    store = Column(String(100), nullable=False)
+    price = Column(Numeric(10, 2), nullable=False)
+    link = Column(Text, nullable=False)
+    last_updated = Column(DateTime(timezone=True))
+
+    component_id = Column(
+        Integer,
+        ForeignKey("components.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+
+    # Cuándo la movió services/offer_sweeper fuera de 'offers'
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
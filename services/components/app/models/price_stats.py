@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, func
+from app.db.session import Base
+
+class PriceStats(Base):
+    __tablename__ = "price_stats"
+
+    # Categoría y marca en minúsculas; brand = '' es la categoría completa
+    category = Column(String(100), primary_key=True)
+    brand = Column(String(100), primary_key=True, default="")
+
+    # Componentes (con oferta) en la muestra
+    sample_size = Column(Integer, nullable=False)
+
+    # Percentiles de la mejor oferta de cada componente
+    p10 = Column(Numeric(10, 2), nullable=False)
+    p25 = Column(Numeric(10, 2), nullable=False)
+    p50 = Column(Numeric(10, 2), nullable=False)
+    p75 = Column(Numeric(10, 2), nullable=False)
+    p90 = Column(Numeric(10, 2), nullable=False)
+
+    built_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, SmallInteger, ForeignKey, DateTime, func, CheckConstraint
+from sqlalchemy import Column, Integer, String, Text, SmallInteger, ForeignKey, DateTime, func, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -29,12 +29,16 @@ class Review(Base):
     component = relationship("Component", back_populates="reviews")
     
     # Una 'Review' tiene muchos 'Comments'
+    # (de la más vieja a la más nueva, igual que el detalle en SQL_JSON_RENDERING)
     comments = relationship(
         "Comment", 
         back_populates="review", 
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        order_by="[Comment.created_at, Comment.id]"
     )
     
     __table_args__ = (
         CheckConstraint('rating >= 1 AND rating <= 5', name='check_rating_range'),
+        # Reseñas más recientes de un componente (detalle y paginado)
+        Index('idx_reviews_component_created', 'component_id', 'created_at'),
     )
\ No newline at end of file
@@ -1,7 +1,7 @@
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, HttpUrl, Field
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from .offer import OfferRead
 from .review import ReviewRead
 
@@ -28,6 +28,14 @@ class ComponentCard(ComponentBase):
     store: Optional[str] = None
     link: Optional[HttpUrl] = None
 
+    # Rating agregado (rating_sum / rating_count en 'components')
+    average_rating: Optional[float] = None
+    review_count: int = 0
+
+    # Qué tan buena es la oferta frente a su categoría/marca, de 0 a 1
+    # (1 = más barata que casi todas). Ver services/price_stats
+    deal_score: Optional[float] = None
+
     class Config:
         from_attributes = True
 
@@ -50,4 +58,89 @@ class ComponentDetail(ComponentBase):
     # --- FIN DE CORRECCIÓN! ---
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# --- Schemas de Consulta en Bloque (POST /components/batch) ---
+# Límite de IDs por petición
+BATCH_MAX_IDS = 300
+
+class ComponentBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=BATCH_MAX_IDS)
+    # Proyección opcional de campos de ComponentDetail (ej. ["id", "name", "category"]).
+    # Si no incluye 'offers' ni 'reviews', no se cargan de la DB.
+    fields: Optional[List[str]] = None
+
+class ComponentBatchResponse(BaseModel):
+    # ComponentDetail completos, o solo los campos pedidos en 'fields'
+    items: List[Dict[str, Any]]
+    # IDs que no existen
+    missing: List[int]
+
+
+# --- Schemas de Facetas (GET /components/facets) ---
+# Para el panel de filtros de components_page.dart
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class PriceBucket(BaseModel):
+    min_price: Decimal
+    max_price: Decimal
+    count: int
+
+class ComponentFacets(BaseModel):
+    # Componentes que cumplen TODOS los filtros
+    total_items: int
+    categories: List[FacetCount] = []
+    brands: List[FacetCount] = []
+    price_min: Optional[Decimal] = None
+    price_max: Optional[Decimal] = None
+    price_histogram: List[PriceBucket] = []
+
+
+# --- Schemas de Sincronización del Catálogo (clientes móviles) ---
+# GET /components/snapshot: catálogo completo en una versión
+class CatalogSnapshot(BaseModel):
+    version: int
+    items: List[ComponentCard]
+
+# GET /components/changes?since=N: solo lo que cambió desde N
+class CatalogChanges(BaseModel):
+    since: int
+    # Versión a enviar como 'since' en la siguiente llamada
+    version: int
+    has_more: bool
+    items: List[ComponentCard]
+    # Ids borrados desde 'since' (lápidas): el cliente los quita
+    removed: List[int] = []
+
+
+# --- Schema de Sugerencias (GET /components/suggest) ---
+class ComponentSuggestion(BaseModel):
+    id: int
+    name: str
+    category: str
+    brand: Optional[str] = None
+
+
+# --- Schema de Alternativas (GET /components/{id}/alternatives) ---
+# Vecinos más cercanos precalculados (misma categoría)
+class ComponentAlternative(ComponentCard):
+    # Similitud combinada (nombre, precio y specs), de 0 a 1
+    similarity: float
+    # Su mejor oferta es más barata que la del componente consultado
+    cheaper: bool = False
+
+
+# --- Schema de Estadísticas de Precio (GET /components/price-stats) ---
+# Distribución de la mejor oferta por categoría (brand = None) y por
+# categoría + marca; base del 'deal_score' de cada card
+class PriceStatsRead(BaseModel):
+    category: str
+    brand: Optional[str] = None
+    sample_size: int
+    p10: Decimal
+    p25: Decimal
+    median: Decimal
+    p75: Decimal
+    p90: Decimal
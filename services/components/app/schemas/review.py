@@ -11,6 +11,13 @@ class ReviewCreate(BaseModel):
     title: constr(max_length=255) | None = None
     content: str
 
+# --- Schema de Edición de Reseña ---
+# Todos los campos son opcionales (solo se actualiza lo enviado)
+class ReviewUpdate(BaseModel):
+    rating: conint(ge=1, le=5) | None = None
+    title: constr(max_length=255) | None = None
+    content: str | None = None
+
 # --- Schema de Lectura de Reseña (MODIFICADO) ---
 class ReviewRead(BaseModel):
     id: int
@@ -38,4 +45,29 @@ class ReviewRead(BaseModel):
     
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# --- Schema de Resumen de Reseña ---
+# Para el listado paginado (GET /components/{id}/reviews):
+# no incrusta los comentarios, solo su conteo.
+class ReviewSummary(BaseModel):
+    id: int
+    rating: int
+    title: str | None
+    content: str
+    created_at: datetime
+    comment_count: int = 0
+
+    user_id: str
+    user_username: str | None
+
+    @computed_field
+    @property
+    def user(self) -> UserInfo:
+        return UserInfo(
+            user_id=self.user_id,
+            user_username=self.user_username
+        )
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,220 @@
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_component
+from app.models.component_alternatives import ComponentAlternatives
+from app.schemas.component import ComponentCard
+
+# --- Vectorización de nombres (opcional, igual que en el scraper) ---
+try:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+# -------------------------------------------------------------------
+# Índice de alternativas (vecinos más cercanos), calculado en lote
+# -------------------------------------------------------------------
+# Por cada componente, los top-k más parecidos de SU categoría según:
+#   - nombre: TF-IDF de n-gramas de caracteres (coseno)
+#   - precio: cercanía en escala logarítmica de la mejor oferta
+#   - specs extraídas del nombre (GB, MHz, W, núcleos)
+# Se guarda una fila por componente en 'component_alternatives'; la API
+# solo hace una búsqueda por clave primaria.
+
+_W_NAME, _W_PRICE, _W_SPECS = 0.6, 0.25, 0.15
+# exp(-|Δ log(precio)| / escala): ~0.37 cuando un precio es ~1.65x el otro
+_PRICE_SCALE = 0.5
+# Filas de la matriz de similitud calculadas a la vez (memoria acotada)
+_BLOCK_ROWS = 256
+# Candidatos por componente: los más parecidos por NOMBRE (el producto
+# TF-IDF queda disperso y solo estos pasan al puntaje con precio/specs)
+_NAME_CANDIDATES = 64
+
+_SPEC_PATTERNS = (
+    # (regex, multiplicador por unidad) -> valor en GB / MHz / W / núcleos
+    (re.compile(r"(\d+(?:\.\d+)?)\s*(tb|gb)\b"), {"tb": 1024.0, "gb": 1.0}),
+    (re.compile(r"(\d+(?:\.\d+)?)\s*(ghz|mhz)\b"), {"ghz": 1000.0, "mhz": 1.0}),
+    (re.compile(r"(\d{2,4})\s*(w)\b"), {"w": 1.0}),
+    (re.compile(r"(\d{1,3})\s*(cores|core|nucleos|núcleos)\b"), {"cores": 1.0, "core": 1.0, "nucleos": 1.0, "núcleos": 1.0}),
+)
+
+
+def extract_specs(name: str) -> List[float]:
+    """
+    Specs numéricas del nombre (NaN si no aparece): el mayor valor
+    de cada unidad, ej. "32GB (2x16GB) DDR5 6000MHz" -> [32, 6000, NaN, NaN].
+    """
+    text = (name or "").lower()
+    values = []
+    for pattern, units in _SPEC_PATTERNS:
+        found = [float(number) * units[unit] for number, unit in pattern.findall(text)]
+        values.append(max(found) if found else np.nan)
+    return values
+
+
+def _name_candidates(block, self_offset: int, has_price: np.ndarray, c: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    De cada fila del producto disperso (CSR), las 'c' columnas con más
+    similitud de nombre (sin el propio componente ni los que no tienen
+    oferta). Devuelve (columnas, similitudes); -1 = hueco.
+    """
+    rows = block.shape[0]
+    columns = np.full((rows, c), -1, dtype=np.int64)
+    sims = np.zeros((rows, c), dtype=np.float32)
+    for row in range(rows):
+        lo, hi = block.indptr[row], block.indptr[row + 1]
+        cols = block.indices[lo:hi]
+        vals = block.data[lo:hi]
+        keep = has_price[cols] & (cols != self_offset + row)
+        cols, vals = cols[keep], vals[keep]
+        if len(cols) > c:
+            best = np.argpartition(-vals, c - 1)[:c]
+            cols, vals = cols[best], vals[best]
+        columns[row, :len(cols)] = cols
+        sims[row, :len(cols)] = vals
+    return columns, sims
+
+
+def compute_neighbours(cards: List[ComponentCard], top_k: int) -> Dict[int, List[Tuple[int, float]]]:
+    """
+    Posición en 'cards' -> [(posición del vecino, similitud)], ordenado
+    de mayor a menor similitud. Solo son candidatos los componentes de
+    la misma categoría con alguna oferta y algo de parecido en el
+    nombre (los _NAME_CANDIDATES más parecidos).
+    """
+    names = [c.name for c in cards]
+    vectorizer = TfidfVectorizer(
+        analyzer="char_wb",
+        ngram_range=(3, 4),
+        sublinear_tf=True,
+        dtype=np.float32
+    )
+    # Filas normalizadas (L2): el producto punto es el coseno
+    name_vectors = vectorizer.fit_transform(names).tocsr()
+
+    log_prices = np.log1p(np.array(
+        [float(c.price) if c.price is not None else np.nan for c in cards],
+        dtype=np.float32
+    ))
+    specs = np.log1p(np.array([extract_specs(n) for n in names], dtype=np.float32))
+
+    by_category: Dict[str, List[int]] = defaultdict(list)
+    for i, card in enumerate(cards):
+        by_category[card.category.lower()].append(i)
+
+    neighbours: Dict[int, List[Tuple[int, float]]] = {}
+    for positions in by_category.values():
+        idx = np.array(positions)
+        n = len(idx)
+        c = min(_NAME_CANDIDATES, n - 1)
+        k = min(top_k, c)
+        if k <= 0:
+            continue
+        vectors = name_vectors[idx]
+        vectors_t = vectors.T.tocsc()
+        prices = log_prices[idx]
+        category_specs = specs[idx]
+        has_price = ~np.isnan(prices)
+
+        for start in range(0, n, _BLOCK_ROWS):
+            stop = min(start + _BLOCK_ROWS, n)
+            # Producto disperso: nunca se arma la fila densa de n columnas
+            block = (vectors[start:stop] @ vectors_t).tocsr()
+            cand, name_sim = _name_candidates(block, start, has_price, c)
+            valid = cand >= 0
+            safe = np.where(valid, cand, 0)
+
+            with np.errstate(invalid="ignore"):
+                # Sin precio (de un lado u otro): similitud neutra
+                price_sim = np.exp(-np.abs(prices[start:stop, None] - prices[safe]) / _PRICE_SCALE)
+                price_sim = np.where(np.isnan(price_sim), np.float32(0.5), price_sim)
+
+                # Promedio sobre las specs que AMBOS tienen
+                diff = np.abs(category_specs[start:stop, None, :] - category_specs[safe])
+                both = ~np.isnan(diff)
+                spec_sum = np.where(both, np.exp(-diff), np.float32(0.0)).sum(axis=2)
+                spec_count = both.sum(axis=2)
+            has_specs = spec_count > 0
+            spec_sim = np.divide(
+                spec_sum, spec_count, out=np.zeros_like(spec_sum), where=has_specs
+            )
+
+            score = (_W_NAME * name_sim + _W_PRICE * price_sim + _W_SPECS * spec_sim) / (
+                _W_NAME + _W_PRICE + _W_SPECS * has_specs
+            )
+            score = np.where(valid, score, -np.inf).astype(np.float32)
+
+            top = np.argpartition(-score, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(score, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            top_columns = np.take_along_axis(cand, top, axis=1)
+
+            for row in range(stop - start):
+                neighbours[int(idx[start + row])] = [
+                    (int(idx[col]), float(s))
+                    for col, s in zip(top_columns[row], top_scores[row])
+                    if np.isfinite(s)
+                ]
+    return neighbours
+
+
+def build_alternatives_index(db: Session, top_k: Optional[int] = None) -> int:
+    """
+    Recalcula y guarda las alternativas de TODO el catálogo (se llama
+    después de cada scraping). Reemplaza la tabla en una transacción:
+    los lectores ven el índice anterior hasta el commit.
+    Devuelve cuántos componentes tienen alternativas.
+    """
+    if not SKLEARN_AVAILABLE:
+        print("scikit-learn no está instalado: no se calculan alternativas.")
+        return 0
+
+    top_k = top_k or settings.ALTERNATIVES_TOP_K
+    cards, _, _, _ = crud_component.get_catalog_cards(db)
+    if not cards:
+        return 0
+
+    neighbours = compute_neighbours(cards, top_k)
+
+    # Cada card se serializa una vez (mismo formato que la API)
+    card_json = [c.model_dump(mode="json") for c in cards]
+    rows = []
+    for i, items in neighbours.items():
+        if not items:
+            continue
+        price = cards[i].price
+        rows.append({
+            "component_id": cards[i].id,
+            "items": [
+                {
+                    **card_json[j],
+                    "similarity": round(score, 4),
+                    "cheaper": price is not None and cards[j].price < price
+                }
+                for j, score in items
+            ]
+        })
+
+    db.query(ComponentAlternatives).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(ComponentAlternatives), rows)
+    db.commit()
+    return len(rows)
+
+
+if __name__ == "__main__":
+    # Recalcular a mano: python -m app.services.alternatives_index
+    from app.db.session import session_scope
+
+    with session_scope() as session:
+        total = build_alternatives_index(session)
+    print(f"Alternativas calculadas para {total} componentes.")
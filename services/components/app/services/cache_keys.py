@@ -0,0 +1,118 @@
+import json
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional, Tuple
+
+# --- Canonicalización de parámetros de la lista de componentes ---
+# Peticiones equivalentes (cat=cpu / cat=CPU, search=" rtx " / "rtx",
+# min_price=0 / sin min_price, 100 / 100.00) deben compartir la misma
+# entrada de caché. Los valores canónicos son TAMBIÉN los que se usan
+# en la consulta, así la clave nunca mezcla resultados distintos.
+
+LIST_SORT_OPTIONS = ("price_asc", "price_desc", "rating")
+DEFAULT_LIST_SORT = "price_asc"
+
+
+def _clean_text(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    value = " ".join(value.split()).lower()
+    return value or None
+
+
+def _clean_price(value: Optional[float]) -> Optional[Decimal]:
+    # Los precios son Numeric(10, 2): redondeamos a centavos
+    if value is None:
+        return None
+    try:
+        return Decimal(str(value)).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        return None
+
+
+def _clean_min_price(value: Optional[float]) -> Optional[Decimal]:
+    # Mínimo 0 o negativo equivale a "sin filtro" (no hay precios negativos)
+    price = _clean_price(value)
+    return price if price is not None and price > 0 else None
+
+
+def _clean_rating(value: Optional[float]) -> Optional[float]:
+    # Sin redondear: el filtro usa el valor tal cual (4.25 no es 4.2).
+    # Como float, 4 y 4.0 dan la misma clave
+    if value is None:
+        return None
+    return float(value)
+
+
+def canonicalize_list_params(
+    page: int = 1,
+    page_size: int = 20,
+    category: Optional[str] = None,
+    brand: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    search: Optional[str] = None,
+    sort_by: Optional[str] = DEFAULT_LIST_SORT,
+    min_rating: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Normaliza los filtros de GET /components (minúsculas, espacios,
+    formato numérico y valores por defecto).
+    """
+    sort_by = _clean_text(sort_by)
+    if sort_by not in LIST_SORT_OPTIONS:
+        sort_by = DEFAULT_LIST_SORT
+
+    return {
+        "page": int(page),
+        "page_size": int(page_size),
+        "category": _clean_text(category),
+        "brand": _clean_text(brand),
+        "min_price": _clean_min_price(min_price),
+        "max_price": _clean_price(max_price),
+        "search": _clean_text(search),
+        "sort_by": sort_by,
+        "min_rating": _clean_rating(min_rating),
+    }
+
+
+def list_cache_suffix(params: Dict[str, Any]) -> str:
+    """
+    Sufijo de clave estable para unos parámetros ya canonicalizados
+    (orden fijo de campos; None se escribe como cadena vacía).
+    """
+    return ":".join(
+        f"{name}={'' if params[name] is None else params[name]}"
+        for name in sorted(params)
+    )
+
+
+# --- Claves lógicas (sin generación) para contar popularidad ---
+# Se guardan en cache_service.HOT_KEYS_ZSET y el pre-calentamiento las
+# vuelve a convertir en parámetros: por eso son JSON y no el sufijo
+# (una búsqueda puede contener ':' o '=').
+HOT_LIST = "list"
+HOT_DETAIL = "detail"
+
+
+def list_hot_key(params: Dict[str, Any]) -> str:
+    return f"{HOT_LIST}:" + json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def detail_hot_key(component_id: int) -> str:
+    return f"{HOT_DETAIL}:{component_id}"
+
+
+def parse_hot_key(member: str) -> Optional[Tuple[str, Any]]:
+    """
+    ('list', params canonicalizados) o ('detail', id); None si no se
+    reconoce (ej. un formato anterior).
+    """
+    kind, _, payload = member.partition(":")
+    try:
+        if kind == HOT_LIST:
+            return kind, canonicalize_list_params(**json.loads(payload))
+        if kind == HOT_DETAIL:
+            return kind, int(payload)
+    except (ValueError, TypeError):
+        return None
+    return None
@@ -1,12 +1,65 @@
 import redis.asyncio as redis
 from redis.asyncio import Redis
-from typing import Optional, Any
-import json
+from redis.exceptions import LockError
+from typing import Optional, Any, Awaitable, Callable, Dict, Iterable, List, Tuple
+import asyncio
+import hashlib
+import struct
+import time
+import orjson
 from app.core.config import settings
+from app.services.local_cache import LocalLRUCache
+from app.services.metrics import track
 from pydantic import BaseModel
 
+# --- Compresión opcional (zstd) ---
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
 _redis_client: Optional[Redis] = None
 
+# Prefijo de 1 byte en cada payload "raw" para saber cómo decodificarlo
+_RAW_TAG = b"r"
+_ZSTD_TAG = b"z"
+_NEGATIVE_TAG = b"n" # "No encontrado" cacheado (sin datos)
+_GZIP_MAGIC = b"\x1f\x8b"
+
+_zstd_compressor = zstandard.ZstdCompressor(level=3) if ZSTD_AVAILABLE else None
+_zstd_decompressor = zstandard.ZstdDecompressor() if ZSTD_AVAILABLE else None
+
+# --- Nivel 1: caché en memoria de ESTE worker ---
+# Guarda (body, fresh_until) ya decodificados. Su TTL corto acota la
+# incoherencia si se pierde un mensaje de invalidación.
+_local_cache = LocalLRUCache(
+    max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+    ttl_seconds=settings.CACHE_LOCAL_TTL_SECONDS
+)
+# Generaciones de namespace conocidas por el worker: ns -> (gen, leída_en)
+_local_generations: Dict[str, Tuple[int, float]] = {}
+
+# Canal pub/sub por el que todos los workers reciben invalidaciones
+INVALIDATION_CHANNEL = "cache_invalidation"
+_listener_task: Optional["asyncio.Task"] = None
+
+# --- Popularidad de entradas (para el pre-calentamiento) ---
+# ZSET en Redis: "clave lógica" (sin generación, ej. 'detail:42') ->
+# lecturas. Cada worker suma en memoria y vuelca con un pipeline cada
+# CACHE_HOT_FLUSH_SECONDS: leer la caché no agrega viajes a Redis.
+HOT_KEYS_ZSET = "cache_hot_keys"
+_hot_hits: Dict[str, int] = {}
+_hot_flush_task: Optional["asyncio.Task"] = None
+
+# Contadores de aciertos/fallos por nivel (ver get_cache_stats)
+_stats = {
+    "local_hits": 0,
+    "local_misses": 0,
+    "redis_hits": 0,
+    "redis_misses": 0,
+}
+
 async def init_redis():
     """
     Inicializa la conexión global a Redis.
@@ -16,8 +69,9 @@ async def init_redis():
         try:
             _redis_client = await redis.from_url(
                 settings.REDIS_URL,
-                encoding="utf-8",
-                decode_responses=True # Decodifica respuestas de bytes a str
+                # Sin decode_responses: las respuestas pre-serializadas
+                # se guardan y devuelven como bytes tal cual
+                decode_responses=False
             )
             await _redis_client.ping()
             print("Conectado a Redis exitosamente.")
@@ -25,10 +79,27 @@ async def init_redis():
             _redis_client = None
             print(f"Error al conectar con Redis: {e}")
 
+    global _listener_task, _hot_flush_task
+    if _redis_client is not None and _listener_task is None:
+        _listener_task = asyncio.create_task(_listen_invalidations())
+    if _redis_client is not None and _hot_flush_task is None:
+        _hot_flush_task = asyncio.create_task(_flush_hot_hits_loop())
+
 async def close_redis():
     """
     Cierra la conexión a Redis.
     """
+    global _listener_task, _hot_flush_task
+    for task in (_listener_task, _hot_flush_task):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    _listener_task = _hot_flush_task = None
+    # Lo que quedó sin volcar
+    await flush_hot_hits()
     if _redis_client:
         await _redis_client.close()
         print("Conexión a Redis cerrada.")
@@ -43,55 +114,509 @@ def get_redis_client() -> Redis:
         raise RuntimeError("La conexión a Redis no ha sido inicializada.")
     return _redis_client
 
-async def get_cache(key: str) -> Optional[Any]:
+# --- Respuestas pre-serializadas (bytes) ---
+# En un 'hit' devolvemos los bytes JSON directamente como Response,
+# sin json.loads + re-validación Pydantic + re-serialización.
+
+def dump_json(value: Any) -> bytes:
     """
-    Obtiene un valor de la caché por su clave.
-    Deserializa el JSON si encuentra datos.
+    Serializa un valor a bytes JSON.
+    Los modelos Pydantic usan su serializador nativo (maneja Decimal,
+    HttpUrl, datetime); dict/list usan orjson.
     """
-    if _redis_client is None: return None
-    
-    cached_data = await _redis_client.get(key)
-    if cached_data:
-        try:
-            return json.loads(cached_data)
-        except json.JSONDecodeError:
-            # Si no es JSON, devuelve el texto plano
-            return cached_data
+    with track("serialize"):
+        if isinstance(value, BaseModel):
+            return value.model_dump_json().encode("utf-8")
+        return orjson.dumps(value)
+
+def content_etag(body: bytes) -> str:
+    """
+    ETag fuerte (RFC 9110) a partir del contenido: mismos bytes, mismo ETag.
+    """
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def _etag_key(key: str) -> str:
+    return f"etag:{key}"
+
+def _encode_payload(body: Optional[bytes], fresh_until: float) -> bytes:
+    # Formato: [8 bytes 'fresh_until' (epoch, double)] [1 byte tag] [datos]
+    header = struct.pack(">d", fresh_until)
+    if body is None:
+        return header + _NEGATIVE_TAG
+    # Cuerpos ya comprimidos con gzip (ej. snapshot del catálogo) no se recomprimen
+    if ZSTD_AVAILABLE and not body.startswith(_GZIP_MAGIC) and settings.CACHE_ZSTD_MIN_BYTES and len(body) >= settings.CACHE_ZSTD_MIN_BYTES:
+        return header + _ZSTD_TAG + _zstd_compressor.compress(body)
+    return header + _RAW_TAG + body
+
+def _decode_payload(payload: bytes) -> Optional[Tuple[Optional[bytes], float]]:
+    if len(payload) < 9:
+        return None
+    fresh_until = struct.unpack(">d", payload[:8])[0]
+    tag, data = payload[8:9], payload[9:]
+    if tag == _RAW_TAG:
+        return data, fresh_until
+    if tag == _ZSTD_TAG and ZSTD_AVAILABLE:
+        return _zstd_decompressor.decompress(data), fresh_until
+    if tag == _NEGATIVE_TAG:
+        return None, fresh_until
+    # Formato desconocido (ej. una entrada antigua): se trata como 'miss'
     return None
 
-async def set_cache(key: str, value: Any, expiration_seconds: int = 3600):
+async def _get_entry(key: str) -> Optional[Tuple[Optional[bytes], float]]:
+    # 1. Memoria del worker (solo si sigue 'fresca'; si está 'stale'
+    # consultamos Redis por si otro worker ya la refrescó)
+    entry = _local_cache.get(key)
+    if entry is not None and time.time() < entry[1]:
+        _stats["local_hits"] += 1
+        return entry
+    _stats["local_misses"] += 1
+
+    # 2. Redis
+    if _redis_client is None: return None
+
+    with track("redis"):
+        payload = await _redis_client.get(key)
+    entry = _decode_payload(payload) if payload else None
+    if entry is None:
+        _stats["redis_misses"] += 1
+        return None
+    _stats["redis_hits"] += 1
+    _local_cache.set(key, entry)
+    return entry
+
+async def get_cache_raw(key: str) -> Optional[bytes]:
     """
-    Establece un valor en la caché.
-    Serializa a JSON si el valor es un modelo Pydantic o un dict/list.
+    Obtiene los bytes JSON guardados con set_cache_raw (o None).
+    Devuelve también entradas 'stale' (pasado su soft-TTL).
+    """
+    entry = await _get_entry(key)
+    return entry[0] if entry else None
+
+async def set_cache_raw(
+    key: str,
+    body: Optional[bytes],
+    expiration_seconds: int = 3600,
+    soft_ttl_seconds: Optional[int] = None,
+    tags: Iterable[str] = (),
+    etag: bool = False
+):
+    """
+    Guarda bytes JSON ya serializados (comprimidos con zstd si está
+    disponible y el cuerpo supera CACHE_ZSTD_MIN_BYTES).
+    Un body None guarda un "no encontrado" (caché negativa).
+
+    'soft_ttl_seconds' marca a partir de cuándo la entrada está 'stale':
+    se sigue sirviendo, pero get_or_compute la recalcula en segundo plano.
+    La clave desaparece de Redis al cumplirse 'expiration_seconds'.
+
+    'tags' registra la clave en los sets 'tag:{tag}' para poder
+    invalidarla después con invalidate_tag (ej. 'component:42').
+
+    Con 'etag', guarda además el content_etag del body en 'etag:{key}'
+    (mismo TTL y tags), para responder 304 sin leer el payload.
     """
     if _redis_client is None: return
-    
-    if isinstance(value, BaseModel):
-        value_to_cache = value.json()
-    elif isinstance(value, (dict, list)):
-        value_to_cache = json.dumps(value)
-    else:
-        value_to_cache = str(value)
-        
-    await _redis_client.setex(key, expiration_seconds, value_to_cache)
 
-async def invalidate_cache(key_prefix: str):
+    soft_ttl = expiration_seconds if soft_ttl_seconds is None else soft_ttl_seconds
+    fresh_until = time.time() + soft_ttl
+    payload = _encode_payload(body, fresh_until)
+    _local_cache.set(key, (body, fresh_until), ttl_seconds=expiration_seconds)
+
+    async with _redis_client.pipeline(transaction=False) as pipe:
+        pipe.setex(key, expiration_seconds, payload)
+        keys = [key]
+        if etag and body is not None:
+            keys.append(_set_etag(pipe, key, body, expiration_seconds))
+        for tag in tags:
+            pipe.sadd(f"tag:{tag}", *keys)
+            # El set vive como mucho lo que su clave más reciente
+            pipe.expire(f"tag:{tag}", expiration_seconds)
+        with track("redis"):
+            await pipe.execute()
+
+def _set_etag(pipe, key: str, body: bytes, expiration_seconds: int) -> str:
+    # Encola el ETag de 'key' en el pipeline; devuelve su clave
+    value = content_etag(body)
+    etag_key = _etag_key(key)
+    pipe.setex(etag_key, expiration_seconds, value)
+    return etag_key
+
+async def get_etag(key: str) -> Optional[str]:
+    """
+    ETag guardado para 'key' por set_cache_raw(etag=True), o None.
+    Solo lee la clave pequeña 'etag:{key}', nunca el payload.
+    Se lee SIEMPRE de Redis: una copia en memoria podría sobrevivir a
+    un invalidate_tag (si se pierde el mensaje de pub/sub) y responder
+    304 con un detalle que ya cambió.
+    """
+    if _redis_client is None: return None
+
+    with track("redis"):
+        value = await _redis_client.get(_etag_key(key))
+    return value.decode("utf-8") if value is not None else None
+
+
+def generations_available() -> bool:
+    """
+    ¿Las generaciones de namespace vienen de Redis? Sin Redis,
+    get_generation es siempre 0 y la clave no cambia al cambiar los datos.
+    """
+    return _redis_client is not None
+
+
+# --- Lecturas/escrituras en bloque ---
+
+async def get_many_raw(keys: List[str]) -> List[Optional[Tuple[Optional[bytes], float]]]:
+    """
+    Lee varias claves: primero del nivel en memoria y el resto con un
+    solo MGET. Devuelve, en el mismo orden, (body, fresh_until) o None
+    si la clave no está (body es None en entradas de caché negativa).
     """
-    Invalida (borra) claves de la caché que coincidan con un prefijo.
-    Ej: 'components:*' borrará todas las listas paginadas.
+    results: List[Optional[Tuple[Optional[bytes], float]]] = [None] * len(keys)
+    pending: List[int] = []
+    now = time.time()
+    for i, key in enumerate(keys):
+        entry = _local_cache.get(key)
+        if entry is not None and now < entry[1]:
+            _stats["local_hits"] += 1
+            results[i] = entry
+        else:
+            _stats["local_misses"] += 1
+            pending.append(i)
+
+    if not pending or _redis_client is None:
+        return results
+
+    with track("redis"):
+        payloads = await _redis_client.mget([keys[i] for i in pending])
+    for i, payload in zip(pending, payloads):
+        entry = _decode_payload(payload) if payload else None
+        if entry is None:
+            _stats["redis_misses"] += 1
+            continue
+        _stats["redis_hits"] += 1
+        _local_cache.set(keys[i], entry)
+        results[i] = entry
+    return results
+
+async def set_many_raw(
+    items: List[Tuple[str, Optional[bytes], Iterable[str]]],
+    expiration_seconds: int = 3600,
+    soft_ttl_seconds: Optional[int] = None,
+    etag: bool = False
+):
+    """
+    Guarda varias entradas (key, body, tags) en un solo pipeline
+    ('etag' como en set_cache_raw).
+    """
+    if _redis_client is None or not items: return
+
+    soft_ttl = expiration_seconds if soft_ttl_seconds is None else soft_ttl_seconds
+    fresh_until = time.time() + soft_ttl
+
+    async with _redis_client.pipeline(transaction=False) as pipe:
+        for key, body, tags in items:
+            pipe.setex(key, expiration_seconds, _encode_payload(body, fresh_until))
+            _local_cache.set(key, (body, fresh_until), ttl_seconds=expiration_seconds)
+            keys = [key]
+            if etag and body is not None:
+                keys.append(_set_etag(pipe, key, body, expiration_seconds))
+            for tag in tags:
+                pipe.sadd(f"tag:{tag}", *keys)
+                pipe.expire(f"tag:{tag}", expiration_seconds)
+        with track("redis"):
+            await pipe.execute()
+
+
+# --- Protección contra estampidas + stale-while-revalidate ---
+# 'compute' devuelve (body, expiration_seconds). Un body None significa
+# "no encontrado" (también se cachea, con el TTL indicado) y un
+# expiration_seconds 0 significa "no cachear".
+ComputeFn = Callable[[], Awaitable[Tuple[Optional[bytes], int]]]
+
+# Cálculos en curso en ESTE worker (single-flight local)
+_inflight: Dict[str, "asyncio.Task"] = {}
+
+async def get_or_compute(
+    key: str,
+    compute: ComputeFn,
+    soft_ttl_seconds: Optional[int] = None,
+    tags: Iterable[str] = (),
+    etag: bool = False,
+    hot_key: Optional[str] = None
+) -> Optional[bytes]:
+    """
+    Lee 'key' de la caché; si no está, la calcula UNA sola vez
+    aunque lleguen muchas peticiones concurrentes:
+      - Dentro del worker, las peticiones comparten la misma tarea.
+      - Entre workers, un lock en Redis ('lock:{key}') decide quién
+        calcula; los demás esperan a que aparezca el valor.
+    Si la entrada existe pero está 'stale' (pasó su soft-TTL), se
+    devuelve igualmente y se recalcula en segundo plano.
+    'etag': ver set_cache_raw.
+    'hot_key': clave lógica que se cuenta en HOT_KEYS_ZSET.
+    """
+    if soft_ttl_seconds is None:
+        soft_ttl_seconds = settings.CACHE_SOFT_TTL_SECONDS
+    if hot_key is not None:
+        _hot_hits[hot_key] = _hot_hits.get(hot_key, 0) + 1
+
+    entry = await _get_entry(key)
+    if entry is not None:
+        body, fresh_until = entry
+        if time.time() >= fresh_until and key not in _inflight:
+            _start_recompute(key, compute, soft_ttl_seconds, tags, etag, wait_for_peer=False)
+        return body
+
+    task = _inflight.get(key) or _start_recompute(key, compute, soft_ttl_seconds, tags, etag, wait_for_peer=True)
+    # 'shield': si esta petición se cancela, el cálculo compartido sigue
+    return await asyncio.shield(task)
+
+def _start_recompute(key: str, compute: ComputeFn, soft_ttl_seconds: int, tags: Iterable[str], etag: bool, wait_for_peer: bool) -> "asyncio.Task":
+    task = asyncio.create_task(_recompute(key, compute, soft_ttl_seconds, tuple(tags), etag, wait_for_peer))
+    _inflight[key] = task
+    task.add_done_callback(lambda _t: _inflight.pop(key, None))
+    return task
+
+async def _recompute(key: str, compute: ComputeFn, soft_ttl_seconds: int, tags: Tuple[str, ...], etag: bool, wait_for_peer: bool) -> Optional[bytes]:
+    if _redis_client is None:
+        with track("compute"):
+            body, _ = await compute()
+        return body
+
+    lock = _redis_client.lock(f"lock:{key}", timeout=settings.CACHE_LOCK_TIMEOUT_SECONDS)
+    acquired = False
+    try:
+        acquired = await lock.acquire(blocking=False)
+    except Exception as e:
+        print(f"Error al adquirir lock de caché '{key}': {e}")
+
+    if not acquired:
+        if not wait_for_peer:
+            # Otro worker ya está refrescando esta entrada 'stale'
+            return None
+        # Otro worker está calculando: esperamos a que publique el valor
+        deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            entry = await _get_entry(key)
+            if entry is not None:
+                return entry[0]
+            if not await lock.locked():
+                break
+        # Si nunca apareció (error o 'no cachear'), calculamos nosotros
+
+    try:
+        with track("compute"):
+            body, expiration_seconds = await compute()
+        if expiration_seconds > 0:
+            await set_cache_raw(
+                key, body,
+                expiration_seconds=expiration_seconds,
+                soft_ttl_seconds=min(soft_ttl_seconds, expiration_seconds),
+                tags=tags,
+                etag=etag
+            )
+        return body
+    except Exception as e:
+        if wait_for_peer:
+            raise
+        print(f"Error refrescando la caché '{key}' en segundo plano: {e}")
+        return None
+    finally:
+        if acquired:
+            try:
+                await lock.release()
+            except LockError:
+                # El lock expiró mientras calculábamos
+                pass
+
+
+# --- Invalidación O(1) por generación ---
+# Las claves llevan la generación de su namespace: 'components:g{n}:...'.
+# Invalidar = INCR del contador; las claves de generaciones anteriores
+# ya no se leen y desaparecen solas por TTL (sin SCAN del keyspace).
+
+# Namespaces de caché del servicio
+COMPONENT_LIST_NS = "components"
+COMPONENT_DETAIL_NS = "component_detail"
+
+def _generation_key(namespace: str) -> str:
+    return f"cache_gen:{namespace}"
+
+async def get_generation(namespace: str) -> int:
+    """
+    Generación actual de un namespace (0 si nunca se invalidó).
+    Se guarda en memoria: los cambios llegan por pub/sub y, como
+    respaldo, se relee de Redis cada CACHE_LOCAL_GENERATION_TTL_SECONDS.
+    """
+    known = _local_generations.get(namespace)
+    if known and time.monotonic() - known[1] < settings.CACHE_LOCAL_GENERATION_TTL_SECONDS:
+        return known[0]
+
+    if _redis_client is None: return 0
+
+    with track("redis"):
+        value = await _redis_client.get(_generation_key(namespace))
+    generation = int(value) if value else 0
+    _remember_generation(namespace, generation)
+    return generation
+
+def _remember_generation(namespace: str, generation: int):
+    known = _local_generations.get(namespace)
+    # Nunca retroceder (un mensaje viejo no debe "revivir" claves)
+    if known and known[0] > generation:
+        generation = known[0]
+    _local_generations[namespace] = (generation, time.monotonic())
+
+async def build_key(namespace: str, suffix: str) -> str:
+    """
+    Construye la clave de caché con la generación vigente del namespace.
+    """
+    generation = await get_generation(namespace)
+    return f"{namespace}:g{generation}:{suffix}"
+
+async def bump_generation(namespace: str) -> int:
+    """
+    Invalida TODAS las claves de un namespace en O(1).
+    """
+    if _redis_client is None: return 0
+
+    generation = await _redis_client.incr(_generation_key(namespace))
+    _remember_generation(namespace, generation)
+    await _publish_invalidation({"ns": namespace, "gen": generation})
+    print(f"Caché invalidada: namespace '{namespace}' ahora en generación {generation}")
+    return generation
+
+async def invalidate_tag(tag: str):
+    """
+    Borra las claves registradas bajo un tag (ej. 'component:42').
+    El costo depende solo de cuántas claves tiene ESE tag.
     """
     if _redis_client is None: return
-    
-    if key_prefix.endswith('*'):
-        # Borrar por prefijo
-        keys_to_delete = []
-        async for key in _redis_client.scan_iter(match=key_prefix):
-            keys_to_delete.append(key)
-        
-        if keys_to_delete:
-            await _redis_client.delete(*keys_to_delete)
-            print(f"Caché invalidada para {len(keys_to_delete)} claves con prefijo '{key_prefix}'")
-    else:
-        # Borrar clave exacta
-        await _redis_client.delete(key_prefix)
-        print(f"Caché invalidada para la clave '{key_prefix}'")
\ No newline at end of file
+
+    tag_key = f"tag:{tag}"
+    keys = await _redis_client.smembers(tag_key)
+    await _redis_client.delete(tag_key, *keys)
+    if keys:
+        decoded = [k.decode("utf-8") for k in keys]
+        for key in decoded:
+            _local_cache.pop(key)
+        await _publish_invalidation({"keys": decoded})
+    print(f"Caché invalidada para {len(keys)} claves con tag '{tag}'")
+
+
+# --- Coherencia del nivel en memoria entre workers (pub/sub) ---
+
+async def _publish_invalidation(message: dict):
+    try:
+        await _redis_client.publish(INVALIDATION_CHANNEL, orjson.dumps(message))
+    except Exception as e:
+        print(f"Error publicando invalidación de caché: {e}")
+
+def _apply_invalidation(message: dict):
+    if "ns" in message:
+        _remember_generation(message["ns"], int(message["gen"]))
+    for key in message.get("keys", ()):
+        _local_cache.pop(key)
+
+async def _listen_invalidations():
+    """
+    Tarea de fondo (una por worker): aplica al nivel en memoria las
+    invalidaciones publicadas por cualquier worker o por el scraper.
+    """
+    while True:
+        pubsub = _redis_client.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                _apply_invalidation(orjson.loads(message["data"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Suscripción de invalidaciones caída, reintentando: {e}")
+            # Pudimos perder mensajes: vaciamos el nivel en memoria
+            _local_cache.clear()
+            _local_generations.clear()
+            await asyncio.sleep(1)
+        finally:
+            try:
+                await pubsub.close()
+            except Exception:
+                pass
+
+
+# --- Popularidad (ZSET de claves calientes) ---
+
+async def flush_hot_hits():
+    """
+    Vuelca los conteos de ESTE worker a HOT_KEYS_ZSET (ZINCRBY en un
+    pipeline) y recorta el ZSET a CACHE_HOT_KEYS_MAX miembros.
+    """
+    global _hot_hits
+    if _redis_client is None or not _hot_hits:
+        return
+    hits, _hot_hits = _hot_hits, {}
+    try:
+        async with _redis_client.pipeline(transaction=False) as pipe:
+            for member, count in hits.items():
+                pipe.zincrby(HOT_KEYS_ZSET, count, member)
+            # Se conservan los más leídos (rango 0 = menor puntaje)
+            pipe.zremrangebyrank(HOT_KEYS_ZSET, 0, -settings.CACHE_HOT_KEYS_MAX - 1)
+            await pipe.execute()
+    except Exception as e:
+        print(f"Error en Redis al volcar la popularidad de la caché: {e}")
+
+async def _flush_hot_hits_loop():
+    while True:
+        await asyncio.sleep(settings.CACHE_HOT_FLUSH_SECONDS)
+        await flush_hot_hits()
+
+async def get_hot_keys(limit: int) -> List[str]:
+    """
+    Las 'limit' claves lógicas más leídas (de mayor a menor).
+    """
+    if _redis_client is None: return []
+    try:
+        members = await _redis_client.zrevrange(HOT_KEYS_ZSET, 0, limit - 1)
+    except Exception as e:
+        print(f"Error en Redis al leer las claves calientes: {e}")
+        return []
+    return [m.decode("utf-8") for m in members]
+
+async def decay_hot_keys(factor: float):
+    """
+    Multiplica todos los puntajes por 'factor' (< 1): lo popular
+    AHORA pesa más que lo popular hace semanas.
+    """
+    if _redis_client is None: return
+    try:
+        await _redis_client.zunionstore(HOT_KEYS_ZSET, {HOT_KEYS_ZSET: factor})
+    except Exception as e:
+        print(f"Error en Redis al reducir la popularidad de la caché: {e}")
+
+
+def get_cache_stats() -> dict:
+    """
+    Aciertos/fallos y ratio de acierto de cada nivel (memoria y Redis)
+    para ESTE worker.
+    """
+    def ratio(hits: int, misses: int) -> Optional[float]:
+        total = hits + misses
+        return round(hits / total, 4) if total else None
+
+    return {
+        "local": {
+            "hits": _stats["local_hits"],
+            "misses": _stats["local_misses"],
+            "hit_ratio": ratio(_stats["local_hits"], _stats["local_misses"]),
+            "entries": len(_local_cache),
+        },
+        "redis": {
+            "hits": _stats["redis_hits"],
+            "misses": _stats["redis_misses"],
+            "hit_ratio": ratio(_stats["redis_hits"], _stats["redis_misses"]),
+        },
+    }
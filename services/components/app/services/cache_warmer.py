@@ -0,0 +1,80 @@
+import asyncio
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.services.cache_keys import parse_hot_key, HOT_LIST
+from app.services.cache_service import get_hot_keys, decay_hot_keys, flush_hot_hits
+
+# -------------------------------------------------------------------
+# Pre-calentamiento de la caché después de invalidarla
+# -------------------------------------------------------------------
+# Tras bump_generation, las primeras visitas a las páginas más
+# populares pagarían la consulta completa (y la DB recibe un pico).
+# Aquí se recalculan las CACHE_WARM_TOP_N claves lógicas más leídas
+# (HOT_KEYS_ZSET) con el MISMO código de los endpoints, con como mucho
+# CACHE_WARM_CONCURRENCY cálculos a la vez. get_or_compute mantiene el
+# single-flight: si llega tráfico real a la vez, comparten el cálculo.
+
+
+async def warm_hot_keys(top_n: Optional[int] = None, concurrency: Optional[int] = None) -> dict:
+    """
+    Recalcula las entradas más populares en la generación actual.
+    Devuelve cuántas se calentaron, cuántas fallaron y el tiempo.
+    """
+    # Import diferido: el módulo de endpoints importa cache_service
+    from app.api.v1.endpoints.components import warm_component_list, warm_component_detail
+
+    top_n = top_n or settings.CACHE_WARM_TOP_N
+    concurrency = concurrency or settings.CACHE_WARM_CONCURRENCY
+
+    # Los conteos de este proceso también cuentan
+    await flush_hot_hits()
+    members = await get_hot_keys(top_n)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    result = {"warmed": 0, "failed": 0, "skipped": 0}
+
+    async def warm(member: str):
+        parsed = parse_hot_key(member)
+        if parsed is None:
+            result["skipped"] += 1
+            return
+        kind, value = parsed
+        async with semaphore:
+            try:
+                if kind == HOT_LIST:
+                    await warm_component_list(value)
+                else:
+                    await warm_component_detail(value)
+                result["warmed"] += 1
+            except Exception as e:
+                result["failed"] += 1
+                print(f"Error pre-calentando '{member}': {e}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(warm(member) for member in members))
+    result["seconds"] = round(time.perf_counter() - started, 3)
+
+    # Cada ciclo, la popularidad vieja pesa menos
+    await decay_hot_keys(settings.CACHE_HOT_DECAY)
+    print(
+        f"Caché pre-calentada: {result['warmed']} entradas "
+        f"({result['failed']} errores) en {result['seconds']}s"
+    )
+    return result
+
+
+if __name__ == "__main__":
+    # A mano: python -m app.services.cache_warmer [top_n]
+    import sys
+    from app.services.cache_service import init_redis, close_redis
+
+    async def main():
+        await init_redis()
+        try:
+            await warm_hot_keys(int(sys.argv[1]) if len(sys.argv) > 1 else None)
+        finally:
+            await close_redis()
+
+    asyncio.run(main())
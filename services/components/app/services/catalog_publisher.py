@@ -0,0 +1,130 @@
+import asyncio
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import engine
+
+# -------------------------------------------------------------------
+# Publicador de versiones del catálogo (delta-sync)
+# -------------------------------------------------------------------
+# Un 'nextval' tomado DENTRO de la transacción que escribe no sirve de
+# cursor: la transacción A toma 101, la B toma 102 y confirma primero;
+# un cliente que lee en ese momento avanza a since=102 y nunca ve 101.
+#
+# Por eso las escrituras solo dejan filas PENDIENTES en
+# 'catalog_changes' (triggers, ver db/session.py) y este publicador,
+# que corre de a uno (advisory lock), les asigna versiones a las que
+# ya están confirmadas. Cada vuelta es una transacción: los lectores
+# ven la vuelta completa o nada, y la siguiente vuelta siempre toma
+# versiones mayores. El cursor queda en orden de confirmación.
+#
+# Las filas normales se consumen (la versión queda en
+# components.catalog_version); las lápidas de componentes borrados se
+# conservan con su versión para GET /components/changes.
+
+# Clave del advisory lock (cualquier bigint fijo, distinta de la de init_db)
+_PUBLISH_LOCK_KEY = 727_002
+
+_PUBLISH_SQL = text("""
+    WITH pending AS (
+        SELECT id, component_id, deleted FROM catalog_changes
+        WHERE version IS NULL
+        ORDER BY id
+        LIMIT :batch_size
+    ), versions AS (
+        SELECT component_id, bool_or(deleted) AS deleted, nextval('catalog_version_seq') AS version
+        FROM pending
+        GROUP BY component_id
+    ), bumped AS (
+        UPDATE components c
+        SET catalog_version = v.version
+        FROM versions v
+        WHERE c.id = v.component_id AND NOT v.deleted
+        RETURNING c.id
+    ), tombstones AS (
+        UPDATE catalog_changes cc
+        SET version = v.version
+        FROM pending p JOIN versions v ON v.component_id = p.component_id
+        WHERE cc.id = p.id AND p.deleted
+        RETURNING cc.id
+    ), consumed AS (
+        DELETE FROM catalog_changes cc
+        USING pending p
+        WHERE cc.id = p.id AND NOT p.deleted
+        RETURNING cc.id
+    )
+    SELECT
+        (SELECT count(*) FROM pending),
+        (SELECT count(*) FROM bumped),
+        (SELECT count(*) FROM tombstones),
+        (SELECT count(*) FROM consumed)
+""")
+
+_publisher_task: Optional["asyncio.Task"] = None
+
+
+def publish_catalog_changes(batch_size: Optional[int] = None, max_batches: Optional[int] = None) -> dict:
+    """
+    Versiona los cambios pendientes en lotes de 'batch_size' hasta
+    vaciar la cola (o 'max_batches'). Si otro proceso está publicando,
+    no hace nada (lo que quede lo toma él o la próxima vuelta).
+    """
+    batch_size = batch_size or settings.CATALOG_PUBLISH_BATCH_SIZE
+    result = {"changes": 0, "components": 0, "tombstones": 0, "batches": 0}
+    while max_batches is None or result["batches"] < max_batches:
+        with engine.begin() as conn:
+            locked = conn.execute(
+                text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _PUBLISH_LOCK_KEY}
+            ).scalar()
+            if not locked:
+                break
+            pending, bumped, tombstones, _consumed = conn.execute(
+                _PUBLISH_SQL, {"batch_size": batch_size}
+            ).one()
+        if not pending:
+            break
+        result["batches"] += 1
+        result["changes"] += pending
+        result["components"] += bumped
+        result["tombstones"] += tombstones
+        if pending < batch_size:
+            break
+    return result
+
+
+async def _publish_loop():
+    while True:
+        await asyncio.sleep(settings.CATALOG_PUBLISH_SECONDS)
+        try:
+            await run_in_threadpool(publish_catalog_changes)
+        except Exception as e:
+            print(f"Error publicando cambios del catálogo: {e}")
+
+
+async def start_catalog_publisher():
+    global _publisher_task
+    if settings.CATALOG_PUBLISH_SECONDS > 0 and _publisher_task is None:
+        _publisher_task = asyncio.create_task(_publish_loop())
+
+
+async def stop_catalog_publisher():
+    global _publisher_task
+    if _publisher_task:
+        _publisher_task.cancel()
+        try:
+            await _publisher_task
+        except asyncio.CancelledError:
+            pass
+        _publisher_task = None
+
+
+if __name__ == "__main__":
+    # A mano (ej. después de cargar datos): python -m app.services.catalog_publisher
+    result = publish_catalog_changes()
+    print(
+        f"Catálogo: {result['changes']} cambios publicados "
+        f"({result['components']} componentes, {result['tombstones']} lápidas, {result['batches']} lotes)"
+    )
@@ -0,0 +1,58 @@
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Response, status
+
+from app.core.config import settings
+
+# --- Validadores HTTP (ETag / If-None-Match) ---
+# Lista: el ETag sale de la clave de caché, que ya lleva la generación
+# del namespace y los parámetros canónicos (sin leer Redis). Sin Redis
+# la generación no avanza y se usa el hash del contenido.
+# Detalle: el ETag es el hash del contenido, guardado en Redis junto a
+# la entrada de caché (ver cache_service.get_etag).
+
+
+def key_etag(cache_key: str) -> str:
+    """
+    ETag fuerte derivado de una clave de caché con generación
+    ('components:g{n}:...'): cambia cuando se invalida el namespace.
+    """
+    return '"' + hashlib.blake2b(cache_key.encode("utf-8"), digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """
+    Comparación débil de If-None-Match (RFC 9110): acepta '*', listas
+    separadas por comas y el prefijo 'W/'.
+    """
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.HTTP_CACHE_MAX_AGE_SECONDS}",
+    }
+
+
+def not_modified(etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers or cache_headers(etag))
+
+
+def image_cache_headers(etag: str) -> Dict[str, str]:
+    # Miniaturas: casi nunca cambian (y si cambia la imagen, cambia el ETag)
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.IMAGE_HTTP_MAX_AGE_SECONDS}",
+    }
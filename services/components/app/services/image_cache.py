@@ -0,0 +1,340 @@
+import asyncio
+import hashlib
+import io
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+# --- Pillow + httpx (opcional: sin ellos se redirige a la imagen original) ---
+try:
+    import httpx
+    from PIL import Image
+    THUMBNAILS_AVAILABLE = True
+except ImportError:
+    THUMBNAILS_AVAILABLE = False
+
+# -------------------------------------------------------------------
+# Miniaturas de las imágenes de los componentes
+# -------------------------------------------------------------------
+# 'image_url' apunta a la imagen completa de la tienda (cientos de KB)
+# y las cards solo la muestran a ~60 px. La imagen original se descarga
+# UNA vez y se generan a la vez todas las miniaturas WebP de
+# THUMBNAIL_SIZES (lado mayor, sin agrandar), que se guardan en disco:
+#
+#   IMAGE_CACHE_DIR/ab/abcdef...-160.webp   (hash de la URL original)
+#
+# Si cambia la URL de la imagen, cambia el archivo (y el ETag).
+# Un fallo deja un marcador vacío 'abcdef....fail': mientras tenga menos
+# de IMAGE_FAILURE_TTL_SECONDS no se reintenta (caché negativa) y la API
+# redirige directo a la original, sin esperar otro timeout.
+# El directorio es una LRU con tope de IMAGE_CACHE_MAX_BYTES: cada
+# lectura "toca" el mtime del archivo (como mucho una vez por hora) y,
+# al pasar el tope, se borran los menos usados hasta quedar en el 90%.
+# Lo comparten todos los workers y el scraper (escrituras atómicas).
+
+THUMBNAIL_SIZES = (64, 160, 320)
+
+# Un acceso renueva el mtime solo si es más viejo que esto
+_TOUCH_INTERVAL_SECONDS = 3600
+# Al podar, se baja hasta esta fracción del tope
+_PRUNE_TARGET = 0.9
+# Temporales abandonados (un worker que murió a mitad de escritura)
+_TMP_MAX_AGE_SECONDS = 3600
+
+# Descargas en curso en ESTE worker (single-flight por URL)
+_inflight: Dict[str, "asyncio.Task"] = {}
+
+# Tamaño del directorio estimado por este proceso (None = sin medir)
+_cache_bytes: Optional[int] = None
+_last_scan = 0.0
+_prune_task: Optional["asyncio.Task"] = None
+
+
+def pick_size(requested: int) -> int:
+    # La menor miniatura que cubre lo pedido (o la mayor que hay)
+    for size in THUMBNAIL_SIZES:
+        if size >= requested:
+            return size
+    return THUMBNAIL_SIZES[-1]
+
+
+def _digest(source_url: str) -> str:
+    return hashlib.blake2b(source_url.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def thumbnail_path(source_url: str, size: int) -> str:
+    digest = _digest(source_url)
+    return os.path.join(settings.IMAGE_CACHE_DIR, digest[:2], f"{digest}-{size}.webp")
+
+
+def thumbnail_etag(source_url: str, size: int) -> str:
+    return f'"{_digest(source_url)}-{size}"'
+
+
+def has_thumbnails(source_url: str) -> bool:
+    return all(os.path.exists(thumbnail_path(source_url, size)) for size in THUMBNAIL_SIZES)
+
+
+def _failure_path(source_url: str) -> str:
+    digest = _digest(source_url)
+    return os.path.join(settings.IMAGE_CACHE_DIR, digest[:2], f"{digest}.fail")
+
+
+def _failed_recently(source_url: str) -> bool:
+    try:
+        mtime = os.stat(_failure_path(source_url)).st_mtime
+    except FileNotFoundError:
+        return False
+    return time.time() - mtime < settings.IMAGE_FAILURE_TTL_SECONDS
+
+
+def _cached_state(source_url: str) -> Optional[bool]:
+    # True: miniaturas en disco; False: falló hace poco; None: hay que generarlas
+    if has_thumbnails(source_url):
+        return True
+    if _failed_recently(source_url):
+        return False
+    return None
+
+
+# --- Generación ---
+
+def render_thumbnails(data: bytes) -> Dict[int, bytes]:
+    """
+    Miniaturas WebP de una imagen, de la mayor a la menor (cada una se
+    reduce desde la anterior, no desde el original).
+    """
+    image = Image.open(io.BytesIO(data))
+    # JPEG: decodifica directamente a una escala reducida (mucho más rápido)
+    image.draft("RGB", (THUMBNAIL_SIZES[-1], THUMBNAIL_SIZES[-1]))
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+
+    thumbnails = {}
+    for size in sorted(THUMBNAIL_SIZES, reverse=True):
+        image.thumbnail((size, size), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, format="WEBP", quality=settings.IMAGE_WEBP_QUALITY, method=4)
+        thumbnails[size] = out.getvalue()
+    return thumbnails
+
+
+def _write_atomic(path: str, data: bytes):
+    # Escribe a un temporal y lo renombra: nadie lee un archivo a medias
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _store_thumbnails(source_url: str, data: bytes) -> int:
+    # Genera y guarda todas las miniaturas. Devuelve los bytes escritos
+    written = 0
+    for size, body in render_thumbnails(data).items():
+        _write_atomic(thumbnail_path(source_url, size), body)
+        written += len(body)
+    # Ya hay miniaturas: el marcador de un fallo anterior sobra
+    _remove(_failure_path(source_url))
+    return written
+
+
+async def _fetch_source(source_url: str) -> bytes:
+    """
+    Descarga la imagen original (con tope de tamaño y timeout).
+    """
+    if not source_url.startswith(("http://", "https://")):
+        raise ValueError(f"URL de imagen no soportada: {source_url}")
+    async with httpx.AsyncClient(timeout=settings.IMAGE_FETCH_TIMEOUT_SECONDS, follow_redirects=True) as client:
+        async with client.stream("GET", source_url) as resp:
+            resp.raise_for_status()
+            chunks: List[bytes] = []
+            total = 0
+            async for chunk in resp.aiter_bytes():
+                total += len(chunk)
+                if total > settings.IMAGE_SOURCE_MAX_BYTES:
+                    raise ValueError(f"Imagen de más de {settings.IMAGE_SOURCE_MAX_BYTES} bytes: {source_url}")
+                chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def _generate(source_url: str) -> bool:
+    global _cache_bytes
+    try:
+        data = await _fetch_source(source_url)
+        written = await run_in_threadpool(_store_thumbnails, source_url, data)
+    except Exception as e:
+        print(f"Error generando miniaturas de '{source_url}': {e}")
+        try:
+            await run_in_threadpool(_write_atomic, _failure_path(source_url), b"")
+        except OSError:
+            pass
+        return False
+    if _cache_bytes is not None:
+        _cache_bytes += written
+    _schedule_prune()
+    return True
+
+
+async def ensure_thumbnails(source_url: str) -> bool:
+    """
+    Asegura que existan todas las miniaturas de 'source_url'. Las
+    peticiones concurrentes de este worker comparten la descarga.
+    False si no se pudo (o si falló hace menos de IMAGE_FAILURE_TTL_SECONDS).
+    """
+    state = await run_in_threadpool(_cached_state, source_url)
+    if state is not None:
+        return state
+    task = _inflight.get(source_url)
+    if task is None:
+        task = asyncio.create_task(_generate(source_url))
+        _inflight[source_url] = task
+        task.add_done_callback(lambda _t: _inflight.pop(source_url, None))
+    # 'shield': si el cliente se va, la miniatura se termina igual
+    return await asyncio.shield(task)
+
+
+def _open_cached(path: str) -> bool:
+    # True si existe; renueva su mtime (posición en la LRU) si hace falta
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return False
+    if time.time() - mtime > _TOUCH_INTERVAL_SECONDS:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    return True
+
+
+async def get_thumbnail(source_url: str, size: int) -> Optional[str]:
+    """
+    Ruta de la miniatura (generándola si hace falta). None si no se
+    pudo (sin Pillow/httpx, la tienda no respondió, imagen inválida).
+    """
+    if not THUMBNAILS_AVAILABLE:
+        return None
+    path = thumbnail_path(source_url, size)
+    if _open_cached(path):
+        return path
+    if await ensure_thumbnails(source_url) and _open_cached(path):
+        return path
+    return None
+
+
+async def pregenerate_thumbnails(source_urls: Iterable[str], concurrency: Optional[int] = None) -> dict:
+    """
+    Genera las miniaturas que falten (después del scraping), con como
+    mucho 'concurrency' descargas a la vez.
+    """
+    result = {"generated": 0, "cached": 0, "failed": 0, "skipped": 0}
+    if not THUMBNAILS_AVAILABLE:
+        return result
+    semaphore = asyncio.Semaphore(concurrency or settings.IMAGE_PREGENERATE_CONCURRENCY)
+
+    async def generate(source_url: str):
+        state = await run_in_threadpool(_cached_state, source_url)
+        if state is not None:
+            # Con fallo reciente: no se reintenta hasta que venza el marcador
+            result["cached" if state else "skipped"] += 1
+            return
+        async with semaphore:
+            ok = await ensure_thumbnails(source_url)
+        result["generated" if ok else "failed"] += 1
+
+    await asyncio.gather(*(generate(url) for url in set(source_urls) if url))
+    return result
+
+
+# --- LRU en disco ---
+
+def prune_image_cache(max_bytes: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Mide el directorio y, si pasa de 'max_bytes', borra las miniaturas
+    con el mtime más viejo. Devuelve (bytes que quedan, archivos borrados).
+    """
+    max_bytes = settings.IMAGE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    now = time.time()
+    files = []
+    total = 0
+    if not os.path.isdir(settings.IMAGE_CACHE_DIR):
+        return 0, 0
+    for bucket in os.scandir(settings.IMAGE_CACHE_DIR):
+        if not bucket.is_dir():
+            continue
+        for entry in os.scandir(bucket.path):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.name.endswith(".tmp"):
+                if now - stat.st_mtime > _TMP_MAX_AGE_SECONDS:
+                    _remove(entry.path)
+                continue
+            if entry.name.endswith(".fail"):
+                # Marcadores de fallo vencidos (no cuentan en la LRU)
+                if now - stat.st_mtime > settings.IMAGE_FAILURE_TTL_SECONDS:
+                    _remove(entry.path)
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    removed = 0
+    if total > max_bytes:
+        files.sort()
+        target = max_bytes * _PRUNE_TARGET
+        for _mtime, size, path in files:
+            if total <= target:
+                break
+            if _remove(path):
+                total -= size
+                removed += 1
+    return total, removed
+
+
+def _remove(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        # Otro proceso ya lo borró
+        return False
+
+
+def _schedule_prune():
+    """
+    Poda en segundo plano si este proceso cree que se pasó del tope, o
+    si hace rato que no mide (otros workers también escriben).
+    """
+    global _prune_task
+    if _prune_task is not None:
+        return
+    stale = time.monotonic() - _last_scan > settings.IMAGE_CACHE_SCAN_SECONDS
+    if _cache_bytes is None or _cache_bytes > settings.IMAGE_CACHE_MAX_BYTES or stale:
+        _prune_task = asyncio.create_task(_prune())
+
+
+async def _prune():
+    global _cache_bytes, _last_scan, _prune_task
+    try:
+        _cache_bytes, removed = await run_in_threadpool(prune_image_cache)
+        _last_scan = time.monotonic()
+        if removed:
+            print(f"Caché de imágenes: {removed} miniaturas borradas ({_cache_bytes} bytes en disco)")
+    except Exception as e:
+        print(f"Error podando la caché de imágenes: {e}")
+    finally:
+        _prune_task = None
+
+
+if __name__ == "__main__":
+    # Podar a mano: python -m app.services.image_cache [max_bytes]
+    import sys
+
+    remaining, deleted = prune_image_cache(int(sys.argv[1]) if len(sys.argv) > 1 else None)
+    print(f"Caché de imágenes: {deleted} miniaturas borradas, {remaining} bytes en disco.")
@@ -0,0 +1,267 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# --- Métricas Prometheus (opcional) ---
+try:
+    from prometheus_client import Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# -------------------------------------------------------------------
+# Instrumentación por petición
+# -------------------------------------------------------------------
+# Cada petición tiene su RequestStats en un ContextVar. Los eventos del
+# engine (SQL), el pool y cache_service (Redis, serialización) suman
+# ahí su tiempo. run_in_threadpool y las tareas de asyncio copian el
+# contexto, así que el trabajo hecho en hilos también se atribuye a la
+# petición que lo originó.
+# Las métricas son POR WORKER (cada proceso de uvicorn tiene las suyas).
+
+# Largo máximo de la sentencia más lenta que se reporta
+_STATEMENT_MAX_CHARS = 300
+
+
+class RequestStats:
+    __slots__ = ("db_queries", "db_seconds", "slowest_seconds", "slowest_statement", "sections")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+        # Tiempo por sección: redis, serialize, compute, pool_wait
+        self.sections: Dict[str, float] = {}
+
+    def add(self, section: str, seconds: float):
+        self.sections[section] = self.sections.get(section, 0.0) + seconds
+
+    def breakdown(self, total_seconds: float) -> dict:
+        """
+        Desglose en milisegundos. 'orm_python' es el tiempo de los
+        cálculos (compute) que no fue SQL ni serialización: hidratar
+        objetos ORM y construir los schemas de Pydantic.
+        """
+        compute = self.sections.get("compute", 0.0)
+        serialize = self.sections.get("serialize", 0.0)
+        return {
+            "total_ms": round(total_seconds * 1000, 2),
+            "db_ms": round(self.db_seconds * 1000, 2),
+            "db_queries": self.db_queries,
+            "db_slowest_ms": round(self.slowest_seconds * 1000, 2),
+            "db_slowest_statement": self.slowest_statement,
+            "pool_wait_ms": round(self.sections.get("pool_wait", 0.0) * 1000, 2),
+            "redis_ms": round(self.sections.get("redis", 0.0) * 1000, 2),
+            "serialize_ms": round(serialize * 1000, 2),
+            "compute_ms": round(compute * 1000, 2),
+            "orm_python_ms": round(max(0.0, compute - self.db_seconds - serialize) * 1000, 2),
+        }
+
+
+_current_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+def start_request() -> contextvars.Token:
+    return _current_stats.set(RequestStats())
+
+
+def end_request(token: contextvars.Token) -> Optional[RequestStats]:
+    stats = _current_stats.get()
+    _current_stats.reset(token)
+    return stats
+
+
+@contextmanager
+def track(section: str):
+    """
+    Suma el tiempo del bloque a la sección de la petición en curso
+    (sin petición, ej. el scraper, no hace nada).
+    """
+    stats = _current_stats.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add(section, time.perf_counter() - start)
+
+
+# --- Métricas exportadas ---
+if PROMETHEUS_AVAILABLE:
+    _BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    HTTP_REQUEST_SECONDS = Histogram(
+        "components_http_request_duration_seconds",
+        "Duración de las peticiones HTTP",
+        ["route", "method", "status"],
+        buckets=_BUCKETS
+    )
+    REQUEST_DB_QUERIES = Histogram(
+        "components_request_db_queries",
+        "Sentencias SQL por petición",
+        ["route"],
+        buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+    )
+    REQUEST_DB_SECONDS = Histogram(
+        "components_request_db_seconds",
+        "Tiempo total en SQL por petición",
+        ["route"],
+        buckets=_BUCKETS
+    )
+    REQUEST_SLOWEST_QUERY_SECONDS = Histogram(
+        "components_request_slowest_query_seconds",
+        "Sentencia SQL más lenta de cada petición",
+        ["route"],
+        buckets=_BUCKETS
+    )
+    DB_QUERY_SECONDS = Histogram(
+        "components_db_query_duration_seconds",
+        "Duración de cada sentencia SQL",
+        ["engine"],
+        buckets=_BUCKETS
+    )
+    POOL_WAIT_SECONDS = Histogram(
+        "components_db_pool_wait_seconds",
+        "Espera para obtener una conexión del pool",
+        buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+    )
+    POOL_TIMEOUTS = Counter(
+        "components_db_pool_timeouts_total",
+        "Peticiones de conexión que agotaron pool_timeout"
+    )
+
+
+def observe_request(route: str, method: str, status_code: int, seconds: float, stats: Optional[RequestStats]):
+    if not PROMETHEUS_AVAILABLE:
+        return
+    HTTP_REQUEST_SECONDS.labels(route, method, str(status_code)).observe(seconds)
+    if stats is not None:
+        REQUEST_DB_QUERIES.labels(route).observe(stats.db_queries)
+        REQUEST_DB_SECONDS.labels(route).observe(stats.db_seconds)
+        if stats.db_queries:
+            REQUEST_SLOWEST_QUERY_SECONDS.labels(route).observe(stats.slowest_seconds)
+
+
+# --- Engine y pool ---
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool que mide cuánto se espera por una conexión libre.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            if PROMETHEUS_AVAILABLE:
+                POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            if PROMETHEUS_AVAILABLE:
+                POOL_WAIT_SECONDS.observe(waited)
+            stats = _current_stats.get()
+            if stats is not None:
+                stats.add("pool_wait", waited)
+
+
+# Engines instrumentados: nombre ('primary', 'replica') -> engine
+_engines: Dict[str, object] = {}
+
+
+def instrument_engine(engine, name: str = "primary"):
+    """
+    Registra los eventos que miden cada sentencia SQL del engine y lo
+    añade al colector de estadísticas del pool.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        if PROMETHEUS_AVAILABLE:
+            DB_QUERY_SECONDS.labels(name).observe(elapsed)
+        stats = _current_stats.get()
+        if stats is None:
+            return
+        stats.db_queries += 1
+        stats.db_seconds += elapsed
+        if elapsed > stats.slowest_seconds:
+            stats.slowest_seconds = elapsed
+            stats.slowest_statement = " ".join(statement.split())[:_STATEMENT_MAX_CHARS]
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        # Sentencia fallida: descartamos su marca de inicio
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    if PROMETHEUS_AVAILABLE and not _engines:
+        REGISTRY.register(_PoolAndCacheCollector())
+    _engines[name] = engine
+
+
+if PROMETHEUS_AVAILABLE:
+    class _PoolAndCacheCollector:
+        """
+        Valores que se leen en el momento del scrape: estado del pool
+        y contadores de la caché (ver cache_service.get_cache_stats).
+        """
+
+        def collect(self):
+            gauges = {
+                "components_db_pool_size": ("Tamaño configurado del pool", "size"),
+                "components_db_pool_checked_out": ("Conexiones en uso", "checkedout"),
+                "components_db_pool_checked_in": ("Conexiones libres en el pool", "checkedin"),
+                "components_db_pool_overflow": ("Conexiones por encima del tamaño del pool", "overflow"),
+            }
+            for metric, (documentation, method) in gauges.items():
+                family = GaugeMetricFamily(metric, documentation, labels=["engine"])
+                for name, engine in _engines.items():
+                    family.add_metric([name], getattr(engine.pool, method)())
+                yield family
+
+            # Import diferido: cache_service importa este módulo
+            from app.services.cache_service import get_cache_stats
+            cache = get_cache_stats()
+            for result in ("hits", "misses"):
+                family = CounterMetricFamily(
+                    f"components_cache_{result}",
+                    f"Lecturas de caché ({result}) por nivel",
+                    labels=["level"]
+                )
+                for level in ("local", "redis"):
+                    family.add_metric([level], cache[level][result])
+                yield family
+            yield GaugeMetricFamily(
+                "components_cache_local_entries",
+                "Entradas en la caché en memoria del worker",
+                value=cache["local"]["entries"]
+            )
+
+
+def render_metrics() -> Optional[bytes]:
+    """
+    Exposición en formato de texto de Prometheus (None si
+    prometheus_client no está instalado).
+    """
+    if not PROMETHEUS_AVAILABLE:
+        return None
+    return generate_latest(REGISTRY)
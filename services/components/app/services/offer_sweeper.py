@@ -0,0 +1,189 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import engine
+from app.services import cache_service
+from app.services.cache_service import bump_generation, COMPONENT_LIST_NS, COMPONENT_DETAIL_NS
+from app.services.read_routing import mark_recent_write
+from app.services.cache_warmer import warm_hot_keys
+
+# -------------------------------------------------------------------
+# Limpieza de ofertas viejas
+# -------------------------------------------------------------------
+# Las ofertas de productos que desaparecen de la búsqueda nunca se
+# vuelven a actualizar: seguirían saliendo como "mejor oferta" y
+# agrandan 'offers' y su índice de precio. Las que no se actualizan
+# desde hace OFFER_STALE_HORIZON_HOURS se mueven a 'offers_archive'.
+#
+# Cada lote es UNA transacción corta: selecciona hasta
+# OFFER_SWEEP_BATCH_SIZE filas con FOR UPDATE SKIP LOCKED (salta las
+# que el scraper esté actualizando en ese momento), las borra de
+# 'offers' y las inserta en 'offers_archive' en la misma sentencia (el
+# trigger de 'offers' registra el cambio de sus componentes para el
+# delta-sync, ver services/catalog_publisher).
+# Las lecturas de la API no toman bloqueos: nunca esperan al sweeper.
+
+_SWEEP_BATCH_SQL = text("""
+    WITH stale AS (
+        SELECT id FROM offers
+        WHERE last_updated < :cutoff
+        ORDER BY last_updated
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), moved AS (
+        DELETE FROM offers o
+        USING stale
+        WHERE o.id = stale.id
+        RETURNING o.id, o.component_id, o.store, o.price, o.link, o.last_updated
+    ), archived AS (
+        INSERT INTO offers_archive (id, component_id, store, price, link, last_updated)
+        SELECT id, component_id, store, price, link, last_updated FROM moved
+        ON CONFLICT (id) DO NOTHING
+    )
+    SELECT (SELECT count(*) FROM moved), (SELECT count(DISTINCT component_id) FROM moved)
+""")
+
+# Solo un worker limpia a la vez (los demás saltan esa vuelta)
+_LOCK_KEY = "lock:offer_sweeper"
+
+_sweeper_task: Optional["asyncio.Task"] = None
+_last_run: Optional[dict] = None
+
+
+def sweep_stale_offers(
+    horizon_hours: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None
+) -> dict:
+    """
+    Archiva las ofertas viejas en lotes hasta que no quede ninguna (o
+    'max_batches'). Devuelve cuántas filas y componentes se tocaron.
+    """
+    horizon_hours = horizon_hours or settings.OFFER_STALE_HORIZON_HOURS
+    batch_size = batch_size or settings.OFFER_SWEEP_BATCH_SIZE
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=horizon_hours)
+
+    started = time.perf_counter()
+    archived = components = batches = 0
+    while max_batches is None or batches < max_batches:
+        with engine.begin() as conn:
+            moved, touched = conn.execute(
+                _SWEEP_BATCH_SQL, {"cutoff": cutoff, "batch_size": batch_size}
+            ).one()
+        if not moved:
+            break
+        batches += 1
+        archived += moved
+        components += touched
+        if moved < batch_size:
+            break
+
+    if archived:
+        vacuum_offers()
+
+    return {
+        "archived_offers": archived,
+        "components_touched": components,
+        "batches": batches,
+        "cutoff": cutoff.isoformat(),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def vacuum_offers():
+    """
+    VACUUM (ANALYZE) de 'offers': el espacio de las filas borradas se
+    reutiliza y el planificador ve los nuevos tamaños. No bloquea
+    lecturas ni escrituras (no es VACUUM FULL).
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM (ANALYZE) offers")
+
+
+async def run_offer_sweep(**kwargs) -> dict:
+    """
+    Limpieza + invalidación de caché (si se archivó algo).
+    """
+    global _last_run
+    result = await run_in_threadpool(sweep_stale_offers, **kwargs)
+    if result["archived_offers"]:
+        # Mismo orden que el scraper: marca read-your-writes y luego
+        # nueva generación (la mejor oferta pudo cambiar en listas y detalles)
+        await mark_recent_write()
+        await bump_generation(COMPONENT_DETAIL_NS)
+        await bump_generation(COMPONENT_LIST_NS)
+        await warm_hot_keys()
+    _last_run = {**result, "finished_at": datetime.now(timezone.utc).isoformat()}
+    print(
+        f"Limpieza de ofertas: {result['archived_offers']} archivadas "
+        f"({result['components_touched']} componentes, {result['batches']} lotes) en {result['seconds']}s"
+    )
+    return result
+
+
+def get_sweeper_status() -> Optional[dict]:
+    # Última limpieza hecha por ESTE worker (None si no le ha tocado)
+    return _last_run
+
+
+async def _sweep_once():
+    client = cache_service._redis_client
+    if client is None:
+        # Sin Redis no hay coordinación, pero SKIP LOCKED evita que dos
+        # workers archiven la misma fila
+        await run_offer_sweep()
+        return
+    lock = client.lock(_LOCK_KEY, timeout=settings.OFFER_SWEEP_INTERVAL_SECONDS)
+    if not await lock.acquire(blocking=False):
+        return
+    # El lock NO se suelta al terminar: expira solo, así los demás
+    # workers no repiten la limpieza en esta misma vuelta
+    await run_offer_sweep()
+
+
+async def _sweep_loop():
+    while True:
+        await asyncio.sleep(settings.OFFER_SWEEP_INTERVAL_SECONDS)
+        try:
+            await _sweep_once()
+        except Exception as e:
+            print(f"Error en la limpieza de ofertas: {e}")
+
+
+async def start_offer_sweeper():
+    global _sweeper_task
+    if settings.OFFER_SWEEP_INTERVAL_SECONDS > 0 and _sweeper_task is None:
+        _sweeper_task = asyncio.create_task(_sweep_loop())
+
+
+async def stop_offer_sweeper():
+    global _sweeper_task
+    if _sweeper_task:
+        _sweeper_task.cancel()
+        try:
+            await _sweeper_task
+        except asyncio.CancelledError:
+            pass
+        _sweeper_task = None
+
+
+if __name__ == "__main__":
+    # A mano o desde cron: python -m app.services.offer_sweeper [horas]
+    import sys
+    from app.services.cache_service import init_redis, close_redis
+
+    async def main():
+        await init_redis()
+        try:
+            hours = int(sys.argv[1]) if len(sys.argv) > 1 else None
+            await run_offer_sweep(horizon_hours=hours)
+        finally:
+            await close_redis()
+
+    asyncio.run(main())
@@ -0,0 +1,233 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.config import settings
+from app.db.session import read_session_scope
+from app.models.component import Component
+from app.models.offer import Offer
+from app.models.price_stats import PriceStats
+from app.services.cache_service import get_or_compute, build_key, COMPONENT_LIST_NS
+
+# -------------------------------------------------------------------
+# Estadísticas de precio por categoría y por categoría + marca
+# -------------------------------------------------------------------
+# Después de cada scraping se calculan los percentiles (p10/p25/
+# mediana/p75/p90) de la MEJOR oferta de cada componente, con NumPy y
+# sin bucles por grupo, y se guardan en 'price_stats'. Cada worker
+# tiene la tabla en memoria: el 'deal_score' de una card es una
+# búsqueda en un dict y una interpolación entre 5 puntos.
+
+QUANTILES = np.array([0.10, 0.25, 0.50, 0.75, 0.90])
+_PERCENTILE_COLUMNS = ("p10", "p25", "p50", "p75", "p90")
+
+# (categoría, marca) -> (p10, p25, p50, p75, p90)
+Percentiles = Tuple[float, float, float, float, float]
+
+
+def _group_percentiles(group_index: np.ndarray, prices: np.ndarray, n_groups: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Percentiles de cada grupo (interpolación lineal, como
+    np.percentile) con UN solo ordenamiento: se ordena por (grupo,
+    precio) y cada percentil es una posición dentro del tramo del grupo.
+    Devuelve (conteos, matriz n_groups x len(QUANTILES)).
+    """
+    order = np.lexsort((prices, group_index))
+    sorted_prices = prices[order]
+    counts = np.bincount(group_index, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    positions = starts[:, None] + QUANTILES[None, :] * (counts[:, None] - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    fraction = positions - lower
+    values = sorted_prices[lower] * (1 - fraction) + sorted_prices[upper] * fraction
+    return counts, values
+
+
+def compute_price_stats(
+    categories: List[str],
+    brands: List[str],
+    prices: List[float],
+    min_samples: int
+) -> List[dict]:
+    """
+    Filas de 'price_stats' a partir de (categoría, marca, mejor precio)
+    de cada componente. Las de marca solo si tienen 'min_samples'.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    category_labels, category_index = np.unique(np.asarray(categories, dtype=object), return_inverse=True)
+    brand_labels, brand_index = np.unique(np.asarray(brands, dtype=object), return_inverse=True)
+
+    rows = []
+    # Categoría completa (brand = '')
+    counts, values = _group_percentiles(category_index, prices, len(category_labels))
+    for g, category in enumerate(category_labels):
+        rows.append(_stats_row(category, "", counts[g], values[g]))
+
+    # Categoría + marca: un código por par
+    pair_code = category_index * len(brand_labels) + brand_index
+    pair_labels, pair_index = np.unique(pair_code, return_inverse=True)
+    counts, values = _group_percentiles(pair_index, prices, len(pair_labels))
+    for g, code in enumerate(pair_labels):
+        brand = brand_labels[code % len(brand_labels)]
+        if brand and counts[g] >= min_samples:
+            rows.append(_stats_row(category_labels[code // len(brand_labels)], brand, counts[g], values[g]))
+    return rows
+
+
+def _stats_row(category: str, brand: str, count, values) -> dict:
+    row = {"category": category, "brand": brand, "sample_size": int(count)}
+    for column, value in zip(_PERCENTILE_COLUMNS, values):
+        row[column] = round(float(value), 2)
+    return row
+
+
+def build_price_stats(db: Session) -> int:
+    """
+    Recalcula 'price_stats' (se llama después de cada scraping).
+    Reemplaza la tabla en una transacción. Devuelve cuántas filas hay.
+    """
+    best_prices = (
+        db.query(
+            func.lower(Component.category),
+            func.lower(func.coalesce(Component.brand, "")),
+            func.min(Offer.price)
+        )
+        .join(Offer, Offer.component_id == Component.id)
+        .group_by(Component.id)
+        .all()
+    )
+    rows = []
+    if best_prices:
+        categories, brands, prices = zip(*best_prices)
+        rows = compute_price_stats(
+            list(categories), list(brands), [float(p) for p in prices],
+            min_samples=settings.PRICE_STATS_MIN_SAMPLES
+        )
+
+    db.query(PriceStats).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(PriceStats), rows)
+    db.commit()
+    return len(rows)
+
+
+# --- Deal score ---
+
+def deal_score(price: Optional[float], percentiles: Optional[Percentiles]) -> Optional[float]:
+    """
+    1 - rango percentil aproximado del precio (interpolación lineal
+    entre p10..p90): 1 = más barata que casi todas, 0.5 = en la mediana.
+    Misma fórmula que crud_component._deal_score_sql (ruta JSON en SQL).
+    """
+    if price is None or percentiles is None:
+        return None
+    price = float(price)
+    p10, p25, p50, p75, p90 = percentiles
+    if price <= p10:
+        rank = 0.10 * price / p10 if p10 > 0 else 0.0
+    elif price <= p25:
+        rank = 0.10 + 0.15 * (price - p10) / (p25 - p10)
+    elif price <= p50:
+        rank = 0.25 + 0.25 * (price - p25) / (p50 - p25)
+    elif price <= p75:
+        rank = 0.50 + 0.25 * (price - p50) / (p75 - p50)
+    elif price <= p90:
+        rank = 0.75 + 0.15 * (price - p75) / (p90 - p75)
+    elif p90 > p10:
+        rank = min(1.0, 0.90 + 0.10 * (price - p90) / (p90 - p10))
+    else:
+        rank = 1.0
+    return round(1.0 - rank, 3)
+
+
+class PriceStatsTable:
+    """
+    'price_stats' en memoria: (categoría, marca) en minúsculas ->
+    percentiles. La marca cae a la categoría si no tiene muestra.
+    """
+
+    def __init__(self, rows: List[dict]):
+        self.rows = rows
+        self._by_key: Dict[Tuple[str, str], Percentiles] = {
+            (row["category"], row["brand"]): tuple(float(row[c]) for c in _PERCENTILE_COLUMNS)
+            for row in rows
+        }
+
+    def percentiles(self, category: Optional[str], brand: Optional[str]) -> Optional[Percentiles]:
+        category = (category or "").lower()
+        found = self._by_key.get((category, (brand or "").lower()))
+        if found is None:
+            found = self._by_key.get((category, ""))
+        return found
+
+    def deal_score(self, category: Optional[str], brand: Optional[str], price) -> Optional[float]:
+        return deal_score(price, self.percentiles(category, brand))
+
+
+_EMPTY = PriceStatsTable([])
+# (clave de caché, tabla): se parsea una vez por generación
+_memo: Tuple[Optional[str], PriceStatsTable] = (None, _EMPTY)
+
+
+def _query_rows(db: Session) -> List[dict]:
+    stats = db.query(PriceStats).order_by(PriceStats.category, PriceStats.brand).all()
+    return [
+        {
+            "category": s.category,
+            "brand": s.brand,
+            "sample_size": s.sample_size,
+            **{c: str(getattr(s, c)) for c in _PERCENTILE_COLUMNS}
+        }
+        for s in stats
+    ]
+
+
+def load_price_stats(db: Session) -> PriceStatsTable:
+    # Directo de la DB, sin caché (scripts y benchmarks)
+    return PriceStatsTable(_query_rows(db))
+
+
+def _load_rows() -> bytes:
+    with read_session_scope() as db:
+        return orjson.dumps(_query_rows(db))
+
+
+async def get_price_stats() -> PriceStatsTable:
+    """
+    Tabla del worker. Se guarda en caché en el namespace de las listas
+    (el scraper la invalida junto con ellas) y se parsea solo cuando
+    cambia la generación.
+    """
+    global _memo
+    cache_key = await build_key(COMPONENT_LIST_NS, "price_stats")
+    if _memo[0] == cache_key:
+        return _memo[1]
+
+    async def compute():
+        return await run_in_threadpool(_load_rows), settings.CACHE_TTL_SECONDS
+
+    try:
+        body = await get_or_compute(cache_key, compute)
+    except Exception as e:
+        # Sin estadísticas las cards salen sin deal_score
+        print(f"Error cargando estadísticas de precio: {e}")
+        return _memo[1]
+    table = PriceStatsTable(orjson.loads(body)) if body else _EMPTY
+    _memo = (cache_key, table)
+    return table
+
+
+if __name__ == "__main__":
+    # Recalcular a mano: python -m app.services.price_stats
+    from app.db.session import session_scope
+
+    with session_scope() as session:
+        total = build_price_stats(session)
+    print(f"Estadísticas de precio: {total} grupos.")
@@ -0,0 +1,90 @@
+import time
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.services import cache_service
+
+# --- Read-your-writes con réplica de lectura ---
+# Tras una escritura, durante READ_YOUR_WRITES_SECONDS:
+#   - el usuario que escribió lee de la primaria (ve su reseña),
+#   - el componente tocado se lee de la primaria,
+#   - el catálogo ("catalog") también: los rellenos de caché que se
+#     hagan en esa ventana no deben guardar datos viejos de la réplica
+#     bajo la nueva generación.
+# Las marcas viven en Redis (compartidas entre workers) y en un dict
+# local (el worker que escribió no depende de Redis para verse).
+
+_PREFIX = "ryw"
+_CATALOG = "catalog"
+
+# marca -> monotonic hasta la que es válida (solo de este worker)
+_local_marks: Dict[str, float] = {}
+
+
+def _marks(user_id: Optional[str], component_id: Optional[int], catalog: bool) -> List[str]:
+    marks = []
+    if user_id:
+        marks.append(f"{_PREFIX}:user:{user_id}")
+    if component_id is not None:
+        marks.append(f"{_PREFIX}:component:{component_id}")
+    if catalog:
+        marks.append(f"{_PREFIX}:{_CATALOG}")
+    return marks
+
+
+def _replica_enabled() -> bool:
+    return bool(settings.COMPONENTS_REPLICA_DATABASE_URL)
+
+
+async def mark_recent_write(user_id: Optional[str] = None, component_id: Optional[int] = None):
+    """
+    Registra una escritura (siempre marca el catálogo). Llamar DESPUÉS
+    del commit y ANTES de invalidar la caché. Se marca aunque ESTE
+    proceso no tenga réplica (ej. el scraper): la API sí puede tenerla.
+    """
+    ttl = settings.READ_YOUR_WRITES_SECONDS
+    marks = _marks(user_id, component_id, catalog=True)
+    until = time.monotonic() + ttl
+    for mark in marks:
+        _local_marks[mark] = until
+
+    client = cache_service._redis_client
+    if client is None:
+        return
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            for mark in marks:
+                pipe.setex(mark, ttl, b"1")
+            await pipe.execute()
+    except Exception as e:
+        print(f"Error en Redis al marcar la escritura {marks}: {e}")
+
+
+async def use_primary(user_id: Optional[str] = None, component_id: Optional[int] = None, catalog: bool = False) -> bool:
+    """
+    ¿Esta lectura debe ir a la primaria? Un solo EXISTS en Redis con
+    todas las marcas que aplican.
+    """
+    if not _replica_enabled():
+        return False
+    marks = _marks(user_id, component_id, catalog)
+    if not marks:
+        return False
+
+    now = time.monotonic()
+    for mark in marks:
+        until = _local_marks.get(mark)
+        if until is not None:
+            if until > now:
+                return True
+            _local_marks.pop(mark, None)
+
+    client = cache_service._redis_client
+    if client is None:
+        return False
+    try:
+        return await client.exists(*marks) > 0
+    except Exception as e:
+        # Sin Redis no sabemos: la primaria es lo seguro
+        print(f"Error en Redis al consultar escrituras recientes: {e}")
+        return True
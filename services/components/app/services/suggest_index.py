@@ -0,0 +1,356 @@
+import asyncio
+import bisect
+import heapq
+import re
+import unicodedata
+from collections import defaultdict
+from itertools import accumulate, islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.crud import crud_component
+from app.db.session import read_session_scope
+from app.models.component import Component
+
+# -------------------------------------------------------------------
+# Índice de prefijos en memoria para autocompletar nombres
+# -------------------------------------------------------------------
+# Por cada token, sus componentes ordenados por popularidad; los tokens
+# van en una lista ORDENADA, así un prefijo es un rango de tokens que
+# se resuelve con bisect en O(log n) sin tocar Postgres. Se construye
+# al iniciar y se actualiza de forma incremental siguiendo
+# 'catalog_version' (asignada en orden de confirmación por
+# services/catalog_publisher) y las lápidas de los componentes borrados.
+#
+# Una consulta recorre SOLO el término más selectivo (el rango más
+# chico), en orden de popularidad, y se detiene al juntar 'limit'
+# componentes que también tengan los demás términos: los prefijos
+# comunes ("rt", "gef") no se materializan enteros.
+
+_TOKEN_SPLIT = re.compile(r"[^a-z0-9]+")
+_HAS_DIGIT = re.compile(r"\d")
+
+# Prefijos de 1-2 caracteres: su rango cubre miles de tokens. Para
+# consultas de un solo término se guarda su top por popularidad (se
+# calcula al primer uso y se descarta en cada actualización)
+_SHORT_PREFIX_LEN = 2
+_SHORT_PREFIX_TOP_K = 25  # = tope de 'limit' en GET /components/suggest
+
+# Varios términos comunes que casi nunca van juntos ("nvme pro ultra"):
+# si los _ORDERED_SCAN primeros candidatos en orden de popularidad no
+# alcanzan, se filtra el rango entero de una pasada (más barato que
+# seguir con el heap) y se ordenan solo las coincidencias
+_ORDERED_SCAN = 1_000
+
+
+def normalize_text(text: str) -> str:
+    # Minúsculas y sin acentos ("Núcleos" -> "nucleos")
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_SPLIT.split(normalize_text(text)) if t]
+
+
+def index_tokens(name: str) -> List[str]:
+    """
+    Tokens del nombre más variantes de números de modelo:
+    "RTX 4070" -> también "rtx4070"; "i5-12400F" -> también "i512400f".
+    """
+    tokens = tokenize(name)
+    extra = [
+        a + b for a, b in zip(tokens, tokens[1:])
+        if _HAS_DIGIT.search(a) or _HAS_DIGIT.search(b)
+    ]
+    return list(dict.fromkeys(tokens + extra))
+
+
+def _token_text(tokens: List[str]) -> str:
+    return " " + " ".join(tokens)
+
+
+def _rank(cid: int, name: str, popularity: int) -> Tuple[int, int, int]:
+    # Más reseñas primero; a igualdad, el nombre más corto
+    return (-popularity, len(name), cid)
+
+
+class SuggestIndex:
+    """
+    Inmutable una vez construido: los cambios producen un índice nuevo
+    (ver 'updated') que se reemplaza de una vez.
+    """
+
+    def __init__(self):
+        # token -> claves de orden (_rank) de sus componentes, ordenadas
+        self._postings: Dict[str, List[Tuple[int, int, int]]] = {}
+        # Tokens ordenados y suma acumulada del largo de sus listas
+        # (tamaño de un rango de prefijo en O(1))
+        self._tokens: List[str] = []
+        self._sizes: List[int] = [0]
+        # component_id -> (name, category, brand, popularity, " tok1 tok2 ...")
+        # (un token empieza por 't' si el texto contiene " t")
+        self._components: Dict[int, Tuple[str, str, Optional[str], int, str]] = {}
+        self.version = 0
+        # prefijo corto -> ids ordenados por popularidad (ver _short_top)
+        self._top_cache: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._components)
+
+    def _set_postings(self, postings: Dict[str, List[Tuple[int, int, int]]], tokens: Optional[List[str]] = None):
+        self._postings = postings
+        self._tokens = tokens if tokens is not None else sorted(postings)
+        self._sizes = [0, *accumulate(len(postings[token]) for token in self._tokens)]
+
+    @classmethod
+    def build(cls, rows, version: int) -> "SuggestIndex":
+        """
+        Construye el índice completo a partir de filas
+        (id, name, category, brand, popularity) leídas con la versión
+        publicada 'version'.
+        """
+        index = cls()
+        postings: Dict[str, List[Tuple[int, int, int]]] = defaultdict(list)
+        for cid, name, category, brand, popularity in rows:
+            popularity = popularity or 0
+            tokens = index_tokens(name)
+            index._components[cid] = (name, category, brand, popularity, _token_text(tokens))
+            rank = _rank(cid, name, popularity)
+            for token in tokens:
+                postings[token].append(rank)
+        for ranks in postings.values():
+            ranks.sort()
+        index._set_postings(dict(postings))
+        index.version = version
+        return index
+
+    def updated(self, rows, removed: List[int], version: int) -> "SuggestIndex":
+        """
+        Índice nuevo con los cambios incrementales (mismo formato que
+        build) y sin los componentes borrados, hasta 'version'. No
+        modifica este: las consultas en curso lo siguen usando.
+        Solo se rehacen las listas de los tokens afectados.
+        """
+        changed = set(removed)
+        changed.update(row[0] for row in rows)
+        components = dict(self._components)
+        touched = set()
+        for cid in changed:
+            old = components.pop(cid, None)
+            if old is not None:
+                touched.update(old[4].split())
+
+        added: Dict[str, List[Tuple[int, int, int]]] = defaultdict(list)
+        for cid, name, category, brand, popularity in rows:
+            popularity = popularity or 0
+            tokens = index_tokens(name)
+            components[cid] = (name, category, brand, popularity, _token_text(tokens))
+            rank = _rank(cid, name, popularity)
+            for token in tokens:
+                added[token].append(rank)
+        touched.update(added)
+
+        postings = dict(self._postings)
+        same_tokens = True
+        for token in touched:
+            ranks = [rank for rank in postings.get(token, ()) if rank[2] not in changed]
+            ranks.extend(added.get(token, ()))
+            if ranks:
+                ranks.sort()
+                same_tokens &= token in postings
+                postings[token] = ranks
+            elif postings.pop(token, None) is not None:
+                same_tokens = False
+
+        index = SuggestIndex()
+        index._components = components
+        index._set_postings(postings, self._tokens if same_tokens else None)
+        index.version = max(self.version, version)
+        return index
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        # Los tokens solo tienen [a-z0-9], todos menores que '\x7f'
+        start = bisect.bisect_left(self._tokens, prefix)
+        end = bisect.bisect_left(self._tokens, prefix + "\x7f", start)
+        return start, end
+
+    def _ranked_ids(self, start: int, end: int) -> Iterator[int]:
+        # Ids de un rango de tokens en orden de popularidad, sin repetir
+        # ("rtx" y "rtx4070" son del mismo componente). Un heap con la
+        # cabeza de cada lista: armarlo es un heapify (en C), aunque el
+        # rango tenga miles de tokens ("rtx4070", "rtx4060"...)
+        lists = [self._postings[token] for token in self._tokens[start:end]]
+        heap = [(ranks[0], i, 0) for i, ranks in enumerate(lists)]
+        heapq.heapify(heap)
+        seen = set()
+        while heap:
+            rank, i, pos = heap[0]
+            if rank[2] not in seen:
+                seen.add(rank[2])
+                yield rank[2]
+            pos += 1
+            if pos < len(lists[i]):
+                heapq.heapreplace(heap, (lists[i][pos], i, pos))
+            else:
+                heapq.heappop(heap)
+
+    def _filtered_top(self, start: int, end: int, others: List[str], limit: int) -> List[int]:
+        # Todo el rango sin orden, un término por pasada (cada pasada
+        # deja menos candidatos). Cada componente tiene una sola clave,
+        # así que el set quita los repetidos
+        components = self._components
+        matches = [rank for token in self._tokens[start:end] for rank in self._postings[token]]
+        for term in others:
+            matches = [rank for rank in matches if term in components[rank[2]][4]]
+        return [rank[2] for rank in heapq.nsmallest(limit, set(matches))]
+
+    def _short_top(self, prefix: str) -> List[int]:
+        top = self._top_cache.get(prefix)
+        if top is None:
+            top = list(islice(self._ranked_ids(*self._prefix_range(prefix)), _SHORT_PREFIX_TOP_K))
+            self._top_cache[prefix] = top
+        return top
+
+    def suggest(self, query: str, limit: int = 10) -> List[dict]:
+        """
+        Componentes cuyo nombre tiene un token que empieza por CADA
+        término de la consulta, ordenados por popularidad.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        if len(terms) == 1 and len(terms[0]) <= _SHORT_PREFIX_LEN and limit <= _SHORT_PREFIX_TOP_K:
+            ranked = self._short_top(terms[0])[:limit]
+        else:
+            # Se recorre el rango más chico; el resto se comprueba con
+            # los tokens de cada candidato
+            ranges = []
+            for term in terms:
+                start, end = self._prefix_range(term)
+                ranges.append((self._sizes[end] - self._sizes[start], start, end, term))
+            ranges.sort()
+            size, start, end, _term = ranges[0]
+            others = [" " + term for _size, _start, _end, term in ranges[1:]]
+            ranked = []
+            if size:
+                for scanned, cid in enumerate(self._ranked_ids(start, end), 1):
+                    if all(term in self._components[cid][4] for term in others):
+                        ranked.append(cid)
+                        if len(ranked) == limit:
+                            break
+                    if scanned == _ORDERED_SCAN:
+                        ranked = self._filtered_top(start, end, others, limit)
+                        break
+
+        return [
+            {
+                "id": cid,
+                "name": self._components[cid][0],
+                "category": self._components[cid][1],
+                "brand": self._components[cid][2],
+            }
+            for cid in ranked
+        ]
+
+
+# --- Instancia del worker y su refresco en segundo plano ---
+
+# Más filas cambiadas que esto: se reconstruye entero
+_MAX_INCREMENTAL_ROWS = 500
+
+_index = SuggestIndex()
+_refresh_task: Optional["asyncio.Task"] = None
+
+
+def get_suggest_index() -> SuggestIndex:
+    return _index
+
+
+def _load_rows(since_version: Optional[int] = None):
+    """
+    (versión publicada, filas, ids borrados). La versión se lee ANTES
+    que las filas: lo que se publique entremedio tiene versiones mayores
+    y entra en el próximo refresco.
+    """
+    # Popularidad = número de reseñas
+    with read_session_scope() as db:
+        version = crud_component.get_catalog_version(db)
+        query = db.query(
+            Component.id,
+            Component.name,
+            Component.category,
+            Component.brand,
+            Component.rating_count
+        )
+        removed: List[int] = []
+        if since_version is not None:
+            query = query.filter(
+                Component.catalog_version > since_version,
+                Component.catalog_version <= version
+            )
+            if version > since_version:
+                removed = crud_component.get_catalog_tombstones(db, since_version, version)
+        return version, query.order_by(Component.catalog_version).all(), removed
+
+
+async def build_suggest_index():
+    """
+    Construye el índice desde la DB (al iniciar el servicio).
+    """
+    global _index
+    version, rows, _ = await run_in_threadpool(_load_rows)
+    _index = await run_in_threadpool(SuggestIndex.build, rows, version)
+    print(f"Índice de sugerencias listo: {len(_index)} componentes (versión {_index.version}).")
+
+
+async def refresh_suggest_index():
+    """
+    Incorpora solo los cambios con catalog_version mayor al índice.
+    """
+    global _index
+    version, rows, removed = await run_in_threadpool(_load_rows, _index.version)
+    if not rows and not removed:
+        _index.version = max(_index.version, version)
+        return
+    # Muchos cambios (ej. un scraping completo): reconstruir es más barato
+    # que rehacer lista por lista
+    if len(rows) > _MAX_INCREMENTAL_ROWS:
+        await build_suggest_index()
+        return
+    # Fuera del event loop; las consultas usan el índice anterior hasta
+    # que se reemplaza
+    _index = await run_in_threadpool(_index.updated, rows, removed, version)
+
+
+async def _refresh_loop():
+    while True:
+        await asyncio.sleep(settings.SUGGEST_REFRESH_SECONDS)
+        try:
+            await refresh_suggest_index()
+        except Exception as e:
+            print(f"Error refrescando el índice de sugerencias: {e}")
+
+
+async def start_suggest_index():
+    global _refresh_task
+    try:
+        await build_suggest_index()
+    except Exception as e:
+        print(f"Error construyendo el índice de sugerencias: {e}")
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_loop())
+
+
+async def stop_suggest_index():
+    global _refresh_task
+    if _refresh_task:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
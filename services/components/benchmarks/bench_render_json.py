@@ -0,0 +1,115 @@
+"""
+Compara las dos rutas de lectura de lista y detalle:
+  - ORM: objetos SQLAlchemy -> Pydantic -> dump_json
+  - SQL: Postgres arma el JSON (json_build_object / json_agg)
+
+Casos: página de 20 y de 100 cards, y el detalle más "pesado" (el
+componente con más reseñas). Sin caché: mide solo DB + render.
+
+Uso (desde services/components, con la DB del servicio):
+    python -m benchmarks.bench_render_json --iterations 200
+"""
+import argparse
+import statistics
+import time
+
+import orjson
+
+from app.db.session import session_scope
+from app.models.component import Component
+from app.crud import crud_component
+from app.services.cache_service import dump_json
+from app.services.price_stats import load_price_stats
+
+
+def _orm_list(page_size):
+    def run(db):
+        # Igual que el endpoint: con deal_score (la ruta SQL lo calcula con un JOIN)
+        price_stats = load_price_stats(db)
+        return dump_json(crud_component.get_components_paginated(db=db, page_size=page_size, price_stats=price_stats))
+    return run
+
+
+def _sql_list(page_size):
+    def run(db):
+        return crud_component.get_components_paginated_json(db=db, page_size=page_size)[0]
+    return run
+
+
+def _orm_detail(component_id):
+    def run(db):
+        return dump_json(crud_component.get_component_by_id(db=db, component_id=component_id))
+    return run
+
+
+def _sql_detail(component_id):
+    def run(db):
+        return crud_component.get_component_detail_json(db=db, component_id=component_id)
+    return run
+
+
+def _measure(run, iterations, warmup):
+    timings = []
+    body = b""
+    with session_scope() as db:
+        for i in range(warmup + iterations):
+            start = time.perf_counter()
+            body = run(db)
+            elapsed = (time.perf_counter() - start) * 1000
+            if i >= warmup:
+                timings.append(elapsed)
+    timings.sort()
+    return {
+        "mean_ms": statistics.fmean(timings),
+        "p50_ms": timings[len(timings) // 2],
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "bytes": len(body),
+        "body": body,
+    }
+
+
+def _same_content(a: bytes, b: bytes) -> bool:
+    # Ambas rutas deben devolver el mismo documento (mismo orden de
+    # ofertas/reseñas/comentarios y mismas fechas, en UTC con 'Z');
+    # solo puede cambiar el orden de las claves
+    return orjson.loads(a) == orjson.loads(b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ORM vs JSON en SQL (lista y detalle)")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=10)
+    args = parser.parse_args()
+
+    with session_scope() as db:
+        heavy = (
+            db.query(Component.id, Component.rating_count)
+            .order_by(Component.rating_count.desc(), Component.id)
+            .first()
+        )
+    if heavy is None:
+        print("No hay componentes en la DB.")
+        return
+
+    cases = [
+        ("lista page_size=20", _orm_list(20), _sql_list(20)),
+        ("lista page_size=100", _orm_list(100), _sql_list(100)),
+        (f"detalle id={heavy.id} ({heavy.rating_count} reseñas)", _orm_detail(heavy.id), _sql_detail(heavy.id)),
+    ]
+
+    print(f"{'caso':<40} {'ruta':<4} {'media':>9} {'p50':>9} {'p95':>9} {'bytes':>9}")
+    for name, orm_run, sql_run in cases:
+        orm = _measure(orm_run, args.iterations, args.warmup)
+        sql = _measure(sql_run, args.iterations, args.warmup)
+        for label, result in (("orm", orm), ("sql", sql)):
+            print(
+                f"{name:<40} {label:<4} {result['mean_ms']:>7.2f}ms {result['p50_ms']:>7.2f}ms "
+                f"{result['p95_ms']:>7.2f}ms {result['bytes']:>9}"
+            )
+        speedup = orm["mean_ms"] / sql["mean_ms"] if sql["mean_ms"] else float("inf")
+        check = "OK" if _same_content(orm["body"], sql["body"]) else "DIFERENTE"
+        print(f"{'':<40} x{speedup:.2f} (mismo contenido: {check})")
+
+
+if __name__ == "__main__":
+    main()
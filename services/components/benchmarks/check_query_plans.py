@@ -0,0 +1,297 @@
+"""
+Regresiones de planes de ejecución de las consultas calientes del
+servicio de componentes (lista, filtros, búsqueda, detalle, reseñas,
+consulta en bloque y delta-sync).
+
+Cada caso ejecuta la función REAL de crud_component / crud_review,
+captura las sentencias SQL que emite (con sus parámetros) y corre
+EXPLAIN (FORMAT JSON) sobre cada una. Se comprueba:
+  - que se usen los índices esperados (ej. la búsqueda ILIKE debe usar
+    el GIN de trigramas idx_components_name_trgm),
+  - que no haya Seq Scan sobre las tablas indicadas,
+  - un tope de filas estimadas por nodo de lectura (los accesos por id
+    no deben leer tablas enteras),
+  - un tope FIJO de costo total estimado por caso (max_cost, pensado
+    para el catálogo sembrado por defecto; --cost-scale lo ajusta si se
+    siembra otro tamaño),
+  - opcionalmente, el costo contra una línea base local
+    (query_plans_baseline.json, --update-baseline), con una tolerancia.
+
+Sale con código 1 si algo falla (para CI). No es pytest: el repo no
+tiene suite de tests; se corre contra una DB de pruebas.
+
+Uso (desde services/components, con infra/docker/docker-compose.bench.yml):
+    # Sembrar un catálogo representativo (BORRA la DB) y comprobar
+    python -m benchmarks.check_query_plans --seed --reset
+    # Comprobar contra la DB ya sembrada
+    python -m benchmarks.check_query_plans
+    # Aceptar los costos actuales como nueva línea base
+    python -m benchmarks.check_query_plans --update-baseline
+"""
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.db.session import engine, session_scope
+from app.models.component import Component
+from app.crud import crud_component, crud_review
+from benchmarks.generate_data import seed_catalog
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "query_plans_baseline.json")
+
+# Nodos que leen filas de una tabla
+_SCAN_NODES = {"Seq Scan", "Index Scan", "Index Only Scan", "Bitmap Heap Scan"}
+
+
+@dataclass
+class PlanCase:
+    name: str
+    run: Callable[[Session], Any]
+    # Cada tupla: al menos UNO de esos índices debe aparecer en algún plan
+    require_indexes: Tuple[Tuple[str, ...], ...] = ()
+    # Tablas que no pueden leerse con Seq Scan
+    no_seq_scan: Tuple[str, ...] = ()
+    # Máximo de filas estimadas en cualquier nodo de lectura
+    max_scan_rows: Optional[float] = None
+    # Tope del costo total estimado (suma de las sentencias) con el
+    # catálogo por defecto; son órdenes de magnitud, no mediciones:
+    # detectan un Seq Scan o un join que explota, no un 10% más
+    max_cost: Optional[float] = None
+
+
+@dataclass
+class PlanResult:
+    statements: int = 0
+    total_cost: float = 0.0
+    max_scan_rows: float = 0.0
+    indexes: set = field(default_factory=set)
+    seq_scans: set = field(default_factory=set)
+    failures: List[str] = field(default_factory=list)
+
+
+def _capture(run: Callable[[Session], Any]) -> List[Tuple[str, Any]]:
+    """
+    Ejecuta 'run' y devuelve las sentencias SELECT que emitió.
+    """
+    captured: List[Tuple[str, Any]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        with session_scope() as db:
+            run(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def _explain(statement: str, parameters) -> dict:
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def _walk(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _walk(child)
+
+
+def check_case(case: PlanCase, baseline: Optional[dict], tolerance: float, cost_scale: float = 1.0) -> PlanResult:
+    result = PlanResult()
+    for statement, parameters in _capture(case.run):
+        plan = _explain(statement, parameters)
+        result.statements += 1
+        result.total_cost += plan["Total Cost"]
+        for node in _walk(plan):
+            if "Index Name" in node:
+                result.indexes.add(node["Index Name"])
+            if node["Node Type"] == "Seq Scan":
+                result.seq_scans.add(node["Relation Name"])
+            if node["Node Type"] in _SCAN_NODES:
+                result.max_scan_rows = max(result.max_scan_rows, node["Plan Rows"])
+
+    for options in case.require_indexes:
+        if not result.indexes & set(options):
+            result.failures.append(f"no usa ninguno de {list(options)}")
+    for table in case.no_seq_scan:
+        if table in result.seq_scans:
+            result.failures.append(f"Seq Scan sobre '{table}'")
+    if case.max_scan_rows is not None and result.max_scan_rows > case.max_scan_rows:
+        result.failures.append(
+            f"lee ~{result.max_scan_rows:.0f} filas en un nodo (tope {case.max_scan_rows:.0f})"
+        )
+    if case.max_cost is not None and result.total_cost > case.max_cost * cost_scale:
+        result.failures.append(f"costo {result.total_cost:.0f} > tope {case.max_cost * cost_scale:.0f}")
+    if baseline and case.name in baseline:
+        limit = baseline[case.name]["total_cost"] * (1 + tolerance)
+        if result.total_cost > limit:
+            result.failures.append(
+                f"costo {result.total_cost:.0f} > {limit:.0f} (línea base {baseline[case.name]['total_cost']:.0f})"
+            )
+    return result
+
+
+def build_cases() -> List[PlanCase]:
+    """
+    Casos con parámetros tomados de los datos (un componente con
+    bastantes reseñas, una categoría + marca existente, etc.).
+    """
+    with session_scope() as db:
+        total = db.query(func.count(Component.id)).scalar()
+        if not total:
+            raise SystemExit("No hay componentes: siembra la DB con --seed --reset.")
+        # Componente "popular" (p95 de reseñas), no el extremo
+        busy = (
+            db.query(Component.id)
+            .order_by(Component.rating_count.desc(), Component.id)
+            .offset(max(0, total // 20 - 1))
+            .limit(1)
+            .scalar()
+        )
+        category, brand = (
+            db.query(func.lower(Component.category), func.lower(Component.brand))
+            .filter(Component.brand.isnot(None))
+            .group_by(func.lower(Component.category), func.lower(Component.brand))
+            .order_by(func.count().desc())
+            .first()
+        )
+        version = crud_component.get_catalog_version(db)
+        batch_ids = [row.id for row in db.query(Component.id).order_by(Component.id).limit(50)]
+
+    # Lecturas por id: nunca deberían estimar más de esto en un nodo
+    point_rows = 20_000
+    # Topes de costo (catálogo por defecto: 20k componentes, 200k
+    # ofertas, 60k reseñas). Las listas pagan la mejor oferta de cada
+    # componente (ventana sobre 'offers'); las lecturas por id, unas
+    # pocas páginas de índice
+    list_cost = 300_000
+    point_cost = 2_000
+
+    return [
+        PlanCase(
+            "lista (sin filtros)",
+            lambda db: crud_component.get_components_paginated(db),
+            max_cost=list_cost
+        ),
+        PlanCase(
+            "lista categoría + marca",
+            lambda db: crud_component.get_components_paginated(db, category=category, brand=brand),
+            require_indexes=(("idx_components_category_lower", "idx_components_brand_lower"),),
+            no_seq_scan=("components",),
+            max_cost=list_cost
+        ),
+        PlanCase(
+            "búsqueda 'rtx 4070'",
+            lambda db: crud_component.get_components_paginated(db, search="rtx 4070"),
+            require_indexes=(("idx_components_name_trgm",),),
+            no_seq_scan=("components",),
+            max_cost=list_cost
+        ),
+        PlanCase(
+            "lista json categoría + marca",
+            lambda db: crud_component.get_components_paginated_json(db, category=category, brand=brand),
+            require_indexes=(("idx_components_category_lower", "idx_components_brand_lower"),),
+            no_seq_scan=("components",),
+            max_cost=list_cost
+        ),
+        PlanCase(
+            f"detalle id={busy}",
+            lambda db: crud_component.get_component_by_id(db, busy),
+            require_indexes=(("components_pkey",), ("unique_offer_per_store",), ("idx_reviews_component_created",)),
+            no_seq_scan=("components", "offers", "reviews", "comments"),
+            max_scan_rows=point_rows,
+            max_cost=point_cost
+        ),
+        PlanCase(
+            f"detalle json id={busy}",
+            lambda db: crud_component.get_component_detail_json(db, busy),
+            require_indexes=(("components_pkey",), ("unique_offer_per_store",), ("idx_reviews_component_created",)),
+            no_seq_scan=("components", "offers", "reviews", "comments"),
+            max_scan_rows=point_rows,
+            max_cost=point_cost
+        ),
+        PlanCase(
+            f"reseñas id={busy}",
+            lambda db: crud_review.get_reviews_paginated(db, busy),
+            require_indexes=(("idx_reviews_component_created",),),
+            no_seq_scan=("components", "reviews", "comments"),
+            max_scan_rows=point_rows,
+            max_cost=point_cost
+        ),
+        PlanCase(
+            "batch 50 ids",
+            lambda db: crud_component.get_components_by_ids(db, batch_ids),
+            require_indexes=(("components_pkey",),),
+            no_seq_scan=("components", "reviews", "comments"),
+            max_scan_rows=point_rows,
+            # 50 detalles: ofertas, reseñas recientes y comentarios en bloque
+            max_cost=50 * point_cost
+        ),
+        PlanCase(
+            "cambios desde version-100",
+            lambda db: crud_component.get_catalog_cards(db, since_version=max(0, version - 100), limit=500),
+            require_indexes=(("ix_components_catalog_version",),),
+            no_seq_scan=("components",),
+            max_cost=list_cost
+        ),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regresiones de planes de ejecución (EXPLAIN)")
+    parser.add_argument("--seed", action="store_true", help="Sembrar un catálogo representativo antes de comprobar")
+    parser.add_argument("--reset", action="store_true", help="Con --seed: vaciar las tablas (solo en una DB de pruebas)")
+    parser.add_argument("--components", type=int, default=20_000)
+    parser.add_argument("--offers", type=int, default=200_000)
+    parser.add_argument("--reviews", type=int, default=60_000)
+    parser.add_argument("--cost-scale", type=float, default=1.0, help="Multiplica los topes de costo (ej. 5 con un catálogo 5x más grande)")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Margen sobre el costo de la línea base (0.5 = +50%%)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Guardar los costos actuales como línea base")
+    args = parser.parse_args()
+
+    if args.seed and not seed_catalog(args.components, args.offers, args.reviews, 1.5, 42, args.reset):
+        sys.exit(1)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    elif not args.update_baseline:
+        print(f"Sin línea base ({args.baseline}): solo se comprueban los topes fijos de costo.\n")
+
+    failed = 0
+    costs: Dict[str, dict] = {}
+    print(f"{'caso':<34} {'sql':>4} {'costo':>12} {'filas máx':>10}  resultado")
+    for case in build_cases():
+        result = check_case(case, baseline, args.tolerance, args.cost_scale)
+        costs[case.name] = {"total_cost": round(result.total_cost, 2), "max_scan_rows": result.max_scan_rows}
+        status = "OK" if not result.failures else "FALLA: " + "; ".join(result.failures)
+        failed += bool(result.failures)
+        print(f"{case.name:<34} {result.statements:>4} {result.total_cost:>12.0f} {result.max_scan_rows:>10.0f}  {status}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(costs, f, indent=2, ensure_ascii=False)
+        print(f"\nLínea base guardada en {args.baseline}")
+
+    if failed:
+        print(f"\n{failed} caso(s) con regresiones de plan.")
+        sys.exit(1)
+    print("\nTodos los planes dentro de lo esperado.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Genera un catálogo sintético a escala (por defecto 100k componentes y
+1M de ofertas) para las pruebas de carga del servicio de componentes.
+
+- Categorías y marcas como las del scraper, con nombres "realistas"
+  (línea + número de modelo + specs) para que la búsqueda tenga sentido.
+- Ofertas con distribución sesgada (Pareto): pocos componentes con
+  muchas ofertas, muchos con pocas y algunos sin ninguna.
+- Reseñas concentradas en los componentes populares, con comentarios.
+
+Los datos se cargan con COPY (en bloques) y después se recalculan los
+agregados de rating, se publican las versiones de catálogo, las
+estadísticas (ANALYZE) y los percentiles de precio por categoría/marca (price_stats).
+Es reproducible: misma semilla, mismo catálogo.
+
+Uso (desde services/components, contra una DB DE PRUEBAS):
+    python -m benchmarks.generate_data --reset
+    python -m benchmarks.generate_data --reset --components 10000 --offers 100000
+"""
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app.db.session import engine, init_db, session_scope, BACKFILL_RATING_AGGREGATES_SQL
+from app.services.price_stats import build_price_stats
+from app.services.catalog_publisher import publish_catalog_changes
+
+# categoría -> (marcas, líneas, specs posibles, precio base)
+CATALOG = {
+    "CPU": (["Intel", "AMD"], ["Core i3", "Core i5", "Core i7", "Core i9", "Ryzen 5", "Ryzen 7", "Ryzen 9"],
+            ["6 Cores 4.4GHz", "8 Cores 5.0GHz", "12 Cores 5.2GHz", "16 Cores 5.7GHz"], 4500),
+    "GPU": (["ASUS", "MSI", "Gigabyte", "Zotac", "Sapphire", "PNY", "XFX"], ["RTX 4060", "RTX 4070", "RTX 4080", "RX 7600", "RX 7800 XT", "RX 7900 XTX"],
+            ["8GB GDDR6", "12GB GDDR6X", "16GB GDDR6", "24GB GDDR6X"], 9000),
+    "RAM": (["Corsair", "Kingston", "G.Skill", "Crucial", "TeamGroup", "ADATA"], ["Vengeance", "Fury Beast", "Trident Z5", "Ballistix", "T-Force Delta"],
+            ["16GB DDR4 3200MHz", "32GB (2x16GB) DDR5 6000MHz", "64GB DDR5 5600MHz"], 1500),
+    "Motherboard": (["ASUS", "MSI", "Gigabyte", "ASRock"], ["B650", "X670E", "B760", "Z790", "A620"],
+                    ["ATX", "Micro ATX", "Mini ITX", "WiFi ATX"], 3500),
+    "SSD": (["Samsung", "WD", "Kingston", "Crucial", "Sabrent"], ["990 Pro", "SN850X", "KC3000", "P5 Plus", "Rocket 4"],
+            ["500GB NVMe", "1TB NVMe", "2TB NVMe", "4TB NVMe"], 1800),
+    "HDD": (["Seagate", "WD", "Toshiba"], ["Barracuda", "Blue", "IronWolf", "Red Plus"],
+            ["1TB 7200RPM", "2TB 5400RPM", "4TB 5400RPM", "8TB 7200RPM"], 1400),
+    "PSU": (["Corsair", "EVGA", "Seasonic", "Thermaltake", "Cooler Master"], ["RM", "SuperNOVA", "Focus GX", "Toughpower", "MWE Gold"],
+            ["650W 80+ Gold", "750W 80+ Gold", "850W 80+ Platinum", "1000W 80+ Titanium"], 2000),
+    "Cooling": (["Noctua", "Cooler Master", "Arctic", "NZXT", "Corsair"], ["NH-D15", "Hyper 212", "Liquid Freezer II", "Kraken", "iCUE H150i"],
+                ["120mm", "240mm AIO", "280mm AIO", "360mm AIO"], 1300),
+    "Gabinete": (["NZXT", "Lian Li", "Corsair", "Fractal Design"], ["H5 Flow", "O11 Dynamic", "4000D", "North"],
+                 ["Mid Tower", "Full Tower", "Mini Tower"], 1900),
+}
+STORES = ["Amazon", "MercadoLibre", "Cyberpuerta", "DDTech", "PCEL", "Liverpool"]
+
+# Filas por cada COPY
+_COPY_BLOCK = 100_000
+
+
+def _copy(cursor, table: str, columns, rows):
+    """
+    COPY ... FROM STDIN en bloques de _COPY_BLOCK filas.
+    """
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % _COPY_BLOCK == 0:
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+    return count
+
+
+def _skewed_counts(rng: random.Random, n: int, total: int, alpha: float, zero_share: float):
+    """
+    Reparte 'total' entre n elementos con pesos Pareto(alpha); una
+    fracción 'zero_share' no recibe nada.
+    """
+    weights = [0.0 if rng.random() < zero_share else rng.paretovariate(alpha) for _ in range(n)]
+    scale = total / (sum(weights) or 1.0)
+    counts = []
+    for w in weights:
+        exact = w * scale
+        whole = int(exact)
+        counts.append(whole + (1 if rng.random() < exact - whole else 0))
+    return counts
+
+
+def generate(components: int, offers: int, reviews: int, comments_per_review: float, seed: int):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    categories = list(CATALOG)
+
+    # --- Componentes (ids 1..N) ---
+    component_rows = []
+    base_prices = []
+    # (name, brand, category) es única en 'components'
+    seen = set()
+    for cid in range(1, components + 1):
+        category = rng.choice(categories)
+        brands, lines, specs, base_price = CATALOG[category]
+        brand = rng.choice(brands)
+        name = None
+        while name is None or name in seen:
+            name = f"{brand} {rng.choice(lines)} {rng.randint(100, 99999)} {rng.choice(specs)}"
+        seen.add(name)
+        component_rows.append((
+            cid, name, category, brand,
+            f"https://img.example.com/components/{cid}.jpg",
+            f"{name}. Componente sintético para pruebas de carga."
+        ))
+        base_prices.append(base_price * rng.lognormvariate(0, 0.5))
+
+    # --- Ofertas: sesgadas, ~5% de componentes sin ofertas ---
+    offer_counts = _skewed_counts(rng, components, offers, alpha=1.3, zero_share=0.05)
+
+    def offer_rows():
+        oid = 0
+        for index, count in enumerate(offer_counts):
+            cid = index + 1
+            for _ in range(count):
+                oid += 1
+                price = round(base_prices[index] * rng.uniform(0.85, 1.25), 2)
+                yield (
+                    oid, cid, rng.choice(STORES), f"{price:.2f}",
+                    f"https://shop.example.com/p/{cid}/{oid}",
+                    (now - timedelta(hours=rng.randint(0, 24 * 30))).isoformat()
+                )
+
+    # --- Reseñas: ~15% de componentes, muy concentradas ---
+    review_counts = _skewed_counts(rng, components, reviews, alpha=1.1, zero_share=0.85)
+    comment_counts = []
+
+    def review_rows():
+        rid = 0
+        for index, count in enumerate(review_counts):
+            for _ in range(count):
+                rid += 1
+                user = rng.randint(1, 50_000)
+                comment_counts.append(min(50, int(rng.expovariate(1 / comments_per_review))) if comments_per_review else 0)
+                yield (
+                    rid, index + 1, rng.choices([1, 2, 3, 4, 5], weights=[5, 5, 15, 35, 40])[0],
+                    "Reseña de prueba", "Contenido sintético " * rng.randint(1, 20),
+                    f"bench-user-{user}", f"usuario{user}",
+                    (now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))).isoformat()
+                )
+
+    def comment_rows():
+        cmid = 0
+        for index, count in enumerate(comment_counts):
+            for _ in range(count):
+                cmid += 1
+                user = rng.randint(1, 50_000)
+                yield (
+                    cmid, index + 1, "Comentario sintético",
+                    f"bench-user-{user}", f"usuario{user}",
+                    (now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))).isoformat()
+                )
+
+    return component_rows, offer_rows, review_rows, comment_rows
+
+
+def seed_catalog(components: int, offers: int, reviews: int, comments_per_review: float, seed: int, reset: bool) -> bool:
+    """
+    Genera y carga el catálogo. Devuelve False si la DB ya tenía datos
+    y no se pidió 'reset'.
+    """
+    init_db()
+    started = time.perf_counter()
+    component_rows, offer_rows, review_rows, comment_rows = generate(
+        components, offers, reviews, comments_per_review, seed
+    )
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT count(*) FROM components")
+        if cursor.fetchone()[0] and not reset:
+            print("La tabla 'components' no está vacía: usa --reset (solo en una DB de pruebas).")
+            return False
+        if reset:
+            cursor.execute(
+                "TRUNCATE components, offers, offers_archive, reviews, comments, component_alternatives, price_stats, "
+                "catalog_changes "
+                "RESTART IDENTITY CASCADE"
+            )
+
+        n = _copy(cursor, "components", ("id", "name", "category", "brand", "image_url", "description"), component_rows)
+        print(f"components: {n}")
+        n = _copy(cursor, "offers", ("id", "component_id", "store", "price", "link", "last_updated"), offer_rows())
+        print(f"offers: {n}")
+        n = _copy(cursor, "reviews", ("id", "component_id", "rating", "title", "content", "user_id", "user_username", "created_at"), review_rows())
+        print(f"reviews: {n}")
+        n = _copy(cursor, "comments", ("id", "review_id", "content", "user_id", "user_username", "created_at"), comment_rows())
+        print(f"comments: {n}")
+
+        # Los ids se insertaron explícitos: alineamos las secuencias
+        for table in ("components", "offers", "reviews", "comments"):
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(max(id), 1)) FROM {table}"
+            )
+        connection.commit()
+    finally:
+        connection.close()
+
+    # Agregados rating_sum / rating_count (mismo backfill que al migrar)
+    with engine.begin() as conn:
+        conn.execute(text(BACKFILL_RATING_AGGREGATES_SQL))
+    # Versiones de catálogo de lo cargado (los triggers lo dejaron pendiente)
+    publish_catalog_changes()
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    # Percentiles de precio (deal_score), como después de un scraping
+    with session_scope() as db:
+        build_price_stats(db)
+
+    print(f"Catálogo generado en {time.perf_counter() - started:.1f}s (semilla {seed}).")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catálogo sintético para pruebas de carga")
+    parser.add_argument("--components", type=int, default=100_000)
+    parser.add_argument("--offers", type=int, default=1_000_000)
+    parser.add_argument("--reviews", type=int, default=300_000)
+    parser.add_argument("--comments-per-review", type=float, default=1.5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="Vaciar las tablas antes de generar")
+    args = parser.parse_args()
+
+    seed_catalog(args.components, args.offers, args.reviews, args.comments_per_review, args.seed, args.reset)
+
+
+if __name__ == "__main__":
+    main()
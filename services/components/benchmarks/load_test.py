@@ -0,0 +1,242 @@
+"""
+Prueba de carga del servicio de componentes (lista, filtros, búsqueda
+y detalle) con una mezcla de parámetros realista.
+
+Fases:
+  - cold: se invalida la caché (nueva generación de los namespaces de
+    lista y detalle, igual que bump_generation) y se lanza la secuencia.
+  - warm: se repite EXACTAMENTE la misma secuencia con la caché llena.
+
+Reporta p50/p95/p99, media y throughput por fase y por tipo de
+petición, y guarda todo en JSON (con el commit) para comparar entre
+versiones con --compare.
+
+No importa 'app': solo necesita httpx, redis y orjson
+(benchmarks/requirements.txt).
+
+Uso (con infra/docker/docker-compose.bench.yml levantado):
+    python -m benchmarks.load_test --requests 5000 --concurrency 32
+    python -m benchmarks.load_test --compare benchmarks/results/<anterior>.json
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import orjson
+import redis.asyncio as redis
+
+# Mezcla de peticiones: tipo -> peso
+MIX = {"list": 0.30, "filter": 0.25, "search": 0.15, "detail": 0.30}
+
+CATEGORIES = ["CPU", "GPU", "RAM", "Motherboard", "SSD", "HDD", "PSU", "Cooling", "Gabinete"]
+BRANDS = ["Intel", "AMD", "ASUS", "MSI", "Gigabyte", "Corsair", "Kingston", "Samsung", "WD", "Seagate"]
+SEARCH_TERMS = ["rtx", "rtx 4070", "ryzen 7", "core i5", "ddr5", "32gb", "nvme", "1tb", "850w", "aio", "b650", "z790"]
+SORTS = ["price_asc", "price_asc", "price_desc", "rating"]
+
+# Igual que cache_service (bump_generation): nueva generación + aviso
+# a los workers para que descarten su nivel en memoria
+_NAMESPACES = ("components", "component_detail")
+_INVALIDATION_CHANNEL = "cache_invalidation"
+
+Request = Tuple[str, str, Dict[str, str]]
+
+
+def _page(rng: random.Random) -> int:
+    # La mayoría de las visitas son a las primeras páginas
+    return min(50, int(rng.expovariate(0.7)) + 1)
+
+
+def build_requests(rng: random.Random, count: int, max_id: int) -> List[Request]:
+    """
+    Secuencia determinista de (tipo, ruta, params).
+    """
+    kinds = list(MIX)
+    weights = [MIX[k] for k in kinds]
+    requests: List[Request] = []
+    for kind in rng.choices(kinds, weights=weights, k=count):
+        if kind == "list":
+            params = {"page": _page(rng), "page_size": rng.choice([20, 20, 20, 50, 100]), "sort_by": rng.choice(SORTS)}
+            requests.append((kind, "/", params))
+        elif kind == "filter":
+            params = {"category": rng.choice(CATEGORIES), "page": _page(rng), "sort_by": rng.choice(SORTS)}
+            if rng.random() < 0.4:
+                params["brand"] = rng.choice(BRANDS)
+            if rng.random() < 0.4:
+                low = rng.choice([0, 500, 1000, 2000, 5000])
+                params["min_price"] = low
+                params["max_price"] = low * 3 + 1000
+            if rng.random() < 0.2:
+                params["min_rating"] = rng.choice([3, 4, 4.5])
+            requests.append((kind, "/", params))
+        elif kind == "search":
+            params = {"search": rng.choice(SEARCH_TERMS), "page": _page(rng)}
+            requests.append((kind, "/", params))
+        else:
+            # Popularidad sesgada: ids bajos (Pareto) más visitados
+            cid = min(max_id, int(rng.paretovariate(1.2)))
+            if rng.random() < 0.5:
+                cid = rng.randint(1, max_id)
+            requests.append((kind, f"/{cid}", {}))
+    return requests
+
+
+async def invalidate_cache(redis_url: str):
+    client = redis.from_url(redis_url)
+    try:
+        for namespace in _NAMESPACES:
+            generation = await client.incr(f"cache_gen:{namespace}")
+            await client.publish(_INVALIDATION_CHANNEL, orjson.dumps({"ns": namespace, "gen": generation}))
+    finally:
+        await client.close()
+    # Los workers releen la generación como mucho cada pocos segundos
+    await asyncio.sleep(6)
+
+
+async def run_phase(base_url: str, requests: List[Request], concurrency: int) -> dict:
+    latencies: Dict[str, List[float]] = {kind: [] for kind in MIX}
+    errors: Dict[str, int] = {kind: 0 for kind in MIX}
+    position = 0
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal position
+        while position < len(requests):
+            kind, path, params = requests[position]
+            position += 1
+            start = time.perf_counter()
+            try:
+                resp = await client.get(path, params=params)
+                ok = resp.status_code < 500 and resp.status_code != 429
+            except httpx.HTTPError:
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            if ok:
+                latencies[kind].append(elapsed)
+            else:
+                errors[kind] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "wall_seconds": round(wall, 3),
+        "overall": _summary(all_latencies, sum(errors.values()), wall),
+        "by_kind": {kind: _summary(latencies[kind], errors[kind], wall) for kind in MIX},
+    }
+
+
+def _percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    # Rango más cercano
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return round(sorted_values[rank], 3)
+
+
+def _summary(values: List[float], errors: int, wall: float) -> dict:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / wall, 1) if wall else None,
+        "mean_ms": round(sum(values) / len(values), 3) if values else None,
+        "p50_ms": _percentile(values, 50),
+        "p95_ms": _percentile(values, 95),
+        "p99_ms": _percentile(values, 99),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+async def _discover_max_id(base_url: str) -> int:
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+        resp = await client.get("/", params={"page_size": 1})
+        resp.raise_for_status()
+        return max(1, resp.json()["total_items"])
+
+
+def _print_results(results: dict, previous: Optional[dict]):
+    print(f"\n{'fase':<6} {'tipo':<8} {'n':>6} {'err':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for phase, data in results["phases"].items():
+        rows = [("total", data["overall"])] + list(data["by_kind"].items())
+        for kind, s in rows:
+            line = (
+                f"{phase:<6} {kind:<8} {s['count']:>6} {s['errors']:>5} {s['throughput_rps'] or 0:>8} "
+                f"{s['p50_ms'] or 0:>7.1f}ms {s['p95_ms'] or 0:>7.1f}ms {s['p99_ms'] or 0:>7.1f}ms"
+            )
+            if previous:
+                before = previous["phases"].get(phase, {})
+                before = before.get("overall") if kind == "total" else before.get("by_kind", {}).get(kind)
+                if before and before.get("p95_ms") and s["p95_ms"]:
+                    line += f"  p95 {100 * (s['p95_ms'] / before['p95_ms'] - 1):+.1f}% vs {previous['commit']}"
+            print(line)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de componentes")
+    parser.add_argument("--base-url", default="http://localhost:8103/api/v1/components")
+    parser.add_argument("--redis-url", default="redis://localhost:6390", help="Redis del servicio (para la fase cold)")
+    parser.add_argument("--requests", type=int, default=5000, help="Peticiones por fase")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--max-id", type=int, default=None, help="Mayor id de componente (por defecto: total_items)")
+    parser.add_argument("--label", default="", help="Etiqueta libre para el resultado")
+    parser.add_argument("--output-dir", default=os.path.join(os.path.dirname(__file__), "results"))
+    parser.add_argument("--compare", default=None, help="JSON de una ejecución anterior")
+    args = parser.parse_args()
+
+    max_id = args.max_id or await _discover_max_id(args.base_url)
+    requests = build_requests(random.Random(args.seed), args.requests, max_id)
+
+    phases = {}
+    await invalidate_cache(args.redis_url)
+    phases["cold"] = await run_phase(args.base_url, requests, args.concurrency)
+    phases["warm"] = await run_phase(args.base_url, requests, args.concurrency)
+
+    commit = _git_commit()
+    results = {
+        "label": args.label,
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "params": {
+            "base_url": args.base_url,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "max_id": max_id,
+            "mix": MIX,
+        },
+        "phases": phases,
+    }
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = os.path.join(args.output_dir, f"{stamp}_{commit}.json")
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+
+    previous = None
+    if args.compare:
+        with open(args.compare, "rb") as f:
+            previous = orjson.loads(f.read())
+    _print_results(results, previous)
+    print(f"\nResultados guardados en {path}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
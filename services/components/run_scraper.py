@@ -31,7 +31,16 @@ from app.db.session import SessionLocal
 from app.crud import crud_scraper
 from app.schemas.component import ComponentCreate
 from app.schemas.offer import OfferCreate
-from app.services.cache_service import init_redis, close_redis, invalidate_cache
+from app.services.cache_service import (
+    init_redis, close_redis, bump_generation,
+    COMPONENT_LIST_NS, COMPONENT_DETAIL_NS
+)
+from app.services.alternatives_index import build_alternatives_index
+from app.services.read_routing import mark_recent_write
+from app.services.offer_sweeper import sweep_stale_offers
+from app.services.price_stats import build_price_stats
+from app.services.cache_warmer import warm_hot_keys
+from app.services.image_cache import pregenerate_thumbnails
 
 logging.basicConfig(level=logging.WARNING)
 
@@ -276,6 +285,8 @@ class MultiStoreScraper:
     def __init__(self, db: Session):
         self.driver = None
         self.db = db # <-- Guardamos la sesión de DB
+        # URLs de imagen de los componentes guardados (para las miniaturas)
+        self.image_urls = set()
         self.setup_driver()
         
         # TODAS LAS CATEGORÍAS (Copiado 1:1)
@@ -643,6 +654,11 @@ class MultiStoreScraper:
                 # (Crea/actualiza la oferta para ESE componente y ESA tienda)
                 crud_scraper.upsert_offer(self.db, component_id=db_component.id, offer_in=offer_in)
                 
+                # Imagen para pre-generar sus miniaturas (las que ya
+                # están en disco se saltan: en la práctica, solo las nuevas)
+                if db_component.image_url:
+                    self.image_urls.add(db_component.image_url)
+
                 processed_count += 1
 
             except Exception as e:
@@ -717,15 +733,63 @@ async def main():
         # (Este método NO es async, se ejecuta de forma síncrona)
         scraper.run(max_pages_per_search=7)
         
-        # 5. Invalidar la caché de Redis
+        # 5. Archivar las ofertas que ya no aparecen (no se actualizaron
+        # en OFFER_STALE_HORIZON_HOURS), antes de recalcular alternativas
+        print("\n🧹 Archivando ofertas viejas...")
+        try:
+            result = sweep_stale_offers()
+            print(f"✅ {result['archived_offers']} ofertas archivadas ({result['components_touched']} componentes).")
+        except Exception as e:
+            print(f"⚠️  Error archivando ofertas viejas: {e}")
+
+        # 5b. Percentiles de precio por categoría/marca (deal_score)
+        print("\n📊 Calculando estadísticas de precio...")
+        try:
+            total = build_price_stats(db)
+            print(f"✅ Estadísticas de precio para {total} grupos.")
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️  Error calculando estadísticas de precio: {e}")
+
+        # 5c. Recalcular las alternativas (vecinos más cercanos) con los
+        # precios nuevos, ANTES de invalidar la caché
+        print("\n🧭 Calculando alternativas de cada componente...")
+        try:
+            total = build_alternatives_index(db)
+            print(f"✅ Alternativas calculadas para {total} componentes.")
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️  Error calculando alternativas: {e}")
+
+        # 6. Invalidar la caché de Redis
         print("\n" + "="*70)
         print("🔄 INVALIDANDO CACHÉ DE REDIS...")
         print("="*70)
-        # Borramos las cachés de detalle y de listas
-        await invalidate_cache("component_detail:*")
-        await invalidate_cache("components:*")
+        # Mientras la réplica alcanza los datos nuevos, los rellenos de
+        # caché leen de la primaria (ver services/read_routing)
+        await mark_recent_write()
+        # Invalidamos las cachés de detalle y de listas (O(1), sin SCAN)
+        await bump_generation(COMPONENT_DETAIL_NS)
+        await bump_generation(COMPONENT_LIST_NS)
         print("✅ Caché invalidada. La API servirá datos frescos.")
 
+        # 7. Recalcular las páginas y detalles más leídos antes de que
+        # llegue el tráfico (acotado: CACHE_WARM_TOP_N / CACHE_WARM_CONCURRENCY)
+        print("\n🔥 Pre-calentando la caché...")
+        try:
+            await warm_hot_keys()
+        except Exception as e:
+            print(f"⚠️  Error pre-calentando la caché: {e}")
+
+        # 8. Miniaturas WebP de las imágenes que aún no las tienen, para
+        # que la primera visita a la lista no espere a la tienda
+        print("\n🖼️  Generando miniaturas...")
+        try:
+            result = await pregenerate_thumbnails(scraper.image_urls)
+            print(f"✅ {result['generated']} nuevas, {result['cached']} ya existían, {result['failed']} con error, {result['skipped']} con fallo reciente.")
+        except Exception as e:
+            print(f"⚠️  Error generando miniaturas: {e}")
+
     except Exception as e:
         print(f"❌ Error fatal en el script principal: {e}")
         db.rollback()